@@ -0,0 +1,376 @@
+import multiprocessing
+import numpy as np
+from correlation import encode_tokens
+
+# exact distances 1 to 8, then buckets doubling in width up to distance 255
+DEFAULT_BUCKET_EDGES = [1, 2, 3, 4, 5, 6, 7, 8, 16, 32, 64, 128, 256]
+
+# token ids and settings of a worker process
+worker_data = None
+
+
+def reduce_counts(keys, counts):
+    """Sum up the counts of equal keys
+
+    Returns
+    -------
+    np.ndarray, np.ndarray
+        sorted unique keys and their summed counts
+    """
+
+    if len(keys) == 0:
+        return keys, counts
+
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    counts = counts[order]
+
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return keys[starts], np.add.reduceat(counts, starts)
+
+
+class PairCounter:
+    """Counts the (first, second, bucket) triples of a token id stream chunk by chunk. A chunk counts the pairs whose second token
+    is in it, the last ids of the previous chunk are kept as history for the pairs crossing the chunk border. The chunk counts are
+    buffered and merged into one sorted table once they have more entries than the table itself, so every entry is merged
+    O(log n) times. The memory grows with the amount of distinct pairs, it is not bounded by chunk_pairs.
+    """
+
+    def __init__(self, bucket_edges, vocabulary_size, chunk_pairs):
+        """
+        Parameters
+        ----------
+        bucket_edges : integer[]
+            Bucket k contains the distances bucket_edges[k] to bucket_edges[k + 1] - 1
+        vocabulary_size : integer
+            Factor of the first id in the keys, larger than every token id
+        chunk_pairs : integer
+            Amount of pairs which are counted at once
+        """
+
+        self.bucket_edges = list(bucket_edges)
+        self.buckets = len(self.bucket_edges) - 1
+        self.max_distance = self.bucket_edges[-1] - 1
+        self.vocabulary_size = vocabulary_size
+        self.chunk_pairs = chunk_pairs
+
+        if (vocabulary_size * vocabulary_size * self.buckets).bit_length() > 63:
+            raise ValueError("{} tokens with {} buckets do not fit into int64 keys".format(vocabulary_size, self.buckets))
+
+        self.history = np.zeros(0, dtype=np.int64)
+        self.keys = []
+        self.counts = []
+        self.merged = 0
+        self.buffered = 0
+
+    def add_ids(self, ids):
+        """Count the pairs ending in the next token ids of the stream
+        """
+
+        ids = np.asarray(ids, dtype=np.int64)
+        chunk_size = max(1, self.chunk_pairs // self.max_distance)
+
+        for chunk_start in range(0, len(ids), chunk_size):
+            self.__count_chunk(ids[chunk_start:chunk_start + chunk_size])
+
+    def get_counts(self):
+        """Sorted keys ((first * vocabulary_size + second) * buckets + bucket) and their counts
+        """
+
+        if len(self.keys) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        self.__merge()
+        return self.keys[0], self.counts[0]
+
+    def __count_chunk(self, chunk):
+        ids = np.concatenate((self.history, chunk))
+        start = len(self.history)
+
+        for bucket in range(self.buckets):
+            pairs = []
+
+            for distance in range(self.bucket_edges[bucket], self.bucket_edges[bucket + 1]):
+                # second tokens in the chunk whose first token is in the chunk or the history
+                first_start = max(0, start - distance)
+                first_end = max(first_start, len(ids) - distance)
+                pairs.append(ids[first_start:first_end] * self.vocabulary_size + ids[first_start + distance:first_end + distance])
+
+            chunk_keys, chunk_counts = np.unique(np.concatenate(pairs) * self.buckets + bucket, return_counts=True)
+            self.keys.append(chunk_keys)
+            self.counts.append(chunk_counts.astype(np.int64))
+            self.buffered += len(chunk_keys)
+
+        self.history = ids[max(0, len(ids) - self.max_distance):]
+
+        # merging only when the buffer outgrows the merged table keeps the total merge work at O(n log n)
+        if self.buffered > max(self.chunk_pairs, self.merged):
+            self.__merge()
+
+    def __merge(self):
+        keys, counts = reduce_counts(np.concatenate(self.keys), np.concatenate(self.counts))
+        self.keys, self.counts = [keys], [counts]
+        self.merged = len(keys)
+        self.buffered = 0
+
+
+def count_shard(ids, start, end, vocabulary_size, bucket_edges, chunk_pairs):
+    """Count the (first, second, bucket) triples of all pairs whose second token is in ids[start:end]
+
+    Parameters
+    ----------
+    ids : np.ndarray
+        int64 array of all token ids
+    start : integer
+        First position of the shard
+    end : integer
+        Position after the shard
+    vocabulary_size : integer
+        Amount of distinct token ids
+    bucket_edges : integer[]
+        Bucket k contains the distances bucket_edges[k] to bucket_edges[k + 1] - 1
+    chunk_pairs : integer
+        Amount of pairs which are counted at once
+
+    Returns
+    -------
+    np.ndarray, np.ndarray
+        sorted keys ((first * vocabulary_size + second) * buckets + bucket) and their counts
+    """
+
+    counter = PairCounter(bucket_edges, vocabulary_size, chunk_pairs)
+
+    # the tokens before the shard are only partners of its first tokens
+    counter.history = ids[max(0, start - counter.max_distance):start]
+    counter.add_ids(ids[start:end])
+
+    return counter.get_counts()
+
+
+def count_task(bounds):
+    ids, vocabulary_size, bucket_edges, chunk_pairs = worker_data
+    return count_shard(ids, bounds[0], bounds[1], vocabulary_size, bucket_edges, chunk_pairs)
+
+
+def init_worker(data):
+    global worker_data
+    worker_data = data
+
+
+class CooccurrenceMatrix:
+    """Sparse co-occurrence tensor of (first word, second word, distance bucket): how often the second word follows the first one
+    at a distance of the bucket. The non-zero entries are stored as sorted int64 keys and their counts.
+    """
+
+    def __init__(self, keys, counts, tokens, token_counts, bucket_edges):
+        """
+        Parameters
+        ----------
+        keys : np.ndarray
+            Sorted keys (first * vocabulary size + second) * buckets + bucket
+        counts : np.ndarray
+            Count of each key
+        tokens : string[]
+            Token of each id
+        token_counts : np.ndarray
+            Occurrences of each token id
+        bucket_edges : integer[]
+            Bucket k contains the distances bucket_edges[k] to bucket_edges[k + 1] - 1
+        """
+
+        self.keys = keys
+        self.counts = counts
+        self.tokens = tokens
+        self.index = {token: token_id for token_id, token in enumerate(tokens)}
+        self.token_counts = token_counts
+        self.bucket_edges = list(bucket_edges)
+        self.buckets = len(self.bucket_edges) - 1
+        self.length = int(np.sum(token_counts))
+
+    def get_counts(self, first, second):
+        """Co-occurrence counts of a word pair in each bucket
+
+        Parameters
+        ----------
+        first : string
+            The first word
+        second : string
+            The word following the first one
+
+        Returns
+        -------
+        np.ndarray
+            int64 array with one count per bucket
+        """
+
+        result = np.zeros(self.buckets, dtype=np.int64)
+
+        if first not in self.index or second not in self.index:
+            return result
+
+        base = (self.index[first] * len(self.tokens) + self.index[second]) * self.buckets
+        low, high = np.searchsorted(self.keys, [base, base + self.buckets])
+        result[np.asarray(self.keys[low:high]) - base] = self.counts[low:high]
+
+        return result
+
+    def get_pair_totals(self):
+        """Amount of token positions at each bucket's distances, the number of pairs a bucket could contain
+        """
+
+        return np.array([sum(max(0, self.length - distance) for distance in range(self.bucket_edges[bucket],
+                                                                                   self.bucket_edges[bucket + 1]))
+                         for bucket in range(self.buckets)], dtype=np.float64)
+
+    def get_correlation_curve(self, first, second=None):
+        """Correlation of a word pair in each bucket like calc_correlations of correlation.py: the relative frequency of the pair at
+        the distances of the bucket divided by the product of the relative frequencies of both words
+
+        Parameters
+        ----------
+        first : string
+            The first word
+        second : string, optional
+            The word following the first one (the default is None, which correlates the first word with itself)
+
+        Returns
+        -------
+        np.ndarray, np.ndarray
+            Mean distance and correlation of each bucket, 0 where the pair does not occur
+        """
+
+        second = first if second is None else second
+        counts = self.get_counts(first, second)
+
+        distances = np.array([(self.bucket_edges[bucket] + self.bucket_edges[bucket + 1] - 1) / 2.0 for bucket in range(self.buckets)])
+
+        if counts.sum() == 0:
+            return distances, np.zeros(self.buckets)
+
+        frequencies = [self.token_counts[self.index[word]] / float(self.length) for word in (first, second)]
+        pair_totals = self.get_pair_totals()
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlations = counts / pair_totals / (frequencies[0] * frequencies[1])
+
+        return distances, np.where(counts > 0, correlations, 0.0)
+
+    def get_top_pairs(self, bucket, amount=10):
+        """The most frequent word pairs of a bucket
+
+        Returns
+        -------
+        (string, string, integer)[]
+            first word, second word and count, most frequent first
+        """
+
+        in_bucket = np.flatnonzero(np.asarray(self.keys) % self.buckets == bucket)
+        top = in_bucket[np.argsort(-np.asarray(self.counts)[in_bucket], kind="stable")[:amount]]
+
+        pairs = np.asarray(self.keys)[top] // self.buckets
+        return [(self.tokens[pair // len(self.tokens)], self.tokens[pair % len(self.tokens)], int(self.counts[index]))
+                for pair, index in zip(pairs, top)]
+
+    def save(self, path):
+        np.savez(path, keys=self.keys, counts=self.counts, tokens=np.array(self.tokens), token_counts=self.token_counts,
+                 bucket_edges=np.array(self.bucket_edges))
+
+    @staticmethod
+    def load(path):
+        data = np.load(path)
+        return CooccurrenceMatrix(data["keys"], data["counts"], data["tokens"].tolist(), data["token_counts"],
+                                  data["bucket_edges"].tolist())
+
+
+def build_cooccurrences(tokens, bucket_edges=DEFAULT_BUCKET_EDGES, workers=1, chunk_pairs=1 << 22):
+    """Count the co-occurrences of all word pairs in all distance buckets. The token ids are split into one contiguous shard per
+    worker process, each shard is counted in chunks of at most chunk_pairs pairs. For texts whose token list does not fit into
+    the memory use build_cooccurrences_streaming.
+
+    Parameters
+    ----------
+    tokens : string[]
+        Tokenized text
+    bucket_edges : integer[]
+        Bucket k contains the distances bucket_edges[k] to bucket_edges[k + 1] - 1
+    workers : integer
+        Amount of worker processes
+    chunk_pairs : integer
+        Amount of pairs which are counted at once, this bounds the memory of a chunk, not of the merged counts
+
+    Returns
+    -------
+    CooccurrenceMatrix
+        Sparse co-occurrence tensor of the text
+    """
+
+    ids, index = encode_tokens(tokens)
+    vocabulary_size = max(1, len(index))
+
+    if (vocabulary_size * vocabulary_size * (len(bucket_edges) - 1)).bit_length() > 63:
+        raise ValueError("{} tokens with {} buckets do not fit into int64 keys".format(vocabulary_size, len(bucket_edges) - 1))
+
+    shard_edges = np.linspace(0, len(ids), workers + 1).astype(np.int64)
+    shards = [(int(start), int(end)) for start, end in zip(shard_edges, shard_edges[1:]) if end > start]
+    data = (ids, vocabulary_size, list(bucket_edges), chunk_pairs)
+
+    if workers > 1:
+        with multiprocessing.Pool(workers, initializer=init_worker, initargs=(data,)) as pool:
+            results = pool.map(count_task, shards)
+    else:
+        init_worker(data)
+        results = [count_task(shard) for shard in shards]
+
+    if len(results) == 0:
+        keys, counts = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    else:
+        keys, counts = reduce_counts(np.concatenate([keys for keys, _ in results]), np.concatenate([counts for _, counts in results]))
+
+    return CooccurrenceMatrix(keys, counts, list(index), np.bincount(ids, minlength=len(index)), bucket_edges)
+
+
+def build_cooccurrences_streaming(token_chunks, bucket_edges=DEFAULT_BUCKET_EDGES, chunk_pairs=1 << 22, max_vocabulary=1 << 24):
+    """Count the co-occurrences like build_cooccurrences, but of a text given as iterator of token chunks, e.g. the sanitized
+    batches of iter_sanitized. Only the current chunk and the counts are in memory, not the token list of the whole text.
+
+    Parameters
+    ----------
+    token_chunks : iterable of string[]
+        Consecutive chunks of the tokenized text
+    bucket_edges : integer[]
+        Bucket k contains the distances bucket_edges[k] to bucket_edges[k + 1] - 1
+    chunk_pairs : integer
+        Amount of pairs which are counted at once
+    max_vocabulary : integer
+        Largest amount of distinct tokens, the vocabulary size is not known while counting
+
+    Returns
+    -------
+    CooccurrenceMatrix
+        Sparse co-occurrence tensor of the text
+    """
+
+    buckets = len(bucket_edges) - 1
+    counter = PairCounter(bucket_edges, max_vocabulary, chunk_pairs)
+    index = {}
+    token_counts = np.zeros(0, dtype=np.int64)
+
+    for tokens in token_chunks:
+        ids, index = encode_tokens(tokens, index)
+
+        if len(index) > max_vocabulary:
+            raise ValueError("The text has more than {} distinct tokens, raise max_vocabulary".format(max_vocabulary))
+
+        token_counts = np.concatenate((token_counts, np.zeros(len(index) - len(token_counts), dtype=np.int64)))
+        token_counts += np.bincount(ids, minlength=len(index))
+        counter.add_ids(ids)
+
+    keys, counts = counter.get_counts()
+
+    # replace max_vocabulary by the final vocabulary size, the order of the keys stays the same
+    vocabulary_size = max(1, len(index))
+    pairs, bucket = np.divmod(keys, buckets)
+    first, second = np.divmod(pairs, max_vocabulary)
+    keys = (first * vocabulary_size + second) * buckets + bucket
+
+    return CooccurrenceMatrix(keys, counts, list(index), token_counts, bucket_edges)
@@ -0,0 +1,115 @@
+import numpy as np
+
+
+def encode_tokens(tokens, index=None):
+    """Convert tokens into integer ids in order of their first occurrence
+
+    Parameters
+    ----------
+    tokens : string[]
+        Tokenized text
+    index : dict, optional
+        Dictionary of an earlier call which gets extended by the new tokens (the default is None, which starts a new one)
+
+    Returns
+    -------
+    np.ndarray, dict
+        int64 array of token ids and the dictionary mapping each token to its id
+    """
+
+    index = {} if index is None else index
+    ids = np.fromiter((index.setdefault(token, len(index)) for token in tokens), dtype=np.int64, count=len(tokens))
+    return ids, index
+
+
+def get_pairs(queries):
+    """Word pairs of a query list: single words are paired with themselves
+    """
+
+    return [(query, query) if isinstance(query, str) else tuple(query) for query in queries]
+
+
+def calc_cooccurrences(ids, pairs, max_distance, batch_size=64):
+    """Count how often the second word of each pair follows the first one at each distance. The counts of all distances are
+    computed at once as FFT cross-correlation of the indicator arrays of both words.
+
+    Parameters
+    ----------
+    ids : np.ndarray
+        int64 array of token ids
+    pairs : (int, int)[]
+        Token id pairs, ids which do not occur in the text get zero counts
+    max_distance : integer
+        The largest distance d
+    batch_size : integer
+        Amount of pairs whose indicator spectra are computed at once
+
+    Returns
+    -------
+    np.ndarray
+        int64 array of shape (pairs, max_distance), the counts of the distances 1 to max_distance
+    """
+
+    counts = np.zeros((len(pairs), max_distance), dtype=np.int64)
+
+    if len(ids) == 0 or max_distance == 0:
+        return counts
+
+    # zero padding, so the circular correlation does not wrap around
+    length = 1 << int(len(ids) + max_distance - 1).bit_length()
+
+    for start in range(0, len(pairs), batch_size):
+        batch = np.array(pairs[start:start + batch_size], dtype=np.int64).reshape(-1, 2)
+        words, inverse = np.unique(batch, return_inverse=True)
+        inverse = inverse.reshape(-1, 2)
+
+        # spectrum of the indicator array of each distinct word of the batch
+        spectra = np.fft.rfft((ids[None, :] == words[:, None]).astype(np.float64), n=length, axis=1)
+
+        # sum over i of first[i] * second[i + d] for all d
+        correlations = np.fft.irfft(np.conj(spectra[inverse[:, 0]]) * spectra[inverse[:, 1]], n=length, axis=1)
+        counts[start:start + len(batch)] = np.rint(correlations[:, 1:max_distance + 1]).astype(np.int64)
+
+    return counts
+
+
+def calc_correlations(tokens, queries, max_distance, batch_size=64):
+    """Calculate the correlations of words or word pairs for all distances 1 to max_distance: the relative frequency of the pair
+    at distance d divided by the product of the relative frequencies of both words
+
+    Parameters
+    ----------
+    tokens : string[]
+        Tokenized text
+    queries : (string | (string, string))[]
+        Words whose occurrences are correlated with themselves or pairs of a first and a following second word
+    max_distance : integer
+        The largest distance d
+    batch_size : integer
+        Amount of pairs whose indicator spectra are computed at once
+
+    Returns
+    -------
+    np.ndarray
+        float array of shape (queries, max_distance), 0 where the pair does not occur at a distance
+    """
+
+    ids, index = encode_tokens(tokens)
+    pairs = get_pairs(queries)
+
+    # unknown words get an id which does not occur
+    pair_ids = [(index.get(first, -1), index.get(second, -1)) for first, second in pairs]
+    max_distance = min(max_distance, max(0, len(ids) - 1))
+    counts = calc_cooccurrences(ids, pair_ids, max_distance, batch_size)
+
+    word_counts = np.bincount(ids, minlength=len(index))
+    frequencies = np.array([[word_counts[word] if word >= 0 else 0 for word in pair] for pair in pair_ids], dtype=np.float64)
+    frequencies = frequencies.reshape(-1, 2) / float(max(1, len(ids)))
+
+    distances = np.arange(1, max_distance + 1)
+    sequence_frequencies = counts / (len(ids) - distances).astype(np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlations = sequence_frequencies / (frequencies[:, :1] * frequencies[:, 1:])
+
+    return np.where(counts > 0, correlations, 0.0)
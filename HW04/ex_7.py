@@ -1,9 +1,16 @@
+import os
+import sys
 import nltk
-import re
 import matplotlib.pyplot as plt
 import numpy as np
+from correlation import calc_correlations
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from text_sanitizer import sanitize_text as shared_sanitize_text
 # nltk.download('gutenberg')
 
+# variations of you and contraction endings which are replaced before removing the non characters
+REPLACEMENTS = {'your': 'you', 'yours': 'you', 'll': '', 've': '', 're': ''}
+
 
 def sanitize_text(tokens):
     """Sanizite Text:
@@ -23,24 +30,7 @@ def sanitize_text(tokens):
 
     """
 
-    tokens = [x.lower() for x in tokens]
-    regex = re.compile('[^a-z]')
-
-    variations_you = ['your', 'yours']
-    remove = ['ll', 've', 're']
-
-    for index in range(len(tokens)):
-        if tokens[index] in variations_you:
-            tokens[index] = 'you'
-
-        if tokens[index] in remove:
-            tokens[index] = ''
-
-        tokens[index] = regex.sub('', tokens[index])
-
-    # remove empty elements
-    tokens = [token for token in tokens if token != '']
-    return tokens
+    return shared_sanitize_text(tokens, replacements=REPLACEMENTS)
 
 
 def write_file(file_path, tokens):
@@ -49,57 +39,39 @@ def write_file(file_path, tokens):
     f.close()
 
 
-def calc_correlation(distance, tokens):
-    """Calculate correlations for a given distance
+def plot_correlation(tokens, max_distance, words=('you',)):
+    """Print and plot the correlations of words with themselves or of word pairs for the distances 1 to max_distance
 
     Parameters
     ----------
-    distance : integer
-        The distance d.
     tokens : string[]
         Tokenized text
-
-    Returns
-    -------
-    double
-        The correlation for a given distance
+    max_distance : integer
+        The largest distance d
+    words : (string | (string, string))[]
+        Words or pairs of a first and a following second word
     """
 
-    YOU = 'you'
-    # Count 'you' with distance d
-    count_you_sequence = 0
-
-    # count how often the word 'you' appears in the text
-    count_you = tokens.count(YOU)
-
-    for i in range(len(tokens) - distance):
-        if tokens[i] == YOU and tokens[i + distance] == YOU:
-            count_you_sequence += 1
-
-    if count_you_sequence == 0:
-        print('No instance of you with distance d = ' + str(distance))
-        return 0
-
-    # calcualte the relative frequencies
-    rel_freq_you_sequence = count_you_sequence / float(len(tokens) - distance)
-    rel_freq_total = count_you / float(len(tokens))
+    distances = np.arange(1, max_distance + 1)
 
-    corr = rel_freq_you_sequence / float(rel_freq_total * rel_freq_total)
-    print("Correlation distance " + str(distance) + " :" + str(corr))
-    return corr
+    # correlations of all words and distances at once, distances beyond the text have no instance
+    correlations = calc_correlations(tokens, list(words), max_distance)
+    correlations = np.pad(correlations, ((0, 0), (0, max_distance - correlations.shape[1])))
 
+    for word, word_correlations in zip(words, correlations):
+        name = word if isinstance(word, str) else ' '.join(word)
 
-def plot_correlation(tokens, max_distance):
-    distances = np.zeros(max_distance)
-    correlations = np.zeros(max_distance)
+        for distance, corr in zip(distances, word_correlations):
+            if corr == 0:
+                print('No instance of ' + name + ' with distance d = ' + str(distance))
+            else:
+                print("Correlation distance " + str(distance) + " :" + str(corr))
 
-    for d in range(0, max_distance):
-        distances[d] = d + 1
-        correlations[d] = calc_correlation(d + 1, tokens)
+        plt.scatter(distances, word_correlations, label=name)
 
-    plt.scatter(distances, correlations)
     plt.ylabel('Correlation')
     plt.xlabel('Distance')
+    plt.legend()
     plt.show()
 
 
@@ -1,50 +1,34 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import re
+import argparse
+import multiprocessing
+import numpy as np
 from nltk.tokenize import word_tokenize
 from math import log10
+from ngram_counts import Vocabulary, count_ngrams
+from ngram_cv import cross_validate, get_lambda_grid
+from ngram_scoring import MaximumLikelihoodModel, AdditiveSmoothingModel, encode_sentences, score_sentences
+from ngram_sketch import count_ngrams_approximate
+from ngram_stream import sanitize_text
 
 
-def sanitize_text(tokens):
-    """Sanizite Text:
-        Lowercase
-        Remove non characters
-    Parameters
-    ----------
-    tokens : string[]
-        Tokenized text
-
-    Returns
-    -------
-    string[]
-        Sanitized tokens.
-
-    """
-
-    tokens = [x.lower() for x in tokens]
-    regex = re.compile('[^a-z]')
-
-    for index in range(len(tokens)):
-        tokens[index] = regex.sub('', tokens[index])
-
-    # remove empty elements
-    tokens = [token for token in tokens if token != '']
-    return tokens
-
-
-def calc_n_gram_frequencies(tokens, l):
+def calc_n_gram_frequencies(tokens, l, vocabulary=None, token_ids=None):
     """
     Calculate n grams frequencies based on tokens and l = ngram length
+    The tokens get counted as integer ids, pass vocabulary and token_ids to reuse an existing encoding
     """
-    frequencies = {}
+    if vocabulary is None:
+        vocabulary = Vocabulary()
+        token_ids = vocabulary.encode(tokens)
 
-    for index, word in enumerate(tokens):
-        if index > len(tokens) - l:
-            break
+    frequencies = count_ngrams(token_ids, l + 1, vocabulary, keep_order=True).to_dict()
 
-        ngram = " ".join(tokens[index:index + l + 1])
+    # the last position only has l tokens left, it is counted as shorter n gram
+    if l > 0 and len(tokens) >= l:
+        ngram = " ".join(tokens[len(tokens) - l:])
         frequencies[ngram] = frequencies.get(ngram, 0) + 1
+
     return frequencies
 
 
@@ -90,23 +74,17 @@ def test_set_frequencies():
     test.close()
     tokens = sanitize_text(tokens)
 
-    freq1 = {}
-    freq2 = {}
-    freq3 = {}
-    N = 0
-
-    for index, word in enumerate(tokens):
-
-        ngram = " ".join(tokens[index:index + 1])
-        freq1[ngram] = freq1.get(ngram, 0) + 1
+    vocabulary = Vocabulary()
+    token_ids = vocabulary.encode(tokens)
 
-        ngram = " ".join(tokens[index:index + 1 + 1])
-        freq2[ngram] = freq2.get(ngram, 0) + 1
-
-        ngram = " ".join(tokens[index:index + 2 + 1])
-        freq3[ngram] = freq3.get(ngram, 0) + 1
+    freq1 = calc_n_gram_frequencies(tokens, 0, vocabulary, token_ids)
+    freq2 = calc_n_gram_frequencies(tokens, 1, vocabulary, token_ids)
+    freq3 = calc_n_gram_frequencies(tokens, 2, vocabulary, token_ids)
+    N = len(tokens)
 
-        N += 1
+    # the trigrams also contain the last token on its own
+    if N > 0:
+        freq3[tokens[-1]] = freq3.get(tokens[-1], 0) + 1
 
     for u in freq1:
         freq1[u] = freq1[u] / float(N)
@@ -186,6 +164,30 @@ def smoothed_perplexity(ngram_, N, unigrams, bigrams, trigrams, alpha):
         return (trigrams.get(ngram, 0) + alpha) / float(bigrams.get(ngram_[0] + "  " + ngram_[1], 0) + alpha * len(unigrams))
 
 
+def calculate_approximate_perplexity(tokens, epsilon=1e-4, alpha=0.1):
+    """
+    Calculate the perplexities of calculate_perplexity and an additive smoothed perplexity with the bi and trigrams counted
+    approximately in count-min sketches. A sketch can not list its n-grams for the dictionaries of calc_2_gram_probabilities and
+    calc_3_gram_probabilities, so the probabilities of the test n-grams are computed from looked up counts instead.
+    """
+    test = open("./data/test.txt", "r")
+    test_tokens = word_tokenize(test.read())
+    test.close()
+    test_tokens = sanitize_text(test_tokens)
+
+    vocabulary = Vocabulary()
+    token_ids = vocabulary.encode(tokens)
+    ngram_counts = [count_ngrams_approximate(token_ids, n, vocabulary, epsilon) for n in range(1, 4)]
+    sentences = encode_sentences([test_tokens], vocabulary)
+
+    model = MaximumLikelihoodModel(ngram_counts)
+    for n, name in enumerate(["Unigram", "Bigram", "Trigram"], 1):
+        print("Approximate {} Perplexity: {}".format(name, score_sentences(model, sentences, n).get_corpus_perplexity()))
+
+    smoothed = score_sentences(AdditiveSmoothingModel(ngram_counts, alpha), sentences)
+    print("Approximate Smoothed Perplexity:", smoothed.get_corpus_perplexity())
+
+
 def partition(lst, n):
     """
     Partition function from stack overflow
@@ -203,45 +205,42 @@ def exercise2_1():
     tokens = sanitize_text(tokens)
     tokens_split = partition(tokens, 5)
     cv(0.5, 0.5, tokens_split)
+    grid_search(tokens_split)
 
 
 def cv(lamdba1, lamdba2, token_list):
     """
-    Perform crossvalidation
+    Perform crossvalidation of the bigram model interpolated with the unigram model
     """
+    vocabulary = Vocabulary()
+    token_ids = vocabulary.encode([token for tokens in token_list for token in tokens])
 
-    for index, value in enumerate(token_list):
-        # remove current value from list
-        train_set = [x for i, x in enumerate(token_list) if i != index]
-        # flatten list
-        train_set = [y for x in train_set for y in x]
-        test_set = value
-
-        train_unigrams = calc_n_gram_frequencies(train_set, 0)
-        train_unigram_probabilities = calc_1_gram_probabilities(
-            train_unigrams, len(train_set))
-        train_bigrams = calc_n_gram_frequencies(train_set, 1)
-        train_bigram_probabilities = calc_2_gram_probabilities(
-            train_bigrams, train_unigrams)
+    perplexity = cross_validate(token_ids, vocabulary, [len(tokens) for tokens in token_list], [[lamdba1, lamdba2]])[0]
+    print("Cross validated perplexity (lambda1 = {}, lambda2 = {}): {}".format(lamdba1, lamdba2, perplexity))
+    return perplexity
 
-        interp_bigram_probs = 0
-        for i in range(len(test_set) - 2):
-            ngram = test_set[i:i + 2]
 
-            """
-            TODO: Fix
-            interp_bigram_probs += lamdba1 * \
-                train_unigram_probabilities[ngram[0]] + lamdba2 * \
-                train_bigram_probabilities[" ".join(ngram)]
-            """
+def grid_search(token_list, steps=11, workers=multiprocessing.cpu_count()):
+    """
+    Find the interpolation weights with the lowest cross validated perplexity
+    """
+    vocabulary = Vocabulary()
+    token_ids = vocabulary.encode([token for tokens in token_list for token in tokens])
 
+    grid = get_lambda_grid(2, steps)
+    perplexities = cross_validate(token_ids, vocabulary, [len(tokens) for tokens in token_list], grid, workers)
 
-"""
-def grid_seach(tokenlist):
-"""
+    best = int(np.nanargmin(perplexities))
+    print("Best lambdas: lambda1 = {}, lambda2 = {}, perplexity: {}".format(grid[best][0], grid[best][1], perplexities[best]))
+    return grid[best], perplexities[best]
 
 
 def main():
+    ap = argparse.ArgumentParser(description="Exercise 1 and 2.1: n-gram perplexities and cross validation")
+    ap.add_argument("-a", "--approximate", action="store_true",
+                    help="Count the bi and trigrams of the training data in count-min sketches")
+    ap.add_argument("-e", "--epsilon", type=float, default=1e-4, help="Error of the approximate counts relative to the amount of n-grams")
+    args = ap.parse_args()
 
     f = open("./data/train.txt", "r")
 
@@ -250,9 +249,17 @@ def main():
     f.close()
     tokens = sanitize_text(tokens)
 
-    unigrams = calc_n_gram_frequencies(tokens, 0)
-    bigrams = calc_n_gram_frequencies(tokens, 1)
-    trigrams = calc_n_gram_frequencies(tokens, 2)
+    if args.approximate:
+        calculate_approximate_perplexity(tokens, args.epsilon)
+        exercise2_1()
+        return
+
+    vocabulary = Vocabulary()
+    token_ids = vocabulary.encode(tokens)
+
+    unigrams = calc_n_gram_frequencies(tokens, 0, vocabulary, token_ids)
+    bigrams = calc_n_gram_frequencies(tokens, 1, vocabulary, token_ids)
+    trigrams = calc_n_gram_frequencies(tokens, 2, vocabulary, token_ids)
 
     unigramProbs = calc_1_gram_probabilities(unigrams, len(tokens))
     bigramProbs = calc_2_gram_probabilities(bigrams, unigrams)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import numpy as np
+from ngram_counts import Vocabulary, count_ngrams
+from ngram_store import NGramStore, get_maximum_likelihood_levels, get_smoothed_levels
+
+# n-grams formatted or parsed at once
+BLOCK_SIZE = 1 << 16
+
+
+def write_arpa(path, vocabulary, levels, block_size=BLOCK_SIZE):
+    """Write n-gram levels as ARPA file. The lines are formatted block by block, so no dictionary of the whole model is built.
+
+    Parameters
+    ----------
+    path : string
+        Path of the ARPA file
+    vocabulary : Vocabulary
+        Vocabulary of the token ids
+    levels : (np.ndarray[], np.ndarray, np.ndarray)[]
+        Per order 1 to n: token id columns, log10 probabilities and log10 backoff weights (None if there are none), like
+        NGramStore.from_levels() takes them and NGramStore.get_levels() returns them
+    block_size : int
+        n-grams formatted at once
+    """
+
+    tokens = np.array(vocabulary.tokens, dtype=object)
+
+    with open(path, "w") as f:
+        f.write("\n\\data\\\n")
+        for order, (_, log_probs, _) in enumerate(levels, 1):
+            f.write("ngram {}={}\n".format(order, len(log_probs)))
+
+        for order, (columns, log_probs, backoffs) in enumerate(levels, 1):
+            f.write("\n\\{}-grams:\n".format(order))
+
+            for start in range(0, len(log_probs), block_size):
+                end = start + block_size
+                ngrams = map(" ".join, zip(*[tokens[np.asarray(column[start:end])] for column in columns]))
+
+                if backoffs is None:
+                    lines = ["{:.6f}\t{}\n".format(log_prob, ngram) for log_prob, ngram in zip(log_probs[start:end].tolist(), ngrams)]
+                else:
+                    lines = ["{:.6f}\t{}\t{:.6f}\n".format(log_prob, ngram, backoff)
+                             for log_prob, ngram, backoff in zip(log_probs[start:end].tolist(), ngrams, backoffs[start:end].tolist())]
+
+                f.writelines(lines)
+
+        f.write("\n\\end\\\n")
+
+
+def read_arpa_levels(path, block_size=BLOCK_SIZE):
+    """Read an ARPA file line by line into token id columns, log probabilities and backoff weights of each order. The arrays are
+    allocated with the sizes of the header and filled block by block, only the vocabulary is a dictionary.
+
+    Returns
+    -------
+    Vocabulary, (np.ndarray[], np.ndarray, np.ndarray)[]
+        Vocabulary of the unigrams in file order and the levels for NGramStore.from_levels()
+    """
+
+    vocabulary = Vocabulary()
+    sizes = []
+    levels = []
+
+    with open(path, "r") as f:
+        line = f.readline()
+
+        while line != "" and line.strip() != "\\data\\":
+            line = f.readline()
+
+        if line == "":
+            raise ValueError("{} has no \\data\\ section".format(path))
+
+        for line in f:
+            line = line.strip()
+
+            if line.startswith("ngram "):
+                sizes.append(int(line.split("=")[1]))
+            elif line != "":
+                break
+
+        for order, size in enumerate(sizes, 1):
+            if line != "\\{}-grams:".format(order):
+                raise ValueError("Expected the \\{}-grams: section in {}, found {}".format(order, path, line))
+
+            columns = [np.zeros(size, dtype=np.int64) for _ in range(order)]
+            log_probs = np.zeros(size)
+            backoffs = np.zeros(size)
+            has_backoffs = False
+            filled = 0
+
+            block = []
+            line = ""
+
+            for line in f:
+                line = line.strip()
+
+                if line.startswith("\\"):
+                    break
+
+                if line != "":
+                    block.append(line.split())
+
+                if len(block) == block_size:
+                    has_backoffs |= read_block(block, vocabulary, order, columns, log_probs, backoffs, filled)
+                    filled += len(block)
+                    block = []
+
+            has_backoffs |= read_block(block, vocabulary, order, columns, log_probs, backoffs, filled)
+            filled += len(block)
+
+            if filled != size:
+                raise ValueError("{} has {} {}-grams instead of {}".format(path, filled, order, size))
+
+            # n-grams with unknown tokens can not be stored
+            known = np.all([column >= 0 for column in columns], axis=0)
+            levels.append(([column[known] for column in columns], log_probs[known], backoffs[known] if has_backoffs else None))
+
+    return vocabulary, levels
+
+
+def read_block(block, vocabulary, order, columns, log_probs, backoffs, start):
+    """Fill the arrays of an order with a block of split lines, returns whether a line has a backoff weight
+    """
+
+    if len(block) == 0:
+        return False
+
+    end = start + len(block)
+    log_probs[start:end] = [float(fields[0]) for fields in block]
+
+    for position in range(order):
+        words = [fields[1 + position] for fields in block]
+        columns[position][start:end] = vocabulary.encode(words, add=order == 1)
+
+    has_backoffs = any(len(fields) > order + 1 for fields in block)
+    if has_backoffs:
+        backoffs[start:end] = [float(fields[order + 1]) if len(fields) > order + 1 else 0.0 for fields in block]
+
+    return has_backoffs
+
+
+def read_arpa(path, quantization=8):
+    """Load an ARPA file into the compact NGramStore
+    """
+
+    vocabulary, levels = read_arpa_levels(path)
+    return NGramStore.from_levels(vocabulary, levels, quantization)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert n-gram models from and to ARPA files")
+    subparsers = ap.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write the model of a text file or a model file as ARPA file")
+    export_parser.add_argument("input", help="Text file or model file of ngram_store.py")
+    export_parser.add_argument("output", help="Path of the ARPA file")
+    export_parser.add_argument("-n", "--order", type=int, default=3, help="Longest n-gram of the model of a text file")
+    export_parser.add_argument("-mc", "--min-count", type=int, default=2, help="Minimum count of bigrams and longer n-grams")
+    export_parser.add_argument("-a", "--alpha", type=float, default=None, help="Write the additive smoothed backoff model")
+    export_parser.add_argument("-s", "--store", action="store_true", help="The input is a model file of ngram_store.py")
+
+    import_parser = subparsers.add_parser("import", help="Convert an ARPA file into a model file of ngram_store.py")
+    import_parser.add_argument("input", help="Path of the ARPA file")
+    import_parser.add_argument("output", help="Path of the model file")
+    import_parser.add_argument("-q", "--quantization", type=int, choices=(8, 16), default=8, help="Bits per log probability")
+
+    args = ap.parse_args()
+
+    if args.command == "import":
+        read_arpa(args.input, args.quantization).save(args.output)
+        return
+
+    if args.store:
+        store = NGramStore.load(args.input)
+        write_arpa(args.output, store.vocabulary, store.get_levels())
+        return
+
+    from ngram_stream import default_tokenizer
+
+    with open(args.input, "r") as f:
+        tokens = default_tokenizer(f.read())
+
+    vocabulary = Vocabulary()
+    token_ids = vocabulary.encode(tokens)
+    ngram_counts = [count_ngrams(token_ids, n, vocabulary) for n in range(1, args.order + 1)]
+
+    if args.alpha is None:
+        levels = get_maximum_likelihood_levels(ngram_counts, args.min_count)
+    else:
+        levels = get_smoothed_levels(ngram_counts, args.alpha)
+
+    write_arpa(args.output, vocabulary, levels)
+
+
+if __name__ == "__main__":
+    main()
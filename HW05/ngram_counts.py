@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class Vocabulary:
+    """Maps tokens to integer ids in order of their first occurrence
+    """
+
+    def __init__(self, tokens=None):
+        self.index = {}
+        self.tokens = []
+
+        if tokens is not None:
+            self.encode(tokens)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def encode(self, tokens, add=True):
+        """Converts tokens into an array of ids
+
+        Parameters
+        ----------
+        tokens : string[]
+            Tokenized text
+        add : bool
+            Add unknown tokens to the vocabulary, otherwise they get the id -1
+
+        Returns
+        -------
+        np.ndarray
+            int64 array of token ids
+        """
+
+        if not add:
+            return np.fromiter((self.index.get(token, -1) for token in tokens), dtype=np.int64, count=len(tokens))
+
+        ids = np.fromiter((self.index.setdefault(token, len(self.index)) for token in tokens), dtype=np.int64, count=len(tokens))
+
+        # tokens which got added while encoding
+        if len(self.index) > len(self.tokens):
+            self.tokens.extend(list(self.index)[len(self.tokens):])
+
+        return ids
+
+    def get_id(self, token):
+        return self.index.get(token, -1)
+
+    def get_bits(self):
+        """Bits needed to store a single token id
+        """
+        return max(1, (len(self.tokens) - 1).bit_length())
+
+
+def pack_ngrams(ids, n, bits):
+    """Pack all n-grams of a token id array into int64 keys. The first token of an n-gram is stored in the highest bits, so sorting
+    the keys sorts the n-grams lexicographically by their ids.
+
+    Parameters
+    ----------
+    ids : np.ndarray
+        int64 array of token ids
+    n : int
+        n-gram length
+    bits : int
+        Bits per token id
+
+    Returns
+    -------
+    np.ndarray
+        int64 array with one key per n-gram position
+    """
+
+    if n * bits > 63:
+        raise ValueError("{}-grams with {} bits per token do not fit into int64 keys".format(n, bits))
+
+    if len(ids) < n:
+        return np.zeros(0, dtype=np.int64)
+
+    # view of all windows without copying the ids
+    windows = sliding_window_view(ids, n)
+
+    keys = np.zeros(len(windows), dtype=np.int64)
+    for position in range(n):
+        keys |= windows[:, position] << (bits * (n - 1 - position))
+
+    return keys
+
+
+class NGramCounts:
+    """Compact n-gram count table: sorted int64 keys and their counts. N-grams can be looked up by tuples of tokens.
+    """
+
+    # approximate tables only support lookups, their keys are not all n-grams
+    approximate = False
+
+    def __init__(self, keys, counts, n, bits, vocabulary, first_positions=None):
+        self.keys = keys
+        self.counts = counts
+        self.n = n
+        self.bits = bits
+        self.vocabulary = vocabulary
+        self.first_positions = first_positions
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, ngram):
+        return self.get(ngram) > 0
+
+    def __getitem__(self, ngram):
+        return self.get(ngram)
+
+    def total(self):
+        return int(self.counts.sum())
+
+    def pack(self, ngram):
+        """Key of an n-gram given as tuple of tokens, -1 if a token is unknown
+        """
+
+        key = 0
+        for token in ngram:
+            token_id = self.vocabulary.get_id(token)
+            if token_id < 0:
+                return -1
+            key = (key << self.bits) | token_id
+        return key
+
+    def unpack(self, key):
+        """Tuple of tokens of a key
+        """
+
+        mask = (1 << self.bits) - 1
+        return tuple(self.vocabulary.tokens[(int(key) >> (self.bits * (self.n - 1 - position))) & mask] for position in range(self.n))
+
+    def get(self, ngram, default=0):
+        """Count of an n-gram given as tuple of tokens
+        """
+
+        if len(ngram) != self.n:
+            return default
+
+        key = self.pack(ngram)
+        if key < 0:
+            return default
+
+        index = np.searchsorted(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return int(self.counts[index])
+        return default
+
+    def get_counts(self, keys):
+        """Counts of an array of keys, 0 for unknown keys
+        """
+
+        keys = np.asarray(keys, dtype=np.int64)
+
+        if len(self.keys) == 0:
+            return np.zeros(len(keys), dtype=np.int64)
+
+        indices = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return np.where(self.keys[indices] == keys, self.counts[indices], 0)
+
+    def items(self):
+        """(tuple, count) pairs in order of the keys
+        """
+
+        for key, count in zip(self.keys, self.counts):
+            yield self.unpack(key), int(count)
+
+    def to_dict(self):
+        """Dictionary of space joined n-grams and their counts like calc_n_gram_frequencies used to return. If the first positions
+        are known, the n-grams are in order of their first occurrence.
+        """
+
+        keys = self.keys
+        counts = self.counts
+
+        if self.first_positions is not None:
+            order = np.argsort(self.first_positions, kind="stable")
+            keys = keys[order]
+            counts = counts[order]
+
+        # decode the tokens column by column instead of key by key
+        tokens = np.array(self.vocabulary.tokens, dtype=object)
+        mask = (1 << self.bits) - 1
+        columns = [tokens[(keys >> (self.bits * (self.n - 1 - position))) & mask] for position in range(self.n)]
+
+        return dict(zip(map(" ".join, zip(*columns)), counts.tolist()))
+
+
+def count_ngrams(ids, n, vocabulary, keep_order=False):
+    """Count all n-grams of a token id array
+
+    Parameters
+    ----------
+    ids : np.ndarray
+        int64 array of token ids from the vocabulary
+    n : int
+        n-gram length
+    vocabulary : Vocabulary
+        Vocabulary of the ids
+    keep_order : bool
+        Store the first position of each n-gram, so to_dict() keeps the order of occurrence
+
+    Returns
+    -------
+    NGramCounts
+        Count table of all n-grams
+    """
+
+    bits = vocabulary.get_bits()
+    keys = pack_ngrams(ids, n, bits)
+
+    if keep_order:
+        keys, first_positions, counts = np.unique(keys, return_index=True, return_counts=True)
+        return NGramCounts(keys, counts.astype(np.int64), n, bits, vocabulary, first_positions)
+
+    keys, counts = np.unique(keys, return_counts=True)
+    return NGramCounts(keys, counts.astype(np.int64), n, bits, vocabulary)
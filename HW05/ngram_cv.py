@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import itertools
+import multiprocessing
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from ngram_counts import NGramCounts, pack_ngrams, count_ngrams
+from ngram_scoring import MaximumLikelihoodModel
+from ngram_stream import reduce_counts
+
+# folds and count tables of a worker process
+worker_data = None
+
+# windows scored at once for all weights of the grid
+SCORING_BLOCK = 1 << 16
+
+
+def get_lambda_grid(order, steps):
+    """All interpolation weights of the orders 1 to order which are multiples of 1 / (steps - 1) and sum up to 1
+
+    Returns
+    -------
+    np.ndarray
+        float array of shape (weights, order), the weight of the unigrams first
+    """
+
+    grid = [weights for weights in itertools.product(range(steps), repeat=order) if sum(weights) == steps - 1]
+    return np.array(grid, dtype=np.float64) / (steps - 1)
+
+
+def get_fold_bounds(fold_lengths):
+    """(start, end) of each fold in the concatenated token ids
+    """
+
+    ends = np.cumsum(fold_lengths)
+    return list(zip((ends - np.asarray(fold_lengths)).tolist(), ends.tolist()))
+
+
+def subtract_fold(total, ids, start, end):
+    """Counts of the training split which leaves out ids[start:end], derived from the counts of all ids. Like the flattened
+    training folds of cv(), the tokens before and after the fold get joined, so the n-grams crossing the gap are added.
+
+    Parameters
+    ----------
+    total : NGramCounts
+        Counts of all ids
+    ids : np.ndarray
+        int64 array of all token ids
+    start : int
+        First position of the fold
+    end : int
+        Position after the fold
+
+    Returns
+    -------
+    NGramCounts
+        Counts of the training split
+    """
+
+    n = total.n
+    context = n - 1
+
+    # all n-grams which touch the fold and the n-grams of the joined neighbours
+    removed = pack_ngrams(ids[max(0, start - context):end + context], n, total.bits)
+    added = pack_ngrams(np.concatenate((ids[max(0, start - context):start], ids[end:end + context])), n, total.bits)
+
+    keys, counts = reduce_counts(np.concatenate((np.asarray(total.keys), removed, added)),
+                                 np.concatenate((np.asarray(total.counts), -np.ones(len(removed), dtype=np.int64),
+                                                 np.ones(len(added), dtype=np.int64))))
+
+    keep = counts > 0
+    return NGramCounts(keys[keep], counts[keep], n, total.bits, total.vocabulary)
+
+
+def get_components(model, windows):
+    """Probabilities of the last token of each window given the 0 to n-1 previous tokens
+
+    Returns
+    -------
+    np.ndarray
+        float array of shape (n, windows), 0 for unseen n-grams
+    """
+
+    n = windows.shape[1]
+    components = np.zeros((n, len(windows)))
+
+    for length in range(1, n + 1):
+        log_probs = model.get_log_probs(windows[:, n - length:])
+        known = ~np.isnan(log_probs)
+        components[length - 1, known] = 10 ** log_probs[known]
+
+    return components
+
+
+def evaluate_fold(fold_index, grid):
+    """Summed log10 probability and amount of scored tokens of a held out fold for each weight of the grid. Tokens which are not
+    in the training split are skipped, other tokens without probability make the perplexity of a weight infinite.
+    """
+
+    ids, vocabulary, totals, bounds = worker_data
+    start, end = bounds[fold_index]
+    order = grid.shape[1]
+
+    train_counts = [subtract_fold(total, ids, start, end) for total in totals[:order]]
+    model = MaximumLikelihoodModel(train_counts, min_count=1)
+
+    log_probs = np.zeros(len(grid))
+    scored = np.zeros(len(grid), dtype=np.int64)
+
+    fold_ids = ids[start:end]
+    if len(fold_ids) < order:
+        return log_probs, scored
+
+    windows = sliding_window_view(fold_ids, order)
+
+    for block in range(0, len(windows), SCORING_BLOCK):
+        components = get_components(model, windows[block:block + SCORING_BLOCK])
+        components = components[:, components[0] > 0]
+
+        # (weights, windows) interpolated probabilities of all weights at once
+        with np.errstate(divide="ignore"):
+            log_probs += np.log10(grid @ components).sum(axis=1)
+        scored += components.shape[1]
+
+    return log_probs, scored
+
+
+def evaluate_task(task):
+    fold_index, grid = task
+    return evaluate_fold(fold_index, grid)
+
+
+def init_worker(data):
+    global worker_data
+    worker_data = data
+
+
+def cross_validate(ids, vocabulary, fold_lengths, grid, workers=1):
+    """k-fold cross validation of linearly interpolated n-gram models. The n-grams of all tokens are counted once, the counts of
+    each training split are derived by subtracting the held out fold. The folds and blocks of the weight grid are evaluated in
+    parallel.
+
+    Parameters
+    ----------
+    ids : np.ndarray
+        int64 array of the token ids of all folds
+    vocabulary : Vocabulary
+        Vocabulary of the ids
+    fold_lengths : int[]
+        Amount of tokens of each fold, in order
+    grid : np.ndarray
+        float array of shape (weights, n) with the interpolation weights, the weight of the unigrams first
+    workers : int
+        Amount of worker processes
+
+    Returns
+    -------
+    np.ndarray
+        Cross validated perplexity of each weight of the grid
+    """
+
+    grid = np.atleast_2d(np.asarray(grid, dtype=np.float64))
+    totals = [count_ngrams(ids, n, vocabulary) for n in range(1, grid.shape[1] + 1)]
+    data = (ids, vocabulary, totals, get_fold_bounds(fold_lengths))
+
+    # enough tasks to keep all workers busy, even with few folds
+    grid_blocks = max(1, -(-workers // len(fold_lengths)))
+    tasks = [(fold_index, grid_block) for fold_index in range(len(fold_lengths))
+             for grid_block in np.array_split(grid, min(grid_blocks, len(grid)))]
+
+    if workers > 1:
+        with multiprocessing.Pool(workers, initializer=init_worker, initargs=(data,)) as pool:
+            results = pool.map(evaluate_task, tasks)
+    else:
+        init_worker(data)
+        results = [evaluate_task(task) for task in tasks]
+
+    log_probs = np.zeros(len(grid))
+    scored = np.zeros(len(grid), dtype=np.int64)
+
+    blocks = len(results) // len(fold_lengths)
+    for fold_index in range(len(fold_lengths)):
+        fold_results = results[fold_index * blocks:(fold_index + 1) * blocks]
+        log_probs += np.concatenate([block_log_probs for block_log_probs, _ in fold_results])
+        scored += np.concatenate([block_scored for _, block_scored in fold_results])
+
+    with np.errstate(over="ignore"):
+        return np.where(scored > 0, 10 ** (-log_probs / np.maximum(scored, 1)), np.nan)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from ngram_counts import Vocabulary, count_ngrams
+
+
+def pack_windows(windows, bits):
+    """Keys of the n-grams in the rows of a window array, -1 for rows with unknown tokens
+    """
+
+    n = windows.shape[1]
+    keys = np.zeros(len(windows), dtype=np.int64)
+
+    for position in range(n):
+        keys |= np.maximum(windows[:, position], 0) << (bits * (n - 1 - position))
+
+    known = np.all((windows >= 0) & (windows < 1 << bits), axis=1)
+    return np.where(known, keys, -1)
+
+
+def get_unigram_counts(unigrams):
+    """Unigram counts as array indexed by the token id
+    """
+
+    mask = (1 << unigrams.bits) - 1
+    counts = np.zeros(len(unigrams.vocabulary), dtype=np.int64)
+    counts[np.asarray(unigrams.keys) & mask] = unigrams.counts
+    return counts
+
+
+def lookup_counts(table, windows, unigram_counts):
+    """Counts of the n-grams in the rows of a window array
+    """
+
+    if windows.shape[1] == 1:
+        ids = windows[:, 0]
+        known = (ids >= 0) & (ids < len(unigram_counts))
+        return np.where(known, unigram_counts[np.where(known, ids, 0)], 0)
+
+    return table.get_counts(pack_windows(windows, table.bits))
+
+
+class MaximumLikelihoodModel:
+    """Relative frequencies of the count tables like calc_1_gram_probabilities to calc_3_gram_probabilities. N-grams with less
+    than min_count counts have no probability.
+    """
+
+    def __init__(self, ngram_counts, min_count=2):
+        """
+        Parameters
+        ----------
+        ngram_counts : NGramCounts[]
+            Count tables of the orders 1 to n with the same vocabulary
+        min_count : int
+            Minimum count of bigrams and longer n-grams
+        """
+
+        self.ngram_counts = ngram_counts
+        self.vocabulary = ngram_counts[0].vocabulary
+        self.order = len(ngram_counts)
+        self.min_count = min_count
+        self.unigram_counts = get_unigram_counts(ngram_counts[0])
+        self.total = ngram_counts[0].total()
+
+    def get_log_probs(self, windows):
+        """log10 probabilities of the n-grams in the rows of a window array, nan if an n-gram has no probability
+        """
+
+        n = windows.shape[1]
+        counts = lookup_counts(self.ngram_counts[n - 1], windows, self.unigram_counts)
+
+        if n == 1:
+            context_counts = np.full(len(windows), self.total)
+            known = counts > 0
+        else:
+            context_counts = lookup_counts(self.ngram_counts[n - 2], windows[:, :-1], self.unigram_counts)
+            known = (counts >= self.min_count) & (context_counts > 0)
+
+        log_probs = np.full(len(windows), np.nan)
+        log_probs[known] = np.log10(counts[known] / context_counts[known].astype(np.float64))
+        return log_probs
+
+
+class AdditiveSmoothingModel:
+    """Additive smoothing like smoothed_perplexity: (count + alpha) / (context count + alpha * vocabulary size)
+    """
+
+    def __init__(self, ngram_counts, alpha=0.1):
+        self.ngram_counts = ngram_counts
+        self.vocabulary = ngram_counts[0].vocabulary
+        self.order = len(ngram_counts)
+        self.alpha = alpha
+        self.unigram_counts = get_unigram_counts(ngram_counts[0])
+        self.total = ngram_counts[0].total()
+        self.size = len(ngram_counts[0])
+
+    def get_log_probs(self, windows):
+        n = windows.shape[1]
+        counts = lookup_counts(self.ngram_counts[n - 1], windows, self.unigram_counts)
+
+        if n == 1:
+            context_counts = np.full(len(windows), self.total)
+        else:
+            context_counts = lookup_counts(self.ngram_counts[n - 2], windows[:, :-1], self.unigram_counts)
+
+        return np.log10((counts + self.alpha) / (context_counts + self.alpha * self.size))
+
+
+class Scores:
+    """log10 probabilities of scored sentences. N-grams without probability are skipped, like perplexity() does.
+    """
+
+    def __init__(self, log_probs, scored, skipped):
+        """
+        Parameters
+        ----------
+        log_probs : np.ndarray
+            Summed log10 probability of each sentence
+        scored : np.ndarray
+            Amount of n-grams of each sentence with a probability
+        skipped : np.ndarray
+            Amount of n-grams of each sentence without a probability
+        """
+
+        self.log_probs = log_probs
+        self.scored = scored
+        self.skipped = skipped
+
+    def get_perplexities(self):
+        """Perplexity of each sentence, nan for sentences without scored n-grams
+        """
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.scored > 0, 10 ** (-self.log_probs / np.maximum(self.scored, 1)), np.nan)
+
+    def get_corpus_log_prob(self):
+        return float(self.log_probs.sum())
+
+    def get_corpus_perplexity(self):
+        scored = int(self.scored.sum())
+        return 10 ** (-self.get_corpus_log_prob() / scored) if scored > 0 else float("nan")
+
+
+def encode_sentences(sentences, vocabulary):
+    """Token id arrays of tokenized sentences, unknown tokens get the id -1
+    """
+
+    return [vocabulary.encode(tokens, add=False) for tokens in sentences]
+
+
+def score_sentences(model, sentences, n=None, batch_size=1 << 20):
+    """Score many sentences at once: the n-grams of all sentences are looked up together in batches
+
+    Parameters
+    ----------
+    model : MaximumLikelihoodModel, AdditiveSmoothingModel or NGramStore
+        Model with get_log_probs() for arrays of n-gram windows
+    sentences : np.ndarray[]
+        Token id arrays of the sentences, encoded with the vocabulary of the model
+    n : int
+        n-gram length, the order of the model by default
+    batch_size : int
+        n-grams looked up at once
+
+    Returns
+    -------
+    Scores
+        log10 probabilities of the sentences
+    """
+
+    n = model.order if n is None else n
+    lengths = np.array([len(ids) for ids in sentences], dtype=np.int64)
+
+    log_probs = np.zeros(len(sentences))
+    scored = np.zeros(len(sentences), dtype=np.int64)
+    skipped = np.zeros(len(sentences), dtype=np.int64)
+
+    if lengths.sum() < n:
+        return Scores(log_probs, scored, skipped)
+
+    ids = np.concatenate([np.asarray(sentence, dtype=np.int64) for sentence in sentences])
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    # windows which start and end in the same sentence
+    sentence_index = np.repeat(np.arange(len(sentences)), lengths)
+    positions = np.arange(len(ids)) - starts[sentence_index]
+    windows = sliding_window_view(ids, n)
+    inside = np.flatnonzero(positions[:len(windows)] + n <= lengths[sentence_index[:len(windows)]])
+
+    for start in range(0, len(inside), batch_size):
+        rows = inside[start:start + batch_size]
+        batch_log_probs = model.get_log_probs(windows[rows])
+        batch_sentences = sentence_index[rows]
+        known = ~np.isnan(batch_log_probs)
+
+        log_probs += np.bincount(batch_sentences[known], weights=batch_log_probs[known], minlength=len(sentences))
+        scored += np.bincount(batch_sentences[known], minlength=len(sentences))
+        skipped += np.bincount(batch_sentences[~known], minlength=len(sentences))
+
+    return Scores(log_probs, scored, skipped)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Score each line of a text file with an n-gram model of the training text")
+    ap.add_argument("train", help="Training text file")
+    ap.add_argument("test", help="Text file with one sentence per line")
+    ap.add_argument("-n", "--order", type=int, default=3, help="n-gram length")
+    ap.add_argument("-a", "--alpha", type=float, default=None, help="Use additive smoothing with this alpha")
+    args = ap.parse_args()
+
+    from ngram_stream import default_tokenizer
+
+    with open(args.train, "r") as f:
+        tokens = default_tokenizer(f.read())
+
+    vocabulary = Vocabulary()
+    token_ids = vocabulary.encode(tokens)
+    ngram_counts = [count_ngrams(token_ids, n, vocabulary) for n in range(1, args.order + 1)]
+
+    if args.alpha is None:
+        model = MaximumLikelihoodModel(ngram_counts)
+    else:
+        model = AdditiveSmoothingModel(ngram_counts, args.alpha)
+
+    with open(args.test, "r") as f:
+        sentences = encode_sentences([default_tokenizer(line) for line in f], vocabulary)
+
+    scores = score_sentences(model, sentences)
+
+    for log_prob, perplexity in zip(scores.log_probs, scores.get_perplexities()):
+        print("{}\t{}".format(log_prob, perplexity))
+
+    print("Corpus log probability: {}, perplexity: {}".format(scores.get_corpus_log_prob(), scores.get_corpus_perplexity()))
+
+
+if __name__ == "__main__":
+    main()
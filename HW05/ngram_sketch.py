@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import math
+import numpy as np
+from ngram_counts import Vocabulary, NGramCounts, pack_ngrams, count_ngrams
+from ngram_scoring import MaximumLikelihoodModel, AdditiveSmoothingModel, encode_sentences, score_sentences
+from ngram_stream import default_tokenizer, iter_text_chunks
+
+
+class CountMinSketch:
+    """Count-min sketch of int64 keys with conservative update. A count is overestimated by at most epsilon * total count with
+    probability 1 - delta, it is never underestimated.
+    """
+
+    def __init__(self, epsilon=1e-4, delta=1e-3, seed=0):
+        """
+        Parameters
+        ----------
+        epsilon : float
+            Error of an estimate relative to the total count
+        delta : float
+            Probability that an estimate exceeds the error bound
+        seed : int
+            Seed of the hash functions
+        """
+
+        self.epsilon = epsilon
+        self.delta = delta
+
+        # the width is rounded up to a power of 2 for multiply-shift hashing
+        self.width_bits = max(1, math.ceil(math.log2(math.e / epsilon)))
+        self.depth = max(1, math.ceil(math.log(1 / delta)))
+        self.table = np.zeros((self.depth, 1 << self.width_bits), dtype=np.int64)
+        self.total = 0
+
+        random = np.random.default_rng(seed)
+        self.multipliers = random.integers(1, 1 << 63, size=self.depth, dtype=np.uint64) | np.uint64(1)
+        self.increments = random.integers(0, 1 << 63, size=self.depth, dtype=np.uint64)
+
+    def get_error_bound(self):
+        """Largest overestimation of a count with probability 1 - delta
+        """
+        return self.epsilon * self.total
+
+    def add(self, keys, counts=None):
+        """Add keys with their counts, each key once if counts is None. Equal keys are summed up first, so every distinct key of
+        the batch raises its cells to its own estimate plus its count at once.
+        """
+
+        keys = np.asarray(keys, dtype=np.int64)
+
+        if counts is None:
+            keys, counts = np.unique(keys, return_counts=True)
+        else:
+            keys, inverse = np.unique(keys, return_inverse=True)
+            counts = np.bincount(inverse, weights=counts, minlength=len(keys))
+
+        counts = np.asarray(counts, dtype=np.int64)
+        cells = self.__get_cells(keys)
+        estimates = self.table[np.arange(self.depth)[:, None], cells].min(axis=0) + counts
+
+        # conservative update: cells only grow up to the new estimate of their key
+        for row in range(self.depth):
+            np.maximum.at(self.table[row], cells[row], estimates)
+
+        self.total += int(counts.sum())
+
+    def query(self, keys):
+        """Estimated counts of an array of keys
+        """
+
+        keys = np.asarray(keys, dtype=np.int64)
+        return self.table[np.arange(self.depth)[:, None], self.__get_cells(keys)].min(axis=0)
+
+    def __get_cells(self, keys):
+        """(depth, keys) array with the cell of each key in each row
+        """
+
+        with np.errstate(over="ignore"):
+            hashes = keys.astype(np.uint64)[None, :] * self.multipliers[:, None] + self.increments[:, None]
+
+        return (hashes >> np.uint64(64 - self.width_bits)).astype(np.int64)
+
+
+class HeavyHitters:
+    """The size keys with the highest estimated counts of a sketch. After each added batch the candidates are the previous heavy
+    hitters and the keys of the batch.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.keys = np.zeros(0, dtype=np.int64)
+
+    def update(self, sketch, batch_keys):
+        candidates = np.union1d(self.keys, batch_keys)
+
+        if len(candidates) > self.size:
+            estimates = sketch.query(candidates)
+            candidates = candidates[np.argpartition(-estimates, self.size - 1)[:self.size]]
+
+        self.keys = np.sort(candidates)
+
+
+class SketchCounts(NGramCounts):
+    """Approximate count table of a count-min sketch. Lookups like get() and get_counts() return estimates of all n-grams, so the
+    table can be used by the models of ngram_scoring.py. The keys and counts of the table are only the heavy hitters, so items()
+    and to_dict() raise a ValueError instead of silently leaving out all other n-grams, and NGramStore.build() rejects the table.
+    """
+
+    approximate = True
+
+    def __init__(self, sketch, heavy_hitters, n, bits, vocabulary):
+        self.sketch = sketch
+        self.heavy_hitters = heavy_hitters
+
+        keys = heavy_hitters.keys
+        NGramCounts.__init__(self, keys, sketch.query(keys), n, bits, vocabulary)
+
+    def total(self):
+        return self.sketch.total
+
+    def get(self, ngram, default=0):
+        if len(ngram) != self.n:
+            return default
+
+        key = self.pack(ngram)
+        if key < 0:
+            return default
+
+        count = int(self.sketch.query(np.array([key]))[0])
+        return count if count > 0 else default
+
+    def get_counts(self, keys):
+        keys = np.asarray(keys, dtype=np.int64)
+        return np.where(keys >= 0, self.sketch.query(np.maximum(keys, 0)), 0)
+
+    def items(self):
+        raise ValueError("A sketch can not list its n-grams, use get_heavy_hitters() for the most frequent ones")
+
+    def to_dict(self):
+        raise ValueError("A sketch can not list its n-grams, use get_heavy_hitters() for the most frequent ones")
+
+    def get_heavy_hitters(self, amount=None):
+        """Dictionary of the space joined heavy hitters and their estimated counts, most frequent first
+        """
+
+        return get_most_frequent(self, len(self) if amount is None else amount)
+
+
+class SketchCounter:
+    """Counts the n-grams of a token stream approximately in fixed memory. Unigrams are counted exactly, since the vocabulary is
+    in memory anyway, longer n-grams go into a count-min sketch per order.
+    """
+
+    def __init__(self, order=3, epsilon=1e-4, delta=1e-3, heavy_hitters=1000, bits=None):
+        """
+        Parameters
+        ----------
+        order : int
+            Longest n-gram length
+        epsilon : float
+            Error of an estimated count relative to the amount of n-grams
+        delta : float
+            Probability that an estimate exceeds the error bound
+        heavy_hitters : int
+            Amount of most frequent n-grams tracked per order
+        bits : int
+            Bits per token id, by default as many as fit into the keys of the longest order
+        """
+
+        self.order = order
+        self.bits = bits if bits is not None else 63 // order
+
+        if self.bits * order > 63:
+            raise ValueError("{}-grams with {} bits per token do not fit into int64 keys".format(order, self.bits))
+
+        self.vocabulary = Vocabulary()
+        self.unigram_counts = np.zeros(0, dtype=np.int64)
+        self.sketches = {n: CountMinSketch(epsilon, delta, seed=n) for n in range(2, order + 1)}
+        self.heavy_hitters = {n: HeavyHitters(heavy_hitters) for n in range(2, order + 1)}
+
+        # the last tokens of the previous chunk start the n-grams crossing the chunk border
+        self.history = np.zeros(0, dtype=np.int64)
+
+    def add_tokens(self, tokens):
+        """Count the n-grams of the next tokens of the stream
+        """
+
+        ids = self.vocabulary.encode(tokens)
+
+        if len(self.vocabulary) > 1 << self.bits:
+            raise ValueError("The vocabulary exceeds {} tokens, use more bits per token".format(1 << self.bits))
+
+        self.unigram_counts = np.concatenate((self.unigram_counts, np.zeros(len(self.vocabulary) - len(self.unigram_counts),
+                                                                            dtype=np.int64)))
+        self.unigram_counts += np.bincount(ids, minlength=len(self.vocabulary))
+
+        ids = np.concatenate((self.history, ids))
+
+        for n in range(2, self.order + 1):
+            # n-grams which end in the history were counted with the previous chunk
+            keys, counts = np.unique(pack_ngrams(ids[max(0, len(self.history) - n + 1):], n, self.bits), return_counts=True)
+            self.sketches[n].add(keys, counts)
+            self.heavy_hitters[n].update(self.sketches[n], keys)
+
+        self.history = ids[max(0, len(ids) - self.order + 1):]
+
+    def count_file(self, path, chunk_size=1 << 20, tokenizer=default_tokenizer):
+        """Count the n-grams of a text file which gets read and tokenized in chunks
+        """
+
+        for text in iter_text_chunks(path, chunk_size):
+            self.add_tokens(tokenizer(text))
+
+    def get_counts(self):
+        """Count tables of the orders 1 to order: the exact unigram counts and the sketches of the longer n-grams. They can be
+        used like the exact tables, e.g. with the models of ngram_scoring.py.
+        """
+
+        present = np.flatnonzero(self.unigram_counts)
+        unigrams = NGramCounts(present, self.unigram_counts[present], 1, self.bits, self.vocabulary)
+
+        return [unigrams] + [SketchCounts(self.sketches[n], self.heavy_hitters[n], n, self.bits, self.vocabulary)
+                             for n in range(2, self.order + 1)]
+
+
+def count_ngrams_approximate(ids, n, vocabulary, epsilon=1e-4, delta=1e-3, heavy_hitters=1000):
+    """Count all n-grams of a token id array in a count-min sketch, like count_ngrams()
+    """
+
+    if n == 1:
+        return count_ngrams(ids, 1, vocabulary)
+
+    bits = vocabulary.get_bits()
+    sketch = CountMinSketch(epsilon, delta, seed=n)
+    tracked = HeavyHitters(heavy_hitters)
+
+    keys, counts = np.unique(pack_ngrams(ids, n, bits), return_counts=True)
+    sketch.add(keys, counts)
+    tracked.update(sketch, keys)
+
+    return SketchCounts(sketch, tracked, n, bits, vocabulary)
+
+
+def get_most_frequent(ngram_counts, amount):
+    """Dictionary of the amount space joined n-grams with the highest counts of a table, most frequent first. For sketch tables
+    only the heavy hitters are candidates.
+    """
+
+    order = np.argsort(-np.asarray(ngram_counts.counts), kind="stable")[:amount]
+    return NGramCounts(np.asarray(ngram_counts.keys)[order], np.asarray(ngram_counts.counts)[order], ngram_counts.n, ngram_counts.bits,
+                       ngram_counts.vocabulary).to_dict()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Count the n-grams of a text file approximately in count-min sketches")
+    ap.add_argument("input", help="Text file to count")
+    ap.add_argument("-n", "--order", type=int, default=3, help="Count all n-grams up to this length")
+    ap.add_argument("-e", "--epsilon", type=float, default=1e-4, help="Error of an estimated count relative to the amount of n-grams")
+    ap.add_argument("-d", "--delta", type=float, default=1e-3, help="Probability that an estimate exceeds the error bound")
+    ap.add_argument("-hh", "--heavy-hitters", type=int, default=1000, help="Most frequent n-grams tracked per order")
+    ap.add_argument("-t", "--top", type=int, default=10, help="Most frequent n-grams printed per order")
+    ap.add_argument("-s", "--score", default=None, help="Text file with one sentence per line, scored with the approximate counts")
+    ap.add_argument("-a", "--alpha", type=float, default=None, help="Score with additive smoothing with this alpha")
+    ap.add_argument("-c", "--chunk-size", type=int, default=1 << 20, help="Characters read and tokenized at once")
+    args = ap.parse_args()
+
+    counter = SketchCounter(args.order, args.epsilon, args.delta, args.heavy_hitters)
+    counter.count_file(args.input, chunk_size=args.chunk_size)
+    ngram_counts = counter.get_counts()
+
+    for table in ngram_counts:
+        if table.approximate:
+            print("{}-grams: {}, error bound: {}".format(table.n, table.total(), table.sketch.get_error_bound()))
+        else:
+            print("{}-grams: {}, exact".format(table.n, table.total()))
+
+        for ngram, count in get_most_frequent(table, args.top).items():
+            print("{}\t{}".format(count, ngram))
+
+    if args.score is None:
+        return
+
+    if args.alpha is None:
+        model = MaximumLikelihoodModel(ngram_counts)
+    else:
+        model = AdditiveSmoothingModel(ngram_counts, args.alpha)
+
+    with open(args.score, "r") as f:
+        sentences = encode_sentences([default_tokenizer(line) for line in f], counter.vocabulary)
+
+    scores = score_sentences(model, sentences)
+    print("Corpus log probability: {}, perplexity: {}".format(scores.get_corpus_log_prob(), scores.get_corpus_perplexity()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+import numpy as np
+from ngram_counts import Vocabulary, count_ngrams
+
+MAGIC = b"NGRAMLM1"
+
+# arrays in the file start at multiples of this
+ALIGNMENT = 8
+
+
+def quantize(values, bits):
+    """Quantize log probabilities into codes of a codebook. Values get sorted into bins with about the same amount of values,
+    each bin is represented by the mean of its values. The highest code is reserved for missing entries.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        float array of log probabilities
+    bits : int
+        Bits per code, 8 or 16
+
+    Returns
+    -------
+    np.ndarray, np.ndarray
+        codes of the values and the float32 codebook
+    """
+
+    dtype = np.uint8 if bits == 8 else np.uint16
+    levels = (1 << bits) - 1
+
+    unique_values, inverse = np.unique(values, return_inverse=True)
+
+    # few distinct values are stored exactly
+    if len(unique_values) <= levels:
+        return inverse.astype(dtype), unique_values.astype(np.float32)
+
+    # equal values get the bin of their first rank, so they share a code
+    sorted_values = np.sort(values)
+    ranks = np.searchsorted(sorted_values, unique_values)
+    unique_bins = (ranks * levels) // len(values)
+
+    codes = unique_bins[inverse]
+    sizes = np.bincount(codes, minlength=levels)
+    codebook = np.bincount(codes, weights=values, minlength=levels) / np.maximum(sizes, 1)
+
+    return codes.astype(dtype), codebook.astype(np.float32)
+
+
+def get_columns(ngram_counts):
+    """Token id columns of the keys of a count table
+    """
+
+    mask = (1 << ngram_counts.bits) - 1
+    keys = np.asarray(ngram_counts.keys)
+    return [(keys >> (ngram_counts.bits * (ngram_counts.n - 1 - position))) & mask for position in range(ngram_counts.n)]
+
+
+def pack_columns(columns, bits):
+    """int64 keys of n-grams given as token id columns, the first token in the highest bits
+    """
+
+    if len(columns) * bits > 63:
+        raise ValueError("{}-grams with {} bits per token do not fit into int64 keys".format(len(columns), bits))
+
+    keys = np.zeros(len(columns[0]) if len(columns) > 0 else 0, dtype=np.int64)
+    for position, column in enumerate(columns):
+        keys |= np.asarray(column, dtype=np.int64) << (bits * (len(columns) - 1 - position))
+    return keys
+
+
+def check_exact(ngram_counts):
+    """Raise a ValueError if a count table is approximate: the levels enumerate the keys of the tables, but the keys of a sketch
+    table are only its heavy hitters, so the store would silently lose all other n-grams
+    """
+
+    for table in ngram_counts:
+        if table.approximate:
+            raise ValueError("The {}-gram counts are approximate and only contain the most frequent n-grams, count them exactly with "
+                             "count_ngrams() or ngram_stream.py to build a store".format(table.n))
+
+
+def get_maximum_likelihood_levels(ngram_counts, min_count=2):
+    """Levels for NGramStore.from_levels() with the relative frequencies of calc_1_gram_probabilities to
+    calc_3_gram_probabilities, without backoff weights
+
+    Parameters
+    ----------
+    ngram_counts : NGramCounts[]
+        Count tables of the orders 1 to n with the same vocabulary
+    min_count : int
+        Bigrams and longer n-grams with less counts are left out
+
+    Returns
+    -------
+    (np.ndarray[], np.ndarray, None)[]
+        Token id columns and log10 probabilities of each order
+    """
+
+    check_exact(ngram_counts)
+    levels = []
+
+    for index, table in enumerate(ngram_counts):
+        columns = get_columns(table)
+        counts = np.asarray(table.counts)
+
+        if table.n == 1:
+            levels.append((columns, np.log10(counts / float(table.total())), None))
+            continue
+
+        # the context counts include the n-grams below min_count
+        previous = ngram_counts[index - 1]
+        context_counts = previous.get_counts(pack_columns(columns[:-1], previous.bits))
+
+        keep = (counts >= min_count) & (context_counts > 0)
+        levels.append(([column[keep] for column in columns], np.log10(counts[keep] / context_counts[keep].astype(np.float64)), None))
+
+    return levels
+
+
+def get_smoothed_levels(ngram_counts, alpha=0.1):
+    """Levels for NGramStore.from_levels() of the additive smoothing of smoothed_perplexity as backoff model. Seen n-grams get
+    (count + alpha) / (context count + alpha * vocabulary size). The backoff weight of a context passes the probability left for
+    its unseen continuations on to the shorter n-grams, so the probabilities of each context sum up to 1.
+
+    Parameters
+    ----------
+    ngram_counts : NGramCounts[]
+        Count tables of the orders 1 to n with the same vocabulary
+    alpha : float
+        Added count of each n-gram
+
+    Returns
+    -------
+    (np.ndarray[], np.ndarray, np.ndarray)[]
+        Token id columns, log10 probabilities and log10 backoff weights of each order
+    """
+
+    check_exact(ngram_counts)
+
+    size = len(ngram_counts[0])
+    columns = [get_columns(table) for table in ngram_counts]
+    log_probs = [np.log10((np.asarray(ngram_counts[0].counts) + alpha) / (ngram_counts[0].total() + alpha * size))]
+    backoffs = [np.zeros(len(table)) for table in ngram_counts]
+
+    for index, table in enumerate(ngram_counts[1:], 1):
+        previous = ngram_counts[index - 1]
+        context_keys = pack_columns(columns[index][:-1], previous.bits)
+
+        probs = (np.asarray(table.counts) + alpha) / (previous.get_counts(context_keys) + alpha * size)
+        log_probs.append(np.log10(probs))
+
+        if len(table) == 0:
+            continue
+
+        # probability of the seen continuations in the shorter model, each suffix of a seen n-gram is seen as well
+        suffixes = np.searchsorted(np.asarray(previous.keys), pack_columns(columns[index][1:], previous.bits))
+        lower_probs = 10 ** log_probs[index - 1][suffixes]
+
+        # the keys are sorted, so the continuations of a context are next to each other
+        starts = np.flatnonzero(np.concatenate(([True], context_keys[1:] != context_keys[:-1])))
+        left = np.maximum(1 - np.add.reduceat(probs, starts), 1e-12)
+        lower_left = np.maximum(1 - np.add.reduceat(lower_probs, starts), 1e-12)
+
+        contexts = np.searchsorted(np.asarray(previous.keys), context_keys[starts])
+        backoffs[index - 1][contexts] = np.log10(left / lower_left)
+
+    return [(columns[index], log_probs[index], backoffs[index] if index < len(ngram_counts) - 1 else None)
+            for index in range(len(ngram_counts))]
+
+
+class NGramStore:
+    """Compact n-gram language model like the KenLM trie: each order is a level of sorted word id arrays, the entries of an
+    n-gram point to the range of their continuations in the next level. Log10 probabilities and backoff weights are quantized.
+    The store is saved as a single file which gets memory mapped, so loading is instant and n-grams are found by binary search
+    in the mapped arrays.
+    """
+
+    def __init__(self, vocabulary, words, pointers, codes, codebooks, backoff_codes=None, backoff_codebooks=None):
+        """
+        Parameters
+        ----------
+        vocabulary : Vocabulary
+            Vocabulary of the word ids
+        words : np.ndarray[]
+            Last word id of each entry per level, the first level is indexed by the word id directly
+        pointers : np.ndarray[]
+            Per level except the last: entry i continues in [pointers[i], pointers[i + 1]) of the next level
+        codes : np.ndarray[]
+            Quantized log probability of each entry per level
+        codebooks : np.ndarray[]
+            Log probability of each code per level
+        backoff_codes : np.ndarray[]
+            Per level except the last: quantized log10 backoff weight of each entry, None for models without backoff
+        backoff_codebooks : np.ndarray[]
+            Backoff weight of each backoff code per level
+        """
+
+        self.vocabulary = vocabulary
+        self.words = words
+        self.pointers = pointers
+        self.codes = codes
+        self.codebooks = codebooks
+        self.backoff_codes = backoff_codes
+        self.backoff_codebooks = backoff_codebooks
+        self.order = len(words)
+        self.missing = np.iinfo(codes[0].dtype).max
+
+    @staticmethod
+    def from_levels(vocabulary, levels, quantization=8):
+        """Build a store from the n-grams of each order
+
+        Parameters
+        ----------
+        vocabulary : Vocabulary
+            Vocabulary of the word ids
+        levels : (np.ndarray[], np.ndarray, np.ndarray)[]
+            Per order 1 to n: token id columns, log10 probabilities and log10 backoff weights (None if there are none) of the
+            n-grams in any order. N-grams whose context is not stored in the previous order are dropped.
+        quantization : int
+            Bits per log probability and backoff weight, 8 or 16
+
+        Returns
+        -------
+        NGramStore
+            Store of all orders
+        """
+
+        if quantization not in (8, 16):
+            raise ValueError("Log probabilities can only be quantized to 8 or 16 bits")
+
+        size = len(vocabulary)
+        bits = vocabulary.get_bits()
+        has_backoff = any(backoffs is not None for _, _, backoffs in levels[:-1])
+
+        words = []
+        pointers = []
+        all_codes = []
+        codebooks = []
+        backoff_codes = [] if has_backoff else None
+        backoff_codebooks = [] if has_backoff else None
+
+        stored_keys = None
+
+        for level, (columns, log_probs, backoffs) in enumerate(levels):
+            columns = [np.asarray(column, dtype=np.int64) for column in columns]
+            log_probs = np.asarray(log_probs, dtype=np.float64)
+            backoffs = np.zeros(len(log_probs)) if backoffs is None else np.asarray(backoffs, dtype=np.float64)
+
+            if level == 0:
+                # unigrams are indexed by their word id
+                entries = np.full(size, -1, dtype=np.int64)
+                entries[columns[0]] = np.arange(len(columns[0]))
+                present = entries >= 0
+
+                codes, codebook = quantize(log_probs[entries[present]], quantization)
+                level_codes = np.full(size, np.iinfo(codes.dtype).max, dtype=codes.dtype)
+                level_codes[present] = codes
+
+                level_backoffs = np.zeros(size)
+                level_backoffs[present] = backoffs[entries[present]]
+
+                words.append(np.arange(size, dtype=np.uint32))
+                stored_keys = np.arange(size, dtype=np.int64)
+            else:
+                # sort the n-grams by their token ids and drop the ones without stored context
+                keys = pack_columns(columns, bits)
+                order = np.argsort(keys, kind="stable")
+                keys = keys[order]
+                columns = [column[order] for column in columns]
+
+                context_keys = pack_columns(columns[:-1], bits)
+                parents = np.minimum(np.searchsorted(stored_keys, context_keys), max(0, len(stored_keys) - 1))
+                keep = stored_keys[parents] == context_keys if len(stored_keys) > 0 else np.zeros(len(keys), dtype=bool)
+
+                order = order[keep]
+                parents = parents[keep]
+                stored_keys = keys[keep]
+
+                level_codes, codebook = quantize(log_probs[order], quantization)
+                level_backoffs = backoffs[order]
+
+                pointers.append(np.searchsorted(parents, np.arange(len(words[-1]) + 1)).astype(np.uint32 if len(parents) < 1 << 32
+                                                                                               else np.uint64))
+                words.append(columns[-1][keep].astype(np.uint32))
+
+            all_codes.append(level_codes)
+            codebooks.append(codebook)
+
+            if has_backoff and level < len(levels) - 1:
+                codes, codebook = quantize(level_backoffs, quantization)
+                backoff_codes.append(codes)
+                backoff_codebooks.append(codebook)
+
+        return NGramStore(vocabulary, words, pointers, all_codes, codebooks, backoff_codes, backoff_codebooks)
+
+    @staticmethod
+    def build(ngram_counts, min_count=2, quantization=8, alpha=None):
+        """Build a store with the maximum likelihood probabilities of ex_1.py or the additive smoothed backoff model
+
+        Parameters
+        ----------
+        ngram_counts : NGramCounts[]
+            Exact count tables of the orders 1 to n with the same vocabulary, approximate tables of ngram_sketch.py raise a
+            ValueError since only their most frequent n-grams are known
+        min_count : int
+            Bigrams and longer n-grams with less counts are not stored, like in calc_2_gram_probabilities
+        quantization : int
+            Bits per log probability, 8 or 16
+        alpha : float
+            Store the additive smoothed model with this alpha instead, see get_smoothed_levels()
+
+        Returns
+        -------
+        NGramStore
+            Store of all orders
+        """
+
+        if alpha is None:
+            levels = get_maximum_likelihood_levels(ngram_counts, min_count)
+        else:
+            levels = get_smoothed_levels(ngram_counts, alpha)
+
+        return NGramStore.from_levels(ngram_counts[0].vocabulary, levels, quantization)
+
+    def get_levels(self):
+        """Token id columns, log10 probabilities and log10 backoff weights (None without backoff) of the stored n-grams of each
+        order, the inverse of from_levels()
+        """
+
+        levels = []
+
+        for level in range(self.order):
+            if level == 0:
+                entries = np.flatnonzero(np.asarray(self.codes[0]) != self.missing)
+                columns = [entries]
+                parent_columns = [np.arange(len(self.words[0]))]
+            else:
+                # repeat the context of each entry of the previous level for all its continuations
+                pointers = np.asarray(self.pointers[level - 1], dtype=np.int64)
+                parents = np.repeat(np.arange(len(pointers) - 1), np.diff(pointers))
+                entries = np.arange(len(self.words[level]))
+                columns = [column[parents] for column in parent_columns] + [np.asarray(self.words[level], dtype=np.int64)]
+                parent_columns = columns
+
+            codes = np.asarray(self.codes[level])[entries]
+            log_probs = np.asarray(self.codebooks[level])[codes].astype(np.float64)
+
+            backoffs = None
+            if self.backoff_codes is not None and level < self.order - 1:
+                backoffs = np.asarray(self.backoff_codebooks[level])[np.asarray(self.backoff_codes[level])[entries]].astype(np.float64)
+
+            levels.append((columns, log_probs, backoffs))
+
+        return levels
+
+    def get_log_probs(self, ids):
+        """Quantized log10 probabilities of many n-grams at once. Stores with backoff weights back off to shorter n-grams like an
+        ARPA model, otherwise only the stored n-grams have a probability.
+
+        Parameters
+        ----------
+        ids : np.ndarray
+            int array of shape (n-grams, n) with the word ids of n-grams of the same length
+
+        Returns
+        -------
+        np.ndarray
+            float array with the log probabilities, nan for n-grams without probability
+        """
+
+        ids = np.atleast_2d(np.asarray(ids, dtype=np.int64))
+        n = ids.shape[1]
+
+        if n < 1 or n > self.order:
+            raise ValueError("The store only contains n-grams up to length {}".format(self.order))
+
+        if self.backoff_codes is None:
+            return self.__get_stored_log_probs(ids)
+
+        # p(w | h) = p(w | h) if h w is stored, else backoff(h) * p(w | h without its first token)
+        result = self.__get_stored_log_probs(ids[:, n - 1:])
+        for length in range(2, n + 1):
+            stored = self.__get_stored_log_probs(ids[:, n - length:])
+            result = np.where(np.isnan(stored), result + self.__get_backoffs(ids[:, n - length:n - 1]), stored)
+
+        return result
+
+    def get_log_prob(self, ngram):
+        """Quantized log10 probability of an n-gram given as tuple of tokens, None if it has no probability
+        """
+
+        log_prob = self.get_log_probs(self.vocabulary.encode(list(ngram), add=False).reshape(1, -1))[0]
+        return None if np.isnan(log_prob) else float(log_prob)
+
+    def get_size(self):
+        """Bytes of all arrays of the store
+        """
+
+        arrays = [self.words, self.pointers, self.codes, self.codebooks]
+        if self.backoff_codes is not None:
+            arrays += [self.backoff_codes, self.backoff_codebooks]
+
+        return sum(array.nbytes for level_arrays in arrays for array in level_arrays)
+
+    def save(self, path):
+        """Write the store into a single file: magic, header length, json header and the aligned arrays
+        """
+
+        arrays = []
+        for level in range(self.order):
+            arrays.append(("words{}".format(level), self.words[level]))
+            arrays.append(("codes{}".format(level), self.codes[level]))
+            arrays.append(("codebook{}".format(level), self.codebooks[level]))
+
+            if level < len(self.pointers):
+                arrays.append(("pointers{}".format(level), self.pointers[level]))
+
+            if self.backoff_codes is not None and level < len(self.backoff_codes):
+                arrays.append(("backoffs{}".format(level), self.backoff_codes[level]))
+                arrays.append(("backoffcodebook{}".format(level), self.backoff_codebooks[level]))
+
+        vocabulary = "\n".join(self.vocabulary.tokens).encode("utf-8")
+        arrays.append(("vocabulary", np.frombuffer(vocabulary, dtype=np.uint8)))
+
+        # offsets are relative to the aligned end of the header
+        layout = {}
+        offset = 0
+        for name, array in arrays:
+            layout[name] = [offset, np.asarray(array).dtype.str, len(array)]
+            offset += -(-np.asarray(array).nbytes // ALIGNMENT) * ALIGNMENT
+
+        header = json.dumps({"order": self.order, "backoff": self.backoff_codes is not None, "arrays": layout}).encode("utf-8")
+        start = len(MAGIC) + 8 + len(header)
+
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(np.uint64(len(header)).tobytes())
+            f.write(header)
+            f.write(b"\0" * (-start % ALIGNMENT))
+
+            for name, array in arrays:
+                data = np.ascontiguousarray(array).tobytes()
+                f.write(data)
+                f.write(b"\0" * (-len(data) % ALIGNMENT))
+
+    @staticmethod
+    def load(path):
+        """Memory map a store written by save()
+        """
+
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+
+        if bytes(data[:len(MAGIC)]) != MAGIC:
+            raise ValueError("{} is no n-gram store".format(path))
+
+        header_length = int(data[len(MAGIC):len(MAGIC) + 8].view(np.uint64)[0])
+        header = json.loads(bytes(data[len(MAGIC) + 8:len(MAGIC) + 8 + header_length]).decode("utf-8"))
+
+        start = len(MAGIC) + 8 + header_length
+        start += -start % ALIGNMENT
+
+        def get_array(name):
+            offset, dtype, length = header["arrays"][name]
+            dtype = np.dtype(dtype)
+            return data[start + offset:start + offset + length * dtype.itemsize].view(dtype)
+
+        vocabulary_data = bytes(get_array("vocabulary")).decode("utf-8")
+        vocabulary = Vocabulary(vocabulary_data.split("\n") if vocabulary_data != "" else [])
+
+        order = header["order"]
+        backoff_codes = None
+        backoff_codebooks = None
+
+        if header.get("backoff", False):
+            backoff_codes = [get_array("backoffs{}".format(level)) for level in range(order - 1)]
+            backoff_codebooks = [get_array("backoffcodebook{}".format(level)) for level in range(order - 1)]
+
+        return NGramStore(vocabulary, [get_array("words{}".format(level)) for level in range(order)],
+                          [get_array("pointers{}".format(level)) for level in range(order - 1)],
+                          [get_array("codes{}".format(level)) for level in range(order)],
+                          [get_array("codebook{}".format(level)) for level in range(order)], backoff_codes, backoff_codebooks)
+
+    def __find(self, ids):
+        """Entry index of each n-gram in the level of its length and whether it is stored
+        """
+
+        valid = (ids[:, 0] >= 0) & (ids[:, 0] < len(self.words[0]))
+        index = np.where(valid, ids[:, 0], 0)
+
+        for level in range(1, ids.shape[1]):
+            pointers = self.pointers[level - 1]
+            low = pointers[index].astype(np.int64)
+            high = pointers[index + 1].astype(np.int64)
+
+            position = self.__lower_bound(self.words[level], low, high, ids[:, level])
+            found = position < high
+            found[found] = self.words[level][position[found]] == ids[found, level]
+
+            valid &= found
+            index = np.where(valid, position, 0)
+
+        return valid, index
+
+    def __get_stored_log_probs(self, ids):
+        n = ids.shape[1]
+        result = np.full(len(ids), np.nan)
+
+        if len(self.codes[n - 1]) == 0:
+            return result
+
+        valid, index = self.__find(ids)
+        codes = self.codes[n - 1][index]
+        valid &= codes != self.missing
+        result[valid] = self.codebooks[n - 1][codes[valid]]
+
+        return result
+
+    def __get_backoffs(self, ids):
+        """log10 backoff weights of contexts, 0 for contexts which are not stored
+        """
+
+        n = ids.shape[1]
+        result = np.zeros(len(ids))
+
+        if len(self.backoff_codes[n - 1]) == 0:
+            return result
+
+        valid, index = self.__find(ids)
+        result[valid] = self.backoff_codebooks[n - 1][self.backoff_codes[n - 1][index[valid]]]
+
+        return result
+
+    @staticmethod
+    def __lower_bound(words, low, high, targets):
+        """Vectorized binary search: first position in [low, high) of each row whose word is not smaller than the target
+        """
+
+        low = low.copy()
+        high = high.copy()
+
+        while True:
+            active = low < high
+            if not active.any():
+                return low
+
+            middle = (low + high) // 2
+            smaller = active & (words[np.where(active, middle, 0)] < targets)
+
+            low = np.where(smaller, middle + 1, low)
+            high = np.where(active & ~smaller, middle, high)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build a compact n-gram language model file")
+    ap.add_argument("input", help="Text file or directory of count files from ngram_stream.py")
+    ap.add_argument("output", help="Path of the model file")
+    ap.add_argument("-n", "--order", type=int, default=3, help="Longest n-gram of the model")
+    ap.add_argument("-mc", "--min-count", type=int, default=2, help="Minimum count of stored bigrams and longer n-grams")
+    ap.add_argument("-q", "--quantization", type=int, choices=(8, 16), default=8, help="Bits per log probability")
+    ap.add_argument("-a", "--alpha", type=float, default=None, help="Store the additive smoothed backoff model with this alpha")
+    args = ap.parse_args()
+
+    if os.path.isdir(args.input):
+        from ngram_stream import load_counts
+        ngram_counts = [load_counts(args.input, n) for n in range(1, args.order + 1)]
+    else:
+        from ngram_stream import default_tokenizer
+
+        with open(args.input, "r") as f:
+            tokens = default_tokenizer(f.read())
+
+        vocabulary = Vocabulary()
+        token_ids = vocabulary.encode(tokens)
+        ngram_counts = [count_ngrams(token_ids, n, vocabulary) for n in range(1, args.order + 1)]
+
+    store = NGramStore.build(ngram_counts, min_count=args.min_count, quantization=args.quantization, alpha=args.alpha)
+    store.save(args.output)
+
+    for level in range(store.order):
+        print("{}-grams: {}".format(level + 1, int((store.codes[level] != store.missing).sum())))
+    print("size: {} bytes".format(os.path.getsize(args.output)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import numpy as np
+from ngram_counts import Vocabulary, NGramCounts, pack_ngrams
+# the shared sanitizer of the repository root, the other HW05 modules import it from here
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from text_sanitizer import sanitize_text
+
+# key and count of a table entry
+ENTRY_BYTES = 16
+
+
+def default_tokenizer(text):
+    """Tokenize and sanitize text like ex_1.py
+    """
+    from nltk.tokenize import word_tokenize
+
+    return sanitize_text(word_tokenize(text))
+
+
+def iter_text_chunks(path, chunk_size):
+    """Read a text file in chunks of about chunk_size characters which end at whitespace, so no token gets split
+    """
+    rest = ""
+
+    with open(path, "r") as f:
+        while True:
+            text = f.read(chunk_size)
+
+            if text == "":
+                break
+
+            text = rest + text
+            split = max(text.rfind(" "), text.rfind("\n"))
+
+            if split < 0:
+                rest = text
+                continue
+
+            rest = text[split + 1:]
+            yield text[:split + 1]
+
+    if rest != "":
+        yield rest
+
+
+def reduce_counts(keys, counts):
+    """Sum up the counts of equal keys
+
+    Returns
+    -------
+    np.ndarray, np.ndarray
+        sorted unique keys and their summed counts
+    """
+
+    if len(keys) == 0:
+        return keys, counts
+
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    counts = counts[order]
+
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return keys[starts], np.add.reduceat(counts, starts)
+
+
+def read_table(path):
+    """Memory map the keys and counts of a run or a final count file
+    """
+    if os.path.getsize(path + ".keys") == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    return np.memmap(path + ".keys", dtype="<i8", mode="r"), np.memmap(path + ".counts", dtype="<i8", mode="r")
+
+
+def merge_runs(run_paths, output_path, block_size):
+    """k-way merge of sorted runs into a single count file. Only block_size entries of each run are in memory at once.
+
+    Parameters
+    ----------
+    run_paths : string[]
+        Paths of the sorted runs
+    output_path : string
+        Path of the merged count file
+    block_size : int
+        Entries read from a run at once
+
+    Returns
+    -------
+    int
+        Number of entries of the merged file
+    """
+
+    runs = [read_table(path) for path in run_paths]
+    positions = [0] * len(runs)
+    blocks = [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)) for _ in runs]
+    entries = 0
+
+    def refill(index):
+        keys, counts = runs[index]
+        start = positions[index]
+        positions[index] = min(start + block_size, len(keys))
+        blocks[index] = (np.array(keys[start:positions[index]]), np.array(counts[start:positions[index]]))
+
+    for index in range(len(runs)):
+        refill(index)
+
+    with open(output_path + ".keys", "wb") as keys_file, open(output_path + ".counts", "wb") as counts_file:
+        while any(len(keys) > 0 for keys, _ in blocks):
+
+            # all keys up to the smallest last key of the loaded blocks are complete, later keys may still follow in another run
+            bound = None
+            for index, (keys, _) in enumerate(blocks):
+                if len(keys) > 0 and positions[index] < len(runs[index][0]):
+                    bound = keys[-1] if bound is None else min(bound, keys[-1])
+
+            merged_keys = []
+            merged_counts = []
+
+            for index, (keys, counts) in enumerate(blocks):
+                end = len(keys) if bound is None else np.searchsorted(keys, bound, side="right")
+                merged_keys.append(keys[:end])
+                merged_counts.append(counts[:end])
+                blocks[index] = (keys[end:], counts[end:])
+
+                if len(blocks[index][0]) == 0:
+                    refill(index)
+
+            keys, counts = reduce_counts(np.concatenate(merged_keys), np.concatenate(merged_counts))
+            keys.astype("<i8").tofile(keys_file)
+            counts.astype("<i8").tofile(counts_file)
+            entries += len(keys)
+
+    return entries
+
+
+class StreamingNGramCounter:
+    """Count n-grams of text which does not fit into memory. Tokens are counted chunk by chunk, the counts are kept in memory
+    until max_memory bytes are used and then written to disk as sorted runs. finish() merges the runs into one count file per
+    n-gram order.
+    """
+
+    def __init__(self, orders=(1, 2, 3), max_memory=256 << 20, spill_dir=None, bits=None):
+        """
+        Parameters
+        ----------
+        orders : int[]
+            n-gram lengths to count
+        max_memory : int
+            Bytes of the in-memory count buffers before they get spilled to disk
+        spill_dir : string
+            Directory of the runs, a temporary directory by default
+        bits : int
+            Bits per token id, by default as many as fit into the keys of the longest order
+        """
+
+        self.orders = sorted(orders)
+        self.max_memory = max_memory
+        self.bits = bits if bits is not None else 63 // self.orders[-1]
+
+        if self.bits * self.orders[-1] > 63:
+            raise ValueError("{}-grams with {} bits per token do not fit into int64 keys".format(self.orders[-1], self.bits))
+
+        self.vocabulary = Vocabulary()
+
+        self.own_spill_dir = spill_dir is None
+        self.spill_dir = tempfile.mkdtemp(prefix="ngrams_") if spill_dir is None else spill_dir
+
+        # counted chunks of each order which are not spilled yet
+        self.buffers = {n: [] for n in self.orders}
+        self.buffer_entries = 0
+        self.runs = {n: [] for n in self.orders}
+
+        # the last tokens of the previous chunk start the n-grams crossing the chunk border
+        self.history = np.zeros(0, dtype=np.int64)
+        self.token_count = 0
+
+    def add_tokens(self, tokens):
+        """Count the n-grams of the next tokens of the stream
+        """
+
+        ids = self.vocabulary.encode(tokens)
+
+        if len(self.vocabulary) > 1 << self.bits:
+            raise ValueError("The vocabulary exceeds {} tokens, use more bits per token".format(1 << self.bits))
+
+        ids = np.concatenate((self.history, ids))
+
+        for n in self.orders:
+            # n-grams which end in the history were counted with the previous chunk
+            skip = max(0, len(self.history) - n + 1)
+
+            keys, counts = np.unique(pack_ngrams(ids[skip:], n, self.bits), return_counts=True)
+            self.buffers[n].append((keys, counts.astype(np.int64)))
+            self.buffer_entries += len(keys)
+
+        self.history = ids[max(0, len(ids) - self.orders[-1] + 1):]
+        self.token_count += len(tokens)
+
+        if self.buffer_entries * ENTRY_BYTES > self.max_memory:
+            self.__compact()
+
+            if self.buffer_entries * ENTRY_BYTES > self.max_memory // 2:
+                self.spill()
+
+    def add_text(self, text, tokenizer=default_tokenizer):
+        self.add_tokens(tokenizer(text))
+
+    def count_file(self, path, chunk_size=1 << 20, tokenizer=default_tokenizer):
+        """Count the n-grams of a text file which gets read and tokenized in chunks
+        """
+
+        for text in iter_text_chunks(path, chunk_size):
+            self.add_text(text, tokenizer)
+
+    def spill(self):
+        """Write the in-memory counts as sorted runs to disk
+        """
+
+        self.__compact()
+
+        for n in self.orders:
+            for keys, counts in self.buffers[n]:
+                path = os.path.join(self.spill_dir, "run_{}_{}".format(n, len(self.runs[n])))
+                keys.astype("<i8").tofile(path + ".keys")
+                counts.astype("<i8").tofile(path + ".counts")
+                self.runs[n].append(path)
+
+            self.buffers[n] = []
+
+        self.buffer_entries = 0
+
+    def finish(self, output_dir, block_size=1 << 20):
+        """Merge all runs into the final count files <output_dir>/<n>grams.keys / .counts and store the vocabulary
+
+        Returns
+        -------
+        dict
+            n-gram order -> number of distinct n-grams
+        """
+
+        self.spill()
+        os.makedirs(output_dir, exist_ok=True)
+
+        with open(os.path.join(output_dir, "vocabulary.txt"), "w") as f:
+            f.write("{}\n".format(self.bits))
+            for token in self.vocabulary.tokens:
+                f.write(token + "\n")
+
+        sizes = {}
+        for n in self.orders:
+            sizes[n] = merge_runs(self.runs[n], os.path.join(output_dir, "{}grams".format(n)), block_size)
+
+        if self.own_spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+        return sizes
+
+    def __compact(self):
+        for n in self.orders:
+            if len(self.buffers[n]) > 1:
+                keys, counts = reduce_counts(np.concatenate([keys for keys, _ in self.buffers[n]]),
+                                             np.concatenate([counts for _, counts in self.buffers[n]]))
+                self.buffers[n] = [(keys, counts)]
+
+        self.buffer_entries = sum(len(keys) for n in self.orders for keys, _ in self.buffers[n])
+
+
+def load_counts(output_dir, n):
+    """Load a count file written by StreamingNGramCounter.finish() as memory mapped NGramCounts
+    """
+
+    vocabulary = Vocabulary()
+
+    with open(os.path.join(output_dir, "vocabulary.txt"), "r") as f:
+        bits = int(f.readline())
+        vocabulary.encode([line[:-1] for line in f])
+
+    keys, counts = read_table(os.path.join(output_dir, "{}grams".format(n)))
+    return NGramCounts(keys, counts, n, bits, vocabulary)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Count the n-grams of a text file larger than the memory")
+    ap.add_argument("input", help="Text file to count")
+    ap.add_argument("output", help="Directory of the count files")
+    ap.add_argument("-n", "--order", type=int, default=3, help="Count all n-grams up to this length")
+    ap.add_argument("-m", "--max-memory", type=int, default=256, help="MiB of counts kept in memory before spilling to disk")
+    ap.add_argument("-c", "--chunk-size", type=int, default=1 << 20, help="Characters read and tokenized at once")
+    args = ap.parse_args()
+
+    counter = StreamingNGramCounter(range(1, args.order + 1), max_memory=args.max_memory << 20)
+    counter.count_file(args.input, chunk_size=args.chunk_size)
+
+    for n, size in counter.finish(args.output).items():
+        print("{}-grams: {}".format(n, size))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import re
 from nltk.tokenize import word_tokenize
 from collections import Counter
 import matplotlib.pyplot as plt
 import numpy as np
 from math import log10
 import utils
-
-
-def sanitize_text(tokens):
-    """Sanizite Text:
-        Lowercase
-        Remove non characters
-    Parameters
-    ----------
-    tokens : string[]
-        Tokenized text
-
-    Returns
-    -------
-    string[]
-        Sanitized tokens.
-
-    """
-
-    tokens = [x.lower() for x in tokens]
-    regex = re.compile('[^a-z]')
-
-    for index in range(len(tokens)):
-        tokens[index] = regex.sub('', tokens[index])
-
-    # remove empty elements
-    tokens = [token for token in tokens if token != '']
-    return tokens
+from utils import sanitize_text
 
 
 def getWordFrequencies(tokens):
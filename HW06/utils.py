@@ -1,34 +1,13 @@
-import re
+import os
+import sys
 from nltk.tokenize import word_tokenize
 from collections import Counter
 import matplotlib.pyplot as plt
 import numpy as np
 from math import log10
-
-
-def sanitize_text(tokens):
-    """
-    Sanitizes a list of tokens from whitespaces and punktuations. All tokens 
-    will be set lowercase.
-
-    Parameters
-    ----------
-        tokens : list of tokens (words)
-
-    Returns
-    -------
-        A list of tokens only consisting of alphanumeric values.
-    """
-
-    tokens = [x.lower() for x in tokens]
-    regex = re.compile('[^a-z]')
-
-    for index in range(len(tokens)):
-        tokens[index] = regex.sub('', tokens[index])
-
-    # remove empty elements
-    tokens = [token for token in tokens if token != '']
-    return tokens
+# the shared sanitizer of the repository root, text_categorization.py imports it from here
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from text_sanitizer import sanitize_text
 
 
 def tokenize_text_string(text_string, sanitize=True, remove_duplicates=False):
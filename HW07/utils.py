@@ -1,4 +1,5 @@
-import re
+import os
+import sys
 from nltk.tokenize import word_tokenize
 from collections import Counter
 import matplotlib.pyplot as plt
@@ -7,34 +8,8 @@ from math import log10
 
 from nltk.stem import WordNetLemmatizer
 from nltk.stem.porter import PorterStemmer
-
-
-def sanitize_text(tokens, stopwords=None):
-    """
-    Sanitizes a list of tokens from whitespaces and punktuations. All tokens
-    will be set lowercase.
-
-    Parameters
-    ----------
-        tokens : list of tokens (words)
-        stopwords: string[] containing words that should be removed from the text
-
-    Returns
-    -------
-        A list of tokens only consisting of alphanumeric values.
-    """
-
-    tokens = [x.lower() for x in tokens]
-    regex = re.compile('[^a-z]')
-
-    for index in range(len(tokens)):
-        tokens[index] = regex.sub('', tokens[index])
-        if stopwords and tokens[index] in stopwords:
-            tokens[index] = ''
-
-    # remove empty elements
-    tokens = [token for token in tokens if token != '']
-    return tokens
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from text_sanitizer import sanitize_text
 
 
 def lemma_stemming(tokens):
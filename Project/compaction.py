@@ -0,0 +1,102 @@
+import argparse
+import pickle
+import time
+import implementation.utils as utils
+from implementation.ChangingRule import RuleCollection
+from implementation.Inflection import SplitMethod
+import task1
+import task2
+
+# inference function and split method of the tasks which can be evaluated
+TASKS = {1: (task1, SplitMethod.LEVINSTEIN_BIT_PARALLEL), 2: (task2, SplitMethod.KHALING_XFIX)}
+
+
+def read_params():
+    ap = argparse.ArgumentParser(description="Compares compacted rule collections against the full collections on a test set")
+    ap.add_argument("-tr", "--train", required=True,
+                    help="Path to the trainings file")
+    ap.add_argument("-te", "--test", required=True,
+                    help="Path to the (dev) test file")
+    ap.add_argument("-t", "--task", required=False, type=int, choices=sorted(TASKS), default=1,
+                    help="Task whose inference should be used")
+    ap.add_argument("-mc", "--min-counts", required=False, type=int, nargs="+", default=[1, 2, 3],
+                    help="Minimal rule counts to evaluate")
+    ap.add_argument("-cov", "--min-coverages", required=False, type=float, nargs="+", default=[0.0, 0.05],
+                    help="Minimal rule coverages of the feature combinations to evaluate")
+
+    return vars(ap.parse_args())
+
+
+def evaluate_collections(task_module, test_data, prefix_rule_col, suffix_rule_col):
+    """Runs the inference of a task with the given rule collections and measures accuracy, inference time and size. The inference is
+    run once before it is timed, so building the input index of the collections is not part of the measured time.
+
+    Parameters
+    ----------
+    task_module : module
+        task module providing inflect_data() and compute_accuracy()
+    test_data : (List<string>, List<FeatureCollection>, List<string>)
+        lemmas, feature collections and expected inflections of the test set
+    prefix_rule_col : RuleCollection
+        RuleCollection instance containing the prefix rules
+    suffix_rule_col : RuleCollection
+        RuleCollection instance containing the suffix rules
+
+    Returns
+    -------
+    Dict
+        Dictionary containing the amount of rules, the pickled size in bytes, the inference time in seconds and the accuracy
+    """
+
+    test_lemmas, test_feature_descs, test_ground_truth = test_data
+
+    # the first run only warms up, its timing is not representative
+    task_module.inflect_data(test_lemmas, test_feature_descs, prefix_rule_col, suffix_rule_col)
+
+    start = time.perf_counter()
+    predictions = task_module.inflect_data(test_lemmas, test_feature_descs, prefix_rule_col, suffix_rule_col)
+    duration = time.perf_counter() - start
+
+    _, acc = task_module.compute_accuracy(predictions, test_ground_truth)
+
+    return {"rules": prefix_rule_col.get_rule_amount() + suffix_rule_col.get_rule_amount(),
+            "bytes": len(pickle.dumps((prefix_rule_col, suffix_rule_col))),
+            "time": duration,
+            "accuracy": acc}
+
+
+def main():
+
+    params = read_params()
+    task_module, split_method = TASKS[params["task"]]
+
+    train_inflections = utils.read_dataset(params["train"], split_method=split_method, use_cache=True)
+    prefix_rule_collection, suffix_rule_collection = RuleCollection.create_rule_collections(train_inflections)
+
+    test_data = task_module.prepare_test_data(utils.read_dataset(params["test"], split_method=split_method, use_cache=True))
+
+    baseline = evaluate_collections(task_module, test_data, prefix_rule_collection, suffix_rule_collection)
+
+    print("min count\tcoverage\tdominated\trules\tsize\ttime\taccuracy\tdelta")
+
+    for min_count in params["min_counts"]:
+        for min_coverage in params["min_coverages"]:
+            for remove_dominated in (False, True):
+
+                prefix_compacted = prefix_rule_collection.get_compacted_collection(min_count, min_coverage, remove_dominated)
+                suffix_compacted = suffix_rule_collection.get_compacted_collection(min_count, min_coverage, remove_dominated)
+
+                result = evaluate_collections(task_module, test_data, prefix_compacted, suffix_compacted)
+
+                print("{}\t\t{:.3f}\t\t{}\t\t{} ({:.1f}%)\t{} ({:.1f}%)\t{:.3f}s ({:.1f}%)\t{:.3f}\t\t{:+.3f}".format(
+                    min_count, min_coverage, remove_dominated,
+                    result["rules"], 100 * result["rules"] / float(baseline["rules"]),
+                    result["bytes"], 100 * result["bytes"] / float(baseline["bytes"]),
+                    result["time"], 100 * result["time"] / baseline["time"],
+                    result["accuracy"] * 100, (result["accuracy"] - baseline["accuracy"]) * 100))
+
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,747 @@
+import argparse
+import glob
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+import implementation.utils as utils
+from implementation.ChangingRule import SuffixRule, PrefixRule, RuleCollection
+from implementation.Inflection import SplitMethod
+from implementation.RuleAutomaton import CompiledInflector
+from implementation.SharedModel import SharedModel
+from implementation.SplitCache import SplitCache, PersistentCachedSplitter
+from implementation.UniMorph import FeatureCollection
+from implementation.Word import LevinsteinPartition, KhalingXFixPartition, CachedSplitter
+import task1
+import task2
+import task3
+
+# (train, test) files of the shipped languages and the split method their task uses
+DATA_SETS = [("data/L00 - English/english-train-medium", "data/L00 - English/english-dev", SplitMethod.LEVINSTEIN, task1),
+             ("data/L06 - Khaling/khaling-train-medium", "data/L06 - Khaling/khaling-dev", SplitMethod.KHALING_XFIX, task2)]
+
+# characters of the random strings, few characters create many equal substrings
+RANDOM_ALPHABETS = ["ab", "abc", "abcdefghij"]
+
+
+def read_params():
+    ap = argparse.ArgumentParser(description="Compares the reference implementations with the optimized code paths on the shipped data "
+                                             "and on random strings")
+    ap.add_argument("-c", "--checks", required=False, nargs="+", choices=sorted(CHECKS), default=sorted(CHECKS),
+                    help="Checks to run")
+    ap.add_argument("-r", "--random", required=False, type=int, default=2000,
+                    help="Amount of random cases per check")
+    ap.add_argument("-s", "--seed", required=False, type=int, default=0,
+                    help="Seed of the random cases")
+
+    return vars(ap.parse_args())
+
+
+def random_word(rng, alphabet, max_length=8):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+
+
+def mutate_word(rng, word, alphabet):
+    """Returns a randomly changed copy of a word: characters get replaced, inserted or removed and affixes get added
+    """
+
+    chars = list(word)
+
+    for _ in range(rng.randint(0, 3)):
+        position = rng.randint(0, len(chars))
+        operation = rng.randint(0, 2)
+
+        if operation == 0:
+            chars.insert(position, rng.choice(alphabet))
+        elif position < len(chars):
+            if operation == 1:
+                chars[position] = rng.choice(alphabet)
+            else:
+                del chars[position]
+
+    return random_word(rng, alphabet, 3) + "".join(chars) + random_word(rng, alphabet, 3)
+
+
+def read_rows(path):
+    with open(path, encoding="utf8") as input:
+        return [line.split() for line in input if len(line.split()) == 3]
+
+
+def minimize_case(case, diverges):
+    """Shrinks the strings of a diverging case as long as it keeps diverging - first whole strings, then single characters.
+
+    Parameters
+    ----------
+    case : tuple
+        the diverging case, only its string elements get changed
+    diverges : function
+        returns True if a case still diverges
+
+    Returns
+    -------
+    tuple
+        a minimal diverging case
+    """
+
+    case = tuple(case)
+    changed = True
+
+    while changed:
+        changed = False
+
+        for element_index, element in enumerate(case):
+            if not isinstance(element, str):
+                continue
+
+            candidates = [""] + [element[:i] + element[i + 1:] for i in range(len(element))]
+
+            for candidate in candidates:
+                if candidate == element:
+                    continue
+
+                new_case = case[:element_index] + (candidate,) + case[element_index + 1:]
+
+                if diverges(new_case):
+                    case = new_case
+                    changed = True
+                    break
+
+            if changed:
+                break
+
+    return case
+
+
+def run_check(check_name, cases, backends):
+    """Runs all backends on the same cases, measures their time and compares their results with the first (reference) backend
+
+    Parameters
+    ----------
+    check_name : string
+        name of the check for the report
+    cases : List<tuple>
+        the inputs of the backends
+    backends : List<(string, function)>
+        (name, function) pairs, each function maps a list of cases to the list of their results. The first one is the reference.
+
+    Returns
+    -------
+    bool
+        True if all backends returned the same results as the reference
+    """
+
+    outputs = []
+
+    for backend_name, backend in backends:
+        start = time.perf_counter()
+        outputs.append(backend(cases))
+        outputs[-1] = (time.perf_counter() - start, outputs[-1])
+
+    reference_name, reference = backends[0]
+    reference_time, reference_results = outputs[0]
+
+    print("{} ({} cases)".format(check_name, len(cases)))
+    print("\t{:<28}{:>10.3f}s".format(reference_name, reference_time))
+
+    all_equal = True
+
+    for (backend_name, backend), (backend_time, backend_results) in zip(backends[1:], outputs[1:]):
+        divergence = next((i for i in range(len(cases)) if reference_results[i] != backend_results[i]), None)
+
+        speedup = reference_time / backend_time if backend_time > 0 else float("inf")
+        status = "ok" if divergence is None else "DIVERGES"
+        print("\t{:<28}{:>10.3f}s {:>8.2f}x  {}".format(backend_name, backend_time, speedup, status))
+
+        if divergence is not None:
+            all_equal = False
+
+            def diverges(case):
+                return reference([case]) != backend([case])
+
+            case = cases[divergence]
+            minimized = minimize_case(case, diverges) if diverges(case) else case
+
+            print("\t\tfirst divergence: case {} {}".format(divergence, case))
+            print("\t\tminimized: {}".format(minimized))
+            print("\t\t{}: {}".format(reference_name, reference([minimized])[0]))
+            print("\t\t{}: {}".format(backend_name, backend([minimized])[0]))
+
+    return all_equal
+
+
+def get_split_backends(splitter_factory, splitter_name, cache_path):
+    """Returns the backends splitting (source, target) cases with the given splitter and its cached variants
+    """
+
+    def split_all(splitter, cases):
+        return [tuple((word.prefix, word.stem, word.suffix) for word in splitter.split_word(source, target)) for source, target in cases]
+
+    def persistent(cases):
+        splitter = PersistentCachedSplitter(splitter_factory(), splitter_name, SplitCache(cache_path))
+        splitter.prefetch(cases)
+        results = split_all(splitter, cases)
+        splitter.flush()
+        return results
+
+    return [("cached", lambda cases: split_all(CachedSplitter(splitter_factory()), cases)),
+            ("persistent (cold)", persistent),
+            ("persistent (warm)", persistent)]
+
+
+def check_split(params):
+    rng = random.Random(params["seed"])
+
+    pairs = []
+    for path in sorted(glob.glob("data/*/*")):
+        pairs.extend((lemma, form) for lemma, form, _ in read_rows(path))
+
+    pairs = list(dict.fromkeys(pairs))
+
+    for _ in range(params["random"]):
+        alphabet = rng.choice(RANDOM_ALPHABETS)
+        source = random_word(rng, alphabet)
+        pairs.append((source, mutate_word(rng, source, alphabet) if rng.random() < 0.8 else random_word(rng, alphabet)))
+
+    result = True
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        result &= run_check("split_word LEVINSTEIN", pairs,
+                            [("reference", lambda cases: [tuple((word.prefix, word.stem, word.suffix)
+                                                                for word in LevinsteinPartition().split_word(*case))
+                                                          for case in cases]),
+                             ("bit parallel", lambda cases: [tuple((word.prefix, word.stem, word.suffix)
+                                                                   for word in LevinsteinPartition(bit_parallel=True).split_word(*case))
+                                                             for case in cases])]
+                            + get_split_backends(lambda: LevinsteinPartition(bit_parallel=True), "LEVINSTEIN_BIT_PARALLEL",
+                                                 os.path.join(cache_dir, "splits.sqlite")))
+
+        result &= run_check("split_word KHALING_XFIX", pairs,
+                            [("reference", lambda cases: [tuple((word.prefix, word.stem, word.suffix)
+                                                                for word in KhalingXFixPartition().split_word(*case))
+                                                          for case in cases])]
+                            + get_split_backends(KhalingXFixPartition, "KHALING_XFIX", os.path.join(cache_dir, "splits.sqlite")))
+
+    return result
+
+
+class ReferenceRuleCollection():
+    """The rule generation, training and lookups of the baseline revision ba07cdb, copied verbatim from ChangingRule.py. The reference
+    results of the checks must not depend on the optimized code, so only the names of the generators and of the class were changed.
+    """
+    def __init__(self):
+        """Creates an empty RuleCollection instance. To create a rule collection given a list of Inflections use create_rule_collections()
+        
+        """
+        self.rule_dict = {}
+
+    @staticmethod
+    def generate_prefix_rules(inflection):
+        """Generates a list of inflection rules out of a lemma Word and an inflection Word.
+        
+        Parameters
+        ----------
+        lemma : Word
+            A Word instance of the lemma.
+        inflection : Word
+            A Word instance of the inflected lemma. 
+        inflection_desc_list : List<InflectionFeatures>
+            A list of uniMorph features describing the inflection process
+        
+        Returns
+        -------
+        List<PrefixRule>
+            A list of PrefixRules which can be generated out the the lemma-inflection relation.
+        """
+
+        rules = []
+
+        # TODO: Usually we get the empty rule as most common rule :(
+        # --> leaving this out is required instead empty rule is always most dominant
+        # rules.append(PrefixRule.empty_rule(inflection.inflection_desc_list))
+
+        rule = PrefixRule(inflection.lemma.prefix, inflection.inflection.prefix, inflection.inflection_desc_list)
+        rules.append(rule)
+        return rules
+
+    @staticmethod
+    def generate_suffix_rules(inflection):
+        
+        rules = []
+        # generate and insert empty rule
+        # rules.append(SuffixRule.empty_rule(inflection.inflection_desc_list))
+
+        rule_source = inflection.lemma.suffix
+        rule_target = inflection.inflection.suffix
+
+        new_rule = SuffixRule(rule_source, rule_target, inflection.inflection_desc_list)
+        rules.append(new_rule)
+
+        # TODO: problem when source and target stem have different lengths
+        for i in reversed(range(len(list(inflection.lemma.stem)))):
+
+            if len(inflection.lemma.stem) <= i or len(inflection.inflection.stem) <= i:
+                break
+
+            rule_source = inflection.lemma.stem[i] + rule_source
+            rule_target = inflection.inflection.stem[i] + rule_target
+            new_rule = SuffixRule(rule_source, rule_target, inflection.inflection_desc_list)
+            rules.append(new_rule)
+
+        return rules
+
+    def add_rule(self, new_rule):
+        """Adds a single ChangingRule instance to the collection.
+        
+        Parameters
+        ----------
+        new_rule : ChangingRule
+            The ChangingRule instance to add
+        
+        """
+
+        feature_list = new_rule.infection_desc
+
+        if str(feature_list) in self.rule_dict:
+            if str(new_rule) in self.rule_dict[str(feature_list)]:
+                # increase count
+                self.rule_dict[str(feature_list)][str(new_rule)]["count"] += 1
+            else:
+                # add rule
+                self.rule_dict[str(feature_list)][str(new_rule)] = {"rule": new_rule, "count": 1}
+        else:
+            self.rule_dict[str(feature_list)] = {str(new_rule): {"rule": new_rule, "count": 1}}
+
+    def get_highest_overlap_rule(self, input_str, inflection_desc):
+        """Returns a single ChangingRule from this collection which provides the highest overlap for a given word string and a 
+        corresponding infelction feature collection. If multiple rules have the same overlap scoring, this methods returns the
+        rule which appeard as most frequent in the training.
+        
+        Parameters
+        ----------
+        input_str : string
+            Input word string (usually an infinitiv) for which a ChaningRule should be found.
+        inflection_desc : FeatureCollection
+            A collection for inflection features which describe the whiched inflection process.
+        
+        Returns
+        -------
+        ChangingRule
+            The most suitable ChanginRule instance from this collection which (1) fits to the given string, (2) provides the highest
+            overlap to the input string and (3) is the most frequent among all other rules with the same overlap score.
+        """
+
+        # if feature combination did not appear in rule collection
+        if str(inflection_desc) not in self.rule_dict:
+            return None
+
+        highest_score = 0
+        best_rules = []
+
+        for single_rule_dict in self.rule_dict[str(inflection_desc)].values():
+            overlap_score = single_rule_dict["rule"].get_overlap_score(input_str)
+
+            if overlap_score > highest_score:
+                highest_score = overlap_score
+                best_rules = [single_rule_dict]
+            elif overlap_score == highest_score:
+                best_rules.append(single_rule_dict)
+
+        # TODO: Not sure if we really want this, but otherwise results are quite random for many cases
+        # among all possible rules take the most frequent one
+        highest_count = 0
+        best_rule = None
+
+        # get rules with highest frequency
+        for single_rule_dict in best_rules:
+                
+            # if rule does not match to word
+            if not single_rule_dict["rule"].is_applicable(input_str):
+                continue            
+
+            cur_count = single_rule_dict["count"]
+
+            if cur_count > highest_count:
+                highest_count = cur_count
+                best_rule = single_rule_dict["rule"]
+
+        return best_rule
+
+    def get_highest_count_rule(self, input_str, inflection_desc):
+        """Returns the ChanginRule instance of this collection which (1) is applicable for the given inflection feature description,
+        (2) fits for a given input string and (3) appeard most frequent during the training stage.
+        
+        Parameters
+        ----------
+        input_str : string
+            Input string (usually infinitiv) for which the suitable ChanginRule should be found
+        inflection_desc : FeatureCollection
+            A FeatureCollection instance describing the inflection process.
+        
+        Returns
+        -------
+        ChangingRule
+            The most suitable ChanginRule instance
+        """
+
+
+         # if feature combination did not appear in rule collection
+        if str(inflection_desc) not in self.rule_dict:
+            return None
+        
+        highest_count = 0
+        best_rule = None
+
+        for single_rule_dict in self.rule_dict[str(inflection_desc)].values():
+
+            # if rule does not match to word
+            if not single_rule_dict["rule"].is_applicable(input_str):
+                continue            
+
+            cur_count = single_rule_dict["count"]
+            # print("Rule: {} Count: {}".format(single_rule_dict["rule"], cur_count))
+
+            if cur_count > highest_count:
+                highest_count = cur_count
+                best_rule = single_rule_dict["rule"]
+
+        return best_rule
+
+    @staticmethod
+    def create_rule_collections(inflection_list):
+        """Creates two instances of RuleCollections out of a list of Inflection instances - one for prefix rules and one for suffix rules.
+        For each Inflection first, the SuffixRules get extracted and packed into a RuleCollection instance; afterwards the same happens
+        for PrefixRules.
+        
+        Parameters
+        ----------
+        inflection_list : List<Inflection>
+            A list of Inflection instances for which the pre- and suffix rules should be extracted.
+        
+        Returns
+        -------
+        RuleCollection, RuleCollection
+            First an instance of a RuleCollection containing all PrefixRules and a RuleCollection withe the extractes SuffixRules.
+        """
+
+
+        prefix_rule_collection = ReferenceRuleCollection()
+        suffix_rule_collection = ReferenceRuleCollection()
+
+        for inflection in inflection_list:
+
+            # First the suffix changing rules          
+            suffix_rules = ReferenceRuleCollection.generate_suffix_rules(inflection)
+
+            for rule in suffix_rules:
+                suffix_rule_collection.add_rule(rule)
+
+            # Then the prefix changing rules
+            prefix_rules = ReferenceRuleCollection.generate_prefix_rules(inflection)
+
+            for rule in prefix_rules:
+                prefix_rule_collection.add_rule(rule)
+
+        return prefix_rule_collection, suffix_rule_collection
+
+    def get_suitable_features(self, lemma_str, inflection_str):
+        """This method searches the most suitable rule which applied to the lemma_str provides the given inflection_str as output.
+        If multiple rules return the same correct inflection, the rule with the highest overlap and then with the highest count
+        is returned.
+        
+        Parameters
+        ----------
+        lemma_str : string
+            lemma of the word which should be inflected
+        inflection_str : string
+            inflected lemma string
+        
+        Returns
+        -------
+        FeatureCollection
+            The FeatureCollection instance of the most suitable rule. None if no rule could reproduce the requtested output
+        """
+
+        candidate_rules = []
+
+        # iterate over all rules
+        for feature_list, rule_data in self.rule_dict.items():
+            for rule_rep, single_rule in rule_data.items():
+                current_rule = single_rule["rule"]
+
+                # check wheather rule can be applied
+                if current_rule.is_applicable(lemma_str):
+
+                    # compute the inflection
+                    inflected_lemma = current_rule.apply_rule(lemma_str)
+
+                    # compare inflection with expected result
+                    if inflected_lemma == inflection_str:
+                        candidate_rules.append(single_rule)
+                        
+        if len(candidate_rules) == 0:
+            return
+
+        # out of a list of possible rules choose the with the highest overlap and than with the highest count
+
+        # compute the overlap score for all candidates and store the highest score
+        highest_overlap = 0
+        for single_rule in candidate_rules:
+            ov_score = single_rule["rule"].get_overlap_score(lemma_str)
+            single_rule["overlap"] = ov_score#
+
+            if ov_score > highest_overlap:
+                highest_overlap = ov_score
+
+        # filter out rules with a lower overlap score than the highest
+        filtered_candidate_rules = []
+        for single_rule in candidate_rules:
+            if single_rule["overlap"] == highest_overlap:
+                filtered_candidate_rules.append(single_rule)
+
+        # among the remaining rules, choose the one with the highest count
+        best_rule = filtered_candidate_rules[0]
+
+        for single_candidate in filtered_candidate_rules:
+            if single_candidate["count"] > best_rule["count"]:
+                best_rule = single_candidate
+
+        # return the feature list of the best rule
+        return best_rule["rule"].infection_desc
+
+    def get_rules(self):
+        """Returns a list of all rules stored in this RuleCollection instance.
+        
+        Returns
+        -------
+        List<ChangingRule>
+            a list of ChangingRule instances which are stored in this collection
+        """
+
+        all_rules = []
+        for _, rule_dict in self.rule_dict.items():
+            for _, single_rule_dict in rule_dict.items():
+                all_rules.append(single_rule_dict["rule"])
+
+        return all_rules
+
+
+def get_feature_rules(prefix_rule_col, suffix_rule_col, cases):
+    """Returns for each (feature string,) case the (rule, count) pairs of both collections in their order
+    """
+
+    return [tuple([(rule_key, single_rule_dict["count"]) for rule_key, single_rule_dict in rule_col.rule_dict.get(key, {}).items()]
+                  for rule_col in (prefix_rule_col, suffix_rule_col)) for key, in cases]
+
+
+def check_training(params):
+    result = True
+
+    for train_path, _, split_method, _ in DATA_SETS:
+        inflections = utils.read_file(train_path, split_method=split_method)
+
+        # a case is a single feature combination, its result the rules and counts of both collections
+        def reference(cases):
+            prefix_rule_col, suffix_rule_col = ReferenceRuleCollection.create_rule_collections(inflections)
+            return get_feature_rules(prefix_rule_col, suffix_rule_col, cases)
+
+        def counted(cases):
+            prefix_rule_col, suffix_rule_col = RuleCollection.create_rule_collections(inflections)
+            return get_feature_rules(prefix_rule_col, suffix_rule_col, cases)
+
+        def dataset(cases):
+            prefix_rule_col, suffix_rule_col = RuleCollection.create_rule_collections(
+                utils.read_dataset(train_path, split_method=split_method))
+            return get_feature_rules(prefix_rule_col, suffix_rule_col, cases)
+
+        feature_keys = list(dict.fromkeys(str(inflection.inflection_desc_list) for inflection in inflections))
+
+        result &= run_check("training {}".format(os.path.basename(train_path)), [(key,) for key in feature_keys],
+                            [("reference", reference), ("counted", counted), ("dataset (incl. reading)", dataset)])
+
+    return result
+
+
+def get_selection_cases(rng, params, train_inflections, test_rows):
+    # equal feature combinations use the FeatureCollection instance of the training, like the task scripts
+    feature_descs = {}
+    for inflection in train_inflections:
+        feature_descs.setdefault(str(inflection.inflection_desc_list), inflection.inflection_desc_list)
+
+    cases = []
+    for lemma, _, features in test_rows:
+        desc = FeatureCollection.create_feature_collection(features)
+        cases.append((lemma, feature_descs.get(str(desc), desc)))
+
+    lemmas = [inflection.lemma.to_string() for inflection in train_inflections]
+    alphabet = sorted(set("".join(lemmas)))
+    descs = list(feature_descs.values())
+
+    for _ in range(params["random"]):
+        cases.append((mutate_word(rng, rng.choice(lemmas), alphabet), rng.choice(descs)))
+
+    return cases
+
+
+def round_trip(cases):
+    """Returns the cases after pickling them like multiprocessing does for the workers. The unpickled FeatureCollections rebuild
+    their sets, so their strings may list the features in another order.
+    """
+
+    return pickle.loads(pickle.dumps(cases))
+
+
+def check_selection(params):
+    rng = random.Random(params["seed"])
+    result = True
+
+    for train_path, test_path, split_method, _ in DATA_SETS:
+        train_inflections = utils.read_file(train_path, split_method=split_method)
+        reference_prefix_col, reference_suffix_col = ReferenceRuleCollection.create_rule_collections(train_inflections)
+        prefix_rule_col, suffix_rule_col = RuleCollection.create_rule_collections(train_inflections)
+
+        cases = get_selection_cases(rng, params, train_inflections, read_rows(test_path))
+
+        def reference(cases):
+            return [(str(reference_prefix_col.get_highest_count_rule(lemma, desc)),
+                     str(reference_suffix_col.get_highest_overlap_rule(lemma, desc))) for lemma, desc in cases]
+
+        def paradigm(cases, prefix_col=prefix_rule_col, suffix_col=suffix_rule_col):
+            return [(str(prefix_col.get_highest_count_rules(lemma, [desc])[0]), str(suffix_col.get_highest_overlap_rules(lemma, [desc])[0]))
+                    for lemma, desc in cases]
+
+        model = SharedModel.publish(prefix_rule_col, suffix_rule_col)
+
+        try:
+            result &= run_check("rule selection {}".format(os.path.basename(train_path)), cases,
+                                [("reference", reference), ("input index", paradigm),
+                                 ("shared model", lambda cases: paradigm(cases, model.prefix_rule_col, model.suffix_rule_col)),
+                                 ("shared model (pickled)", lambda cases: paradigm(round_trip(cases), model.prefix_rule_col,
+                                                                                   model.suffix_rule_col))])
+        finally:
+            model.unlink()
+
+    return result
+
+
+def check_suitable_features(params):
+    rng = random.Random(params["seed"])
+    result = True
+
+    for train_path, test_path, split_method, _ in DATA_SETS:
+        train_inflections = utils.read_file(train_path, split_method=split_method)
+        reference_cols = ReferenceRuleCollection.create_rule_collections(train_inflections)
+        rule_cols = RuleCollection.create_rule_collections(train_inflections)
+
+        cases = [(lemma, form) for lemma, form, _ in read_rows(test_path)]
+
+        lemmas = [inflection.lemma.to_string() for inflection in train_inflections]
+        alphabet = sorted(set("".join(lemmas)))
+
+        for _ in range(params["random"]):
+            lemma = rng.choice(lemmas)
+            cases.append((lemma, mutate_word(rng, lemma, alphabet)))
+
+        for rule_col_name, reference_col, rule_col in zip(("prefix", "suffix"), reference_cols, rule_cols):
+
+            def get_features(features):
+                return None if features is None else sorted(str(feature) for feature in features.features)
+
+            result &= run_check("suitable {} features {}".format(rule_col_name, os.path.basename(train_path)), cases,
+                                [("reference", lambda cases: [get_features(reference_col.get_suitable_features(*case)) for case in cases]),
+                                 ("signature index", lambda cases: [get_features(rule_col.get_suitable_features(*case)) for case in cases])])
+
+    return result
+
+
+def check_tasks(params):
+    result = True
+
+    for train_path, test_path, split_method, task_module in DATA_SETS:
+        train_inflections = utils.read_file(train_path, split_method=split_method)
+        test_lemmas, test_feature_descs, test_forms = task_module.prepare_test_data(utils.read_dataset(test_path, split_method=split_method))
+
+        reference_prefix_col, reference_suffix_col = ReferenceRuleCollection.create_rule_collections(train_inflections)
+        prefix_rule_col, suffix_rule_col = RuleCollection.create_rule_collections(utils.read_dataset(train_path, split_method=split_method))
+        cond_rules_col = task2.prepare_conditional_rules() if task_module is task2 else None
+
+        # the original inference: one lookup per row
+        def reference(cases):
+            predictions = []
+
+            for lemma, desc in cases:
+                prefix_rule = reference_prefix_col.get_highest_count_rule(lemma, desc) or PrefixRule.empty_rule(desc)
+                suffix_rule = reference_suffix_col.get_highest_overlap_rule(lemma, desc) or SuffixRule.empty_rule(desc)
+                prediction = prefix_rule.apply_rule(suffix_rule.apply_rule(lemma))
+
+                if cond_rules_col is not None:
+                    prediction = cond_rules_col.try_and_apply_all(prediction)
+
+                predictions.append(prediction)
+
+            return predictions
+
+        backends = [("reference", reference),
+                    ("inflect_data", lambda cases: task_module.inflect_data([lemma for lemma, _ in cases], [desc for _, desc in cases],
+                                                                            prefix_rule_col, suffix_rule_col))]
+
+        def compiled(cases):
+            predictions = CompiledInflector.compile(prefix_rule_col, suffix_rule_col).inflect_data([lemma for lemma, _ in cases],
+                                                                                                   [desc for _, desc in cases])
+
+            if cond_rules_col is not None:
+                predictions = [cond_rules_col.try_and_apply_all(prediction) for prediction in predictions]
+
+            return predictions
+
+        backends.append(("compiled automata", compiled))
+
+        # the workers receive pickled feature descriptions, so the parent hands over round-tripped ones as well
+        def parallel(cases):
+            cases = round_trip(cases)
+            predictions = task1.inflect_data_parallel([lemma for lemma, _ in cases], [desc for _, desc in cases],
+                                                      prefix_rule_col, suffix_rule_col, 2)
+
+            if cond_rules_col is not None:
+                predictions = [cond_rules_col.try_and_apply_all(prediction) for prediction in predictions]
+
+            return predictions
+
+        backends.append(("inflect_data_parallel", parallel))
+
+        result &= run_check("{} {}".format(task_module.__name__, os.path.basename(test_path)),
+                            list(zip(test_lemmas, test_feature_descs)), backends)
+
+        # task 3 infers the features of (lemma, form) pairs
+        def infer_all(cases, prefix_col, suffix_col):
+            return [sorted(str(feature) for feature in task3.infer_inflection_features(lemma, form, prefix_col, suffix_col).features)
+                    for lemma, form in cases]
+
+        result &= run_check("task3 {}".format(os.path.basename(test_path)), list(zip(test_lemmas, test_forms)),
+                            [("reference", lambda cases: infer_all(cases, reference_prefix_col, reference_suffix_col)),
+                             ("counted", lambda cases: infer_all(cases, prefix_rule_col, suffix_rule_col))])
+
+    return result
+
+
+# name of each check and the function running it
+CHECKS = {"split": check_split, "training": check_training, "selection": check_selection, "features": check_suitable_features,
+          "tasks": check_tasks}
+
+
+def main():
+
+    params = read_params()
+
+    all_equal = True
+    for check_name in params["checks"]:
+        all_equal &= CHECKS[check_name](params)
+
+    print("all backends match the reference" if all_equal else "divergences found")
+
+    return 0 if all_equal else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
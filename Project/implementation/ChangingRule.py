@@ -1,3 +1,4 @@
+import sys
 from implementation.Inflection import Inflection
 
 class ChangingRule():
@@ -47,6 +48,22 @@ class ChangingRule():
         print("A general ChangingRule cannot be created from an inflection. Use Prefix or Suffix rules")
         raise NotImplementedError
 
+    def iter_shorter_contexts(self):
+        """Generator over the (input, output) pairs of all rules which describe the same change as this rule but with less unchanged
+        context. A general ChangingRule has no context, so nothing is generated.
+        """
+        return iter(())
+
+    @staticmethod
+    def get_matching_inputs(word):
+        print("Matching inputs are only defined for Prefix or Suffix rules")
+        raise NotImplementedError
+
+    @staticmethod
+    def get_edit_signatures(word, target):
+        print("Edit signatures are only defined for Prefix or Suffix rules")
+        raise NotImplementedError
+
     def is_applicable(self, word):
         """Checks if this rule can be applied to a given word string i.e. wheather the rule input matches with the given word.
         
@@ -141,13 +158,80 @@ class PrefixRule(ChangingRule):
 
         rules = []
 
+        for rule_source, rule_target in PrefixRule.iter_rule_pairs(inflection):
+            rules.append(PrefixRule(rule_source, rule_target, inflection.inflection_desc_list))
+
+        return rules
+
+    @staticmethod
+    def iter_rule_pairs(inflection):
+        """Generator over the (input, output) string pairs of all PrefixRules which can be generated out of an inflection. No rule
+        instances are created.
+        
+        Parameters
+        ----------
+        inflection : Inflection
+            Inflection instance containing the split lemma and inflection Words
+        """
+
         # TODO: Usually we get the empty rule as most common rule :(
         # --> leaving this out is required instead empty rule is always most dominant
-        # rules.append(PrefixRule.empty_rule(inflection.inflection_desc_list))
+        # yield "", ""
 
-        rule = PrefixRule(inflection.lemma.prefix, inflection.inflection.prefix, inflection.inflection_desc_list)
-        rules.append(rule)
-        return rules
+        yield inflection.lemma.prefix, inflection.inflection.prefix
+
+    @staticmethod
+    def get_matching_inputs(word):
+        """Returns all rule inputs for which a PrefixRule is applicable to the given word together with the overlap score such a rule
+        would get, i.e. all prefixes of the word including the empty one.
+        
+        Parameters
+        ----------
+        word : string
+            Word for which the matching rule inputs should be computed
+        
+        Returns
+        -------
+        List<(string, int)>
+            List of (rule input, overlap score) tuples
+        """
+
+        return [(word[:k], k) for k in range(len(word) + 1)]
+
+    @staticmethod
+    def get_edit_signatures(word, target):
+        """Returns all (input, output) pairs of PrefixRules which are applicable to the word and change it into the target, i.e. the
+        splits of both strings where the remaining ends are equal.
+        
+        Parameters
+        ----------
+        word : string
+            Word the rule should be applied to
+        target : string
+            String the rule should produce
+        
+        Returns
+        -------
+        List<(string, string)>
+            List of (rule input, rule output) tuples
+        """
+
+        # length of the common end of both strings
+        common = 0
+        while common < min(len(word), len(target)) and word[-common - 1] == target[-common - 1]:
+            common += 1
+
+        return [(word[:k], target[:len(target) - len(word) + k]) for k in range(len(word) - common, len(word) + 1)]
+
+    def iter_shorter_contexts(self):
+        """Generator over the (input, output) pairs of all PrefixRules which describe the same change as this rule but with less
+        unchanged context at the end of the rule. E.g. "$ab > $xb" generates ("a", "x").
+        """
+
+        k = 1
+        while k <= min(len(self.input), len(self.output)) and self.input[-k] == self.output[-k]:
+            yield self.input[:-k], self.output[:-k]
+            k += 1
 
     def apply_rule(self, lemma):
         result = "$" + lemma
@@ -187,27 +271,96 @@ class SuffixRule(ChangingRule):
     def generate_rules(inflection):
         
         rules = []
-        # generate and insert empty rule
-        # rules.append(SuffixRule.empty_rule(inflection.inflection_desc_list))
 
-        rule_source = inflection.lemma.suffix
-        rule_target = inflection.inflection.suffix
+        for rule_source, rule_target in SuffixRule.iter_rule_pairs(inflection):
+            rules.append(SuffixRule(rule_source, rule_target, inflection.inflection_desc_list))
 
-        new_rule = SuffixRule(rule_source, rule_target, inflection.inflection_desc_list)
-        rules.append(new_rule)
+        return rules
+
+    @staticmethod
+    def iter_rule_pairs(inflection):
+        """Generator over the (input, output) string pairs of all SuffixRules which can be generated out of an inflection: the suffix
+        change itself and the same change with growing stem context. The pairs are slices of the stem + suffix strings, no rule
+        instances are created.
+        
+        Parameters
+        ----------
+        inflection : Inflection
+            Inflection instance containing the split lemma and inflection Words
+        """
+
+        lemma = inflection.lemma
+        target = inflection.inflection
+
+        # generate and insert empty rule
+        # yield "", ""
+
+        yield lemma.suffix, target.suffix
 
         # TODO: problem when source and target stem have different lengths
-        for i in reversed(range(len(list(inflection.lemma.stem)))):
+        # context rules only exist if the inflection stem is not shorter than the lemma stem
+        if len(target.stem) < len(lemma.stem):
+            return
 
-            if len(inflection.lemma.stem) <= i or len(inflection.inflection.stem) <= i:
-                break
+        # both contexts are taken from the positions of the lemma stem
+        source_tail = lemma.stem + lemma.suffix
+        target_tail = target.stem[:len(lemma.stem)] + target.suffix
 
-            rule_source = inflection.lemma.stem[i] + rule_source
-            rule_target = inflection.inflection.stem[i] + rule_target
-            new_rule = SuffixRule(rule_source, rule_target, inflection.inflection_desc_list)
-            rules.append(new_rule)
+        for i in reversed(range(len(lemma.stem))):
+            yield source_tail[i:], target_tail[i:]
 
-        return rules
+    @staticmethod
+    def get_matching_inputs(word):
+        """Returns all rule inputs for which a SuffixRule is applicable to the given word together with the overlap score such a rule
+        would get, i.e. all suffixes of the word which are shorter than the word itself including the empty one.
+        
+        Parameters
+        ----------
+        word : string
+            Word for which the matching rule inputs should be computed
+        
+        Returns
+        -------
+        List<(string, int)>
+            List of (rule input, overlap score) tuples
+        """
+
+        return [(word[k:], len(word) - k) for k in range(1, len(word))] + [("", 0)]
+
+    @staticmethod
+    def get_edit_signatures(word, target):
+        """Returns all (input, output) pairs of SuffixRules which are applicable to the word and change it into the target, i.e. the
+        splits of both strings where the remaining beginnings are equal. The whole word is never a SuffixRule input.
+        
+        Parameters
+        ----------
+        word : string
+            Word the rule should be applied to
+        target : string
+            String the rule should produce
+        
+        Returns
+        -------
+        List<(string, string)>
+            List of (rule input, rule output) tuples
+        """
+
+        # length of the common beginning of both strings
+        common = 0
+        while common < min(len(word), len(target)) and word[common] == target[common]:
+            common += 1
+
+        return [(word[k:], target[k:]) for k in range(1 if len(word) > 0 else 0, common + 1)]
+
+    def iter_shorter_contexts(self):
+        """Generator over the (input, output) pairs of all SuffixRules which describe the same change as this rule but with less
+        unchanged context at the beginning of the rule. E.g. "ab$ > ax$" generates ("b", "x").
+        """
+
+        k = 1
+        while k <= min(len(self.input), len(self.output)) and self.input[k - 1] == self.output[k - 1]:
+            yield self.input[k:], self.output[k:]
+            k += 1
 
     def apply_rule(self, lemma):
         result = lemma + "$"
@@ -295,6 +448,21 @@ class RuleCollection():
         """
         self.rule_dict = {}
 
+        # amount of training instances for each feature string, only known for collections created by create_rule_collections()
+        self.feature_counts = {}
+
+        # rules of each feature string grouped by rule type and input, created on demand by get_highest_*_rules()
+        self.input_index = None
+
+        # all rules grouped by rule type, input and output, created on demand by get_suitable_features()
+        self.signature_index = None
+
+        # if True, feature combinations which did not appear in the training use the rules of the most similar trained combinations
+        self.backoff = False
+
+        # posting lists and bitmasks of the trained feature combinations, created on demand for backoff lookups
+        self.backoff_index = None
+
     def __str__(self):
         res_string = ""
 
@@ -317,6 +485,9 @@ class RuleCollection():
         """
 
         feature_list = new_rule.infection_desc
+        self.input_index = None
+        self.signature_index = None
+        self.backoff_index = None
 
         if str(feature_list) in self.rule_dict:
             if str(new_rule) in self.rule_dict[str(feature_list)]:
@@ -378,6 +549,8 @@ class RuleCollection():
 
         # if feature combination did not appear in rule collection
         if str(inflection_desc) not in self.rule_dict:
+            if self.backoff:
+                return self.get_highest_overlap_rules(input_str, [inflection_desc])[0]
             return None
 
         highest_score = 0
@@ -432,6 +605,8 @@ class RuleCollection():
 
          # if feature combination did not appear in rule collection
         if str(inflection_desc) not in self.rule_dict:
+            if self.backoff:
+                return self.get_highest_count_rules(input_str, [inflection_desc])[0]
             return None
         
         highest_count = 0
@@ -452,16 +627,227 @@ class RuleCollection():
 
         return best_rule
 
+    def get_highest_overlap_rules(self, input_str, inflection_descs):
+        """Returns for a single input string and a list of inflection feature collections (e.g. the paradigm of a lemma) the same rules
+        as get_highest_overlap_rule() would return for each feature collection. The rule inputs matching the input string are computed
+        only once and looked up for each feature collection. Only works for collections of PrefixRules and SuffixRules.
+        
+        Parameters
+        ----------
+        input_str : string
+            Input word string (usually an infinitiv) for which the ChangingRules should be found.
+        inflection_descs : List<FeatureCollection>
+            List of feature collections for which a rule is requested
+        
+        Returns
+        -------
+        List<ChangingRule>
+            The most suitable ChangingRule instance for each feature collection, None if no rule is applicable
+        """
+
+        return self.__get_paradigm_rules(input_str, inflection_descs, use_overlap=True)
+
+    def get_highest_count_rules(self, input_str, inflection_descs):
+        """Returns for a single input string and a list of inflection feature collections (e.g. the paradigm of a lemma) the same rules
+        as get_highest_count_rule() would return for each feature collection. The rule inputs matching the input string are computed
+        only once and looked up for each feature collection. Only works for collections of PrefixRules and SuffixRules.
+        
+        Parameters
+        ----------
+        input_str : string
+            Input string (usually infinitiv) for which the ChangingRules should be found
+        inflection_descs : List<FeatureCollection>
+            List of feature collections for which a rule is requested
+        
+        Returns
+        -------
+        List<ChangingRule>
+            The most suitable ChangingRule instance for each feature collection, None if no rule is applicable
+        """
+
+        return self.__get_paradigm_rules(input_str, inflection_descs, use_overlap=False)
+
+    def __get_paradigm_rules(self, input_str, inflection_descs, use_overlap):
+        input_index = self.__get_input_index()
+
+        # all rule inputs which are applicable to the input string - the same for each feature collection
+        candidates = []
+        for rule_class in input_index["classes"]:
+            for rule_input, overlap_score in rule_class.get_matching_inputs(input_str):
+                candidates.append(((rule_class, rule_input), overlap_score if use_overlap else 0))
+
+        best_rules = []
+
+        for inflection_desc in inflection_descs:
+            feature_index = input_index["features"].get(str(inflection_desc))
+
+            # pool the rules of the most similar trained feature combinations
+            if feature_index is None and self.backoff:
+                feature_index = self.__get_backoff_rules(inflection_desc)
+
+            best_rule = None
+            best_score = None
+
+            if feature_index is not None:
+                for candidate_key, overlap_score in candidates:
+                    for position, single_rule_dict in feature_index.get(candidate_key, ()):
+
+                        # highest overlap first, then the highest count and then the rule which was added first
+                        score = (overlap_score, single_rule_dict["count"], -position)
+
+                        if best_score is None or score > best_score:
+                            best_score = score
+                            best_rule = single_rule_dict["rule"]
+
+            best_rules.append(best_rule)
+
+        return best_rules
+
+    def __get_input_index(self):
+        if self.input_index is not None:
+            return self.input_index
+
+        rule_classes = []
+        feature_indices = {}
+
+        for feature_key, rule_dict in self.rule_dict.items():
+            feature_index = {}
+
+            for position, single_rule_dict in enumerate(rule_dict.values()):
+                rule_class = type(single_rule_dict["rule"])
+
+                if rule_class not in rule_classes:
+                    rule_classes.append(rule_class)
+
+                feature_index.setdefault((rule_class, single_rule_dict["rule"].input), []).append((position, single_rule_dict))
+
+            feature_indices[feature_key] = feature_index
+
+        self.input_index = {"classes": rule_classes, "features": feature_indices}
+        return self.input_index
+
+    def get_backoff_features(self, inflection_desc):
+        """Returns the trained feature combinations which are the most similar to a given feature collection: the combinations sharing
+        the most features with it and, among those, the ones with the least additional features. The posting lists of the requested
+        features are visited from the rarest to the most common one. A combination sharing s of the k requested features appears in one
+        of the first k - s + 1 lists, so the search stops after the j-th list if a combination shares k - j + 1 features. Common
+        features like V are only visited if no combination shares more features, the lookup does not scan all combinations.
+        
+        Parameters
+        ----------
+        inflection_desc : FeatureCollection
+            A FeatureCollection instance, usually one which did not appear in the training
+        
+        Returns
+        -------
+        List<string>
+            Keys of the most similar feature combinations of this collection in order of their first appearance, empty if no trained
+            combination shares a feature
+        """
+
+        backoff_index = self.__get_backoff_index()
+
+        # features which never appeared in the training can not be shared with any combination
+        query_features = sorted({str(feature) for feature in inflection_desc.features if str(feature) in backoff_index["bits"]},
+                                key=lambda feature: (len(backoff_index["postings"][feature]), feature))
+
+        query_mask = 0
+        for feature in query_features:
+            query_mask |= backoff_index["bits"][feature]
+
+        visited = set()
+        shared_features = {}
+
+        for visited_count, feature in enumerate(query_features, 1):
+            for feature_id in backoff_index["postings"][feature]:
+                if feature_id in visited:
+                    continue
+
+                visited.add(feature_id)
+                shared = bin(backoff_index["masks"][feature_id] & query_mask).count("1")
+                shared_features.setdefault(shared, []).append(feature_id)
+
+            # all combinations sharing more features were in the lists visited before, and none was found
+            min_shared = len(query_features) - visited_count + 1
+
+            if min_shared in shared_features:
+                best_features = sorted(shared_features[min_shared])
+                extras = [bin(backoff_index["masks"][feature_id] & ~query_mask).count("1") for feature_id in best_features]
+
+                return [backoff_index["keys"][feature_id] for feature_id, extra in zip(best_features, extras) if extra == min(extras)]
+
+        return []
+
+    def __get_backoff_rules(self, inflection_desc):
+        backoff_index = self.__get_backoff_index()
+        query_key = str(inflection_desc)
+
+        # unseen combinations usually appear many times (e.g. once per lemma), so the pooled rules are kept
+        if query_key in backoff_index["pooled"]:
+            return backoff_index["pooled"][query_key]
+
+        pooled_rules = {}
+
+        for feature_key in self.get_backoff_features(inflection_desc):
+            for rule_key, single_rule_dict in self.rule_dict[feature_key].items():
+
+                # the same rule of multiple combinations is counted together, its position is the one of its first appearance
+                if rule_key in pooled_rules:
+                    pooled_rules[rule_key]["count"] += single_rule_dict["count"]
+                else:
+                    pooled_rules[rule_key] = dict(single_rule_dict)
+
+        pooled_index = {}
+        for position, single_rule_dict in enumerate(pooled_rules.values()):
+            pooled_index.setdefault((type(single_rule_dict["rule"]), single_rule_dict["rule"].input), []).append(
+                (position, single_rule_dict))
+
+        backoff_index["pooled"][query_key] = pooled_index
+        return pooled_index
+
+    def __get_backoff_index(self):
+        if self.backoff_index is not None:
+            return self.backoff_index
+
+        feature_bits = {}
+        postings = {}
+        feature_keys = []
+        feature_masks = []
+
+        for feature_key, rule_dict in self.rule_dict.items():
+            if len(rule_dict) == 0:
+                continue
+
+            feature_id = len(feature_keys)
+            feature_mask = 0
+
+            # all rules of a combination share the same FeatureCollection
+            for feature in next(iter(rule_dict.values()))["rule"].infection_desc.features:
+                if str(feature) not in feature_bits:
+                    feature_bits[str(feature)] = 1 << len(feature_bits)
+                    postings[str(feature)] = []
+
+                feature_mask |= feature_bits[str(feature)]
+                postings[str(feature)].append(feature_id)
+
+            feature_keys.append(feature_key)
+            feature_masks.append(feature_mask)
+
+        self.backoff_index = {"bits": feature_bits, "postings": postings, "keys": feature_keys, "masks": feature_masks, "pooled": {}}
+        return self.backoff_index
+
     @staticmethod
-    def create_rule_collections(inflection_list):
+    def create_rule_collections(inflection_list, min_count=1):
         """Creates two instances of RuleCollections out of a list of Inflection instances - one for prefix rules and one for suffix rules.
-        For each Inflection first, the SuffixRules get extracted and packed into a RuleCollection instance; afterwards the same happens
-        for PrefixRules.
+        First the (input, output) pairs of all pre- and suffix rules get counted, afterwards rule instances are created for all pairs
+        which appeared at least min_count times.
         
         Parameters
         ----------
         inflection_list : List<Inflection>
             A list of Inflection instances for which the pre- and suffix rules should be extracted.
+        min_count : int, optional
+            Minimal amount of occurrences of a rule to be stored in the collections (the default is 1, which keeps all rules)
         
         Returns
         -------
@@ -469,25 +855,171 @@ class RuleCollection():
             First an instance of a RuleCollection containing all PrefixRules and a RuleCollection withe the extractes SuffixRules.
         """
 
+        prefix_rule_counts, suffix_rule_counts, feature_descs, feature_counts = RuleCollection.count_rules(inflection_list)
 
         prefix_rule_collection = RuleCollection()
+        prefix_rule_collection.add_counted_rules(PrefixRule, prefix_rule_counts, feature_descs, min_count=min_count)
+        prefix_rule_collection.feature_counts = dict(feature_counts)
+
         suffix_rule_collection = RuleCollection()
+        suffix_rule_collection.add_counted_rules(SuffixRule, suffix_rule_counts, feature_descs, min_count=min_count)
+        suffix_rule_collection.feature_counts = dict(feature_counts)
+
+        return prefix_rule_collection, suffix_rule_collection
+
+    @staticmethod
+    def count_rules(inflection_list):
+        """Counts the prefix and suffix rules of a list of Inflection instances without creating rule instances. The counts are
+        stored in dictionaries with (feature string, rule input, rule output) keys in order of their first appearance.
+        
+        Parameters
+        ----------
+        inflection_list : List<Inflection>
+            A list of Inflection instances for which the pre- and suffix rules should be counted.
+        
+        Returns
+        -------
+        Dict, Dict, Dict, Dict
+            The prefix rule counts, the suffix rule counts, a dictionary mapping the feature strings to their FeatureCollection and a
+            dictionary mapping the feature strings to the amount of inflections with these features
+        """
+
+        prefix_rule_counts = {}
+        suffix_rule_counts = {}
+        feature_descs = {}
+        feature_counts = {}
 
         for inflection in inflection_list:
+            feature_key = sys.intern(str(inflection.inflection_desc_list))
 
-            # First the suffix changing rules          
-            suffix_rules = SuffixRule.generate_rules(inflection)
+            if feature_key not in feature_descs:
+                feature_descs[feature_key] = inflection.inflection_desc_list
 
-            for rule in suffix_rules:
-                suffix_rule_collection.add_rule(rule)
+            feature_counts[feature_key] = feature_counts.get(feature_key, 0) + 1
+
+            # First the suffix changing rules
+            for rule_source, rule_target in SuffixRule.iter_rule_pairs(inflection):
+                rule_key = (feature_key, rule_source, rule_target)
+                suffix_rule_counts[rule_key] = suffix_rule_counts.get(rule_key, 0) + 1
 
             # Then the prefix changing rules
-            prefix_rules = PrefixRule.generate_rules(inflection)
+            for rule_source, rule_target in PrefixRule.iter_rule_pairs(inflection):
+                rule_key = (feature_key, rule_source, rule_target)
+                prefix_rule_counts[rule_key] = prefix_rule_counts.get(rule_key, 0) + 1
 
-            for rule in prefix_rules:
-                prefix_rule_collection.add_rule(rule)
+        return prefix_rule_counts, suffix_rule_counts, feature_descs, feature_counts
 
-        return prefix_rule_collection, suffix_rule_collection
+    def add_counted_rules(self, rule_class, rule_counts, feature_descs, min_count=1):
+        """Creates rule instances out of counted (feature string, rule input, rule output) keys (see count_rules()) and adds them
+        together with their count to this collection.
+        
+        Parameters
+        ----------
+        rule_class : type
+            ChangingRule subclass which should be instantiated, e.g. PrefixRule or SuffixRule
+        rule_counts : Dict
+            Dictionary mapping (feature string, rule input, rule output) to the amount of occurrences
+        feature_descs : Dict
+            Dictionary mapping the feature strings to their FeatureCollection instances
+        min_count : int, optional
+            Minimal amount of occurrences of a rule to be added (the default is 1, which adds all rules)
+        
+        """
+
+        self.input_index = None
+        self.signature_index = None
+        self.backoff_index = None
+
+        for (feature_key, rule_source, rule_target), count in rule_counts.items():
+            if count < min_count:
+                continue
+
+            new_rule = rule_class(rule_source, rule_target, feature_descs[feature_key])
+
+            if feature_key not in self.rule_dict:
+                self.rule_dict[feature_key] = {}
+
+            self.rule_dict[feature_key][str(new_rule)] = {"rule": new_rule, "count": count}
+
+    def get_compacted_collection(self, min_count=1, min_coverage=0.0, remove_dominated=False):
+        """Creates a smaller copy of this collection which only keeps the rules that are likely to be chosen during inference. The rule
+        instances are shared with this collection.
+        
+        Parameters
+        ----------
+        min_count : int, optional
+            Rules which appeared less than min_count times get removed (the default is 1, which keeps all rules)
+        min_coverage : float, optional
+            Rules which cover a smaller fraction of the training instances of their feature combination get removed (the default is
+            0.0, which keeps all rules)
+        remove_dominated : bool, optional
+            If True, a rule gets removed if a rule with more context describes the same change and appeared at least as often, i.e. the
+            rule never occurred without this context (the default is False)
+        
+        Returns
+        -------
+        RuleCollection
+            The compacted RuleCollection instance
+        """
+
+        compacted_collection = RuleCollection()
+        compacted_collection.feature_counts = dict(self.feature_counts)
+        compacted_collection.backoff = self.backoff
+
+        for feature_key, rule_dict in self.rule_dict.items():
+
+            # amount of training instances of this feature combination, for collections without counts use the sum of all rules
+            instance_count = self.feature_counts.get(feature_key)
+            if instance_count is None:
+                instance_count = sum(single_rule_dict["count"] for single_rule_dict in rule_dict.values())
+
+            dominated = set()
+            if remove_dominated:
+                dominated = RuleCollection.__get_dominated_rules(rule_dict)
+
+            compacted_rule_dict = {}
+
+            for rule_key, single_rule_dict in rule_dict.items():
+
+                if single_rule_dict["count"] < min_count:
+                    continue
+
+                if single_rule_dict["count"] < min_coverage * instance_count:
+                    continue
+
+                if rule_key in dominated:
+                    continue
+
+                compacted_rule_dict[rule_key] = dict(single_rule_dict)
+
+            if len(compacted_rule_dict) > 0:
+                compacted_collection.rule_dict[feature_key] = compacted_rule_dict
+
+        return compacted_collection
+
+    @staticmethod
+    def __get_dominated_rules(rule_dict):
+        # the highest count of a rule with more context for each (input, output) pair
+        context_counts = {}
+
+        for single_rule_dict in rule_dict.values():
+            for shorter_pair in single_rule_dict["rule"].iter_shorter_contexts():
+                context_counts[shorter_pair] = max(context_counts.get(shorter_pair, 0), single_rule_dict["count"])
+
+        dominated = set()
+
+        for rule_key, single_rule_dict in rule_dict.items():
+            rule = single_rule_dict["rule"]
+
+            if context_counts.get((rule.input, rule.output), 0) >= single_rule_dict["count"]:
+                dominated.add(rule_key)
+
+        return dominated
+
+    def get_rule_amount(self):
+        """Returns the total amount of rules stored in this collection
+        """
+        return sum(len(rule_dict) for rule_dict in self.rule_dict.values())
 
     def get_suitable_features(self, lemma_str, inflection_str):
         """This method searches the most suitable rule which applied to the lemma_str provides the given inflection_str as output.
@@ -507,23 +1039,29 @@ class RuleCollection():
             The FeatureCollection instance of the most suitable rule. None if no rule could reproduce the requtested output
         """
 
+        signature_index = self.__get_signature_index()
+
         candidate_rules = []
 
-        # iterate over all rules
-        for feature_list, rule_data in self.rule_dict.items():
-            for rule_rep, single_rule in rule_data.items():
-                current_rule = single_rule["rule"]
+        # look up the Prefix and SuffixRules which produce the inflection out of the lemma
+        for rule_class in signature_index["classes"]:
+            for rule_input, rule_output in rule_class.get_edit_signatures(lemma_str, inflection_str):
+                candidate_rules.extend(signature_index["signatures"].get((rule_class, rule_input, rule_output), ()))
+
+        # all other rules have to be applied
+        for position, single_rule in signature_index["other"]:
+            current_rule = single_rule["rule"]
 
-                # check wheather rule can be applied
-                if current_rule.is_applicable(lemma_str):
+            # check wheather rule can be applied
+            if current_rule.is_applicable(lemma_str):
 
-                    # compute the inflection
-                    inflected_lemma = current_rule.apply_rule(lemma_str)
+                # compute the inflection and compare it with the expected result
+                if current_rule.apply_rule(lemma_str) == inflection_str:
+                    candidate_rules.append((position, single_rule))
+
+        # keep the order of the rules in this collection
+        candidate_rules = [single_rule for _, single_rule in sorted(candidate_rules, key=lambda candidate: candidate[0])]
 
-                    # compare inflection with expected result
-                    if inflected_lemma == inflection_str:
-                        candidate_rules.append(single_rule)
-                        
         if len(candidate_rules) == 0:
             return
 
@@ -554,6 +1092,32 @@ class RuleCollection():
         # return the feature list of the best rule
         return best_rule["rule"].infection_desc
 
+    def __get_signature_index(self):
+        if self.signature_index is not None:
+            return self.signature_index
+
+        rule_classes = []
+        signatures = {}
+        other_rules = []
+
+        all_rule_dicts = [single_rule_dict for rule_dict in self.rule_dict.values() for single_rule_dict in rule_dict.values()]
+
+        for position, single_rule_dict in enumerate(all_rule_dicts):
+            rule = single_rule_dict["rule"]
+
+            if isinstance(rule, (PrefixRule, SuffixRule)):
+                rule_class = type(rule)
+
+                if rule_class not in rule_classes:
+                    rule_classes.append(rule_class)
+
+                signatures.setdefault((rule_class, rule.input, rule.output), []).append((position, single_rule_dict))
+            else:
+                other_rules.append((position, single_rule_dict))
+
+        self.signature_index = {"classes": rule_classes, "signatures": signatures, "other": other_rules}
+        return self.signature_index
+
     def try_and_apply_all(self, input_str):
         """Applies all ChaningRules in the collection to a given input string if possible. This function is useful for RuleCollection with
         conditional rules.
@@ -1,10 +1,88 @@
 import numpy as np
-from implementation.Word import Word, LevinsteinPartition, KhalingXFixPartition
+from implementation.Word import Word, LevinsteinPartition, KhalingXFixPartition, CachedSplitter
+from implementation.SplitCache import SplitCache, PersistentCachedSplitter
 from aenum import Enum
  
 class SplitMethod(Enum):
     LEVINSTEIN = 1
     KHALING_XFIX = 2
+    LEVINSTEIN_BIT_PARALLEL = 3
+
+
+class SplitterRegistry():
+    """The SplitterRegistry maps each SplitMethod to a single shared WordSplitter instance. Splitters for new methods can be added with
+    register_splitter().
+    """
+
+    splitters = {}
+    cached_splitters = {}
+    persistent_splitters = {}
+
+    @staticmethod
+    def register_splitter(method, splitter):
+        """Registers the WordSplitter instance which should be used for a split method. An existing splitter for the method (and its
+        cache) gets replaced.
+        
+        Parameters
+        ----------
+        method : SplitMethod
+            The split method the splitter implements
+        splitter : WordSplitter
+            The splitter instance shared by all inflections created with this method
+        
+        """
+
+        SplitterRegistry.splitters[method] = splitter
+        SplitterRegistry.cached_splitters.pop(method, None)
+
+        for key in [key for key in SplitterRegistry.persistent_splitters if key[0] == method]:
+            del SplitterRegistry.persistent_splitters[key]
+
+    @staticmethod
+    def get_splitter(method, use_cache=False, cache_path=None):
+        """Returns the registered WordSplitter instance for a split method.
+        
+        Parameters
+        ----------
+        method : SplitMethod
+            The split method for which the splitter is requested
+        use_cache : bool, optional
+            If True, a CachedSplitter wrapping the registered splitter gets returned, which memoizes the results of all (lemma,
+            inflection) pairs (the default is False)
+        cache_path : string, optional
+            Path to a SplitCache file. If given, a PersistentCachedSplitter gets returned which additionally keeps the results in
+            this file (the default is None)
+        
+        Returns
+        -------
+        WordSplitter
+            The shared splitter instance
+        """
+
+        if method not in SplitterRegistry.splitters:
+            raise ValueError("No word splitter registered for split method {}".format(method))
+
+        if cache_path is not None:
+            key = (method, cache_path)
+
+            if key not in SplitterRegistry.persistent_splitters:
+                SplitterRegistry.persistent_splitters[key] = PersistentCachedSplitter(SplitterRegistry.splitters[method], method.name,
+                                                                                      SplitCache(cache_path))
+
+            return SplitterRegistry.persistent_splitters[key]
+
+        if not use_cache:
+            return SplitterRegistry.splitters[method]
+
+        if method not in SplitterRegistry.cached_splitters:
+            SplitterRegistry.cached_splitters[method] = CachedSplitter(SplitterRegistry.splitters[method])
+
+        return SplitterRegistry.cached_splitters[method]
+
+
+SplitterRegistry.register_splitter(SplitMethod.LEVINSTEIN, LevinsteinPartition())
+SplitterRegistry.register_splitter(SplitMethod.KHALING_XFIX, KhalingXFixPartition())
+SplitterRegistry.register_splitter(SplitMethod.LEVINSTEIN_BIT_PARALLEL, LevinsteinPartition(bit_parallel=True))
 
 
 class Inflection():
@@ -31,9 +109,9 @@ class Inflection():
         self.inflection_desc_list = inflection_desc_list
 
     @staticmethod
-    def create_inflection(lemma, inflection, inflection_desc_list, method=SplitMethod.KHALING_XFIX):
+    def create_inflection(lemma, inflection, inflection_desc_list, method=SplitMethod.KHALING_XFIX, use_cache=False, cache_path=None):
         """Creates an Inflectin object by two strings - one representing the lemma and the other one representing
-        the inflection. The Inlfection gets created using levinstein distance.
+        the inflection. The words get split by the splitter registered for the given method.
         
         Parameters
         ----------
@@ -43,6 +121,12 @@ class Inflection():
             String representing the inflected lemma
         inflection_desc_list : List<InflectionFeature>
             List of inlfection features describing the inflection
+        method : SplitMethod, optional
+            Method used to split the words into prefix, stem and suffix (the default is SplitMethod.KHALING_XFIX)
+        use_cache : bool, optional
+            If True, the split of each (lemma, inflection) pair is computed only once (the default is False)
+        cache_path : string, optional
+            Path to a SplitCache file to read and store the split from / in (the default is None)
         
         Returns
         -------
@@ -50,13 +134,7 @@ class Inflection():
             Inlfection object describing the inflection of the inputs
         """
 
-        splitter = None
-
-        if method == SplitMethod.LEVINSTEIN:
-            splitter = LevinsteinPartition()   
-
-        if method == SplitMethod.KHALING_XFIX:
-            splitter = KhalingXFixPartition()
+        splitter = SplitterRegistry.get_splitter(method, use_cache=use_cache, cache_path=cache_path)
             
         lemma_word, inflection_word = splitter.split_word(lemma, inflection)
 
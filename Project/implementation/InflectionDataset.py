@@ -0,0 +1,323 @@
+import numpy as np
+from implementation.Word import Word
+from implementation.Inflection import Inflection, SplitMethod, SplitterRegistry
+from implementation.UniMorph import FeatureCollection
+
+
+class InflectionDataset():
+    """An InflectionDataset stores a list of inflections column by column instead of one Inflection object per row. All lemmas and
+    all forms are concatenated into one string buffer each and addressed by offset arrays (like Arrow string columns). The prefix /
+    stem / suffix partition of every word is kept as two split offsets and the FeatureCollections are interned, so each row only
+    stores an integer id. Slicing a dataset does not copy any data - the slice shares the buffers and uses views of the offset arrays.
+    """
+
+    def __init__(self, lemma_buffer, lemma_offsets, lemma_splits, form_buffer, form_offsets, form_splits, feature_ids, feature_table):
+        """Creates an InflectionDataset out of already built columns. To create a dataset use from_inflections() or from_file()
+
+        Parameters
+        ----------
+        lemma_buffer : string
+            All lemma strings concatenated
+        lemma_offsets : np.array<int64>
+            n+1 offsets into the lemma buffer, row i is lemma_buffer[lemma_offsets[i]:lemma_offsets[i+1]]
+        lemma_splits : np.array<int32>
+            n x 2 array containing the end of the prefix and the end of the stem relative to the start of each lemma
+        form_buffer : string
+            All inflected form strings concatenated
+        form_offsets : np.array<int64>
+            n+1 offsets into the form buffer
+        form_splits : np.array<int32>
+            n x 2 array containing the end of the prefix and the end of the stem relative to the start of each form
+        feature_ids : np.array<int32>
+            Index into the feature table for each row
+        feature_table : List<FeatureCollection>
+            Interned FeatureCollection instances, shared between a dataset and all of its slices
+        """
+
+        assert len(lemma_offsets) == len(form_offsets) == len(feature_ids) + 1
+
+        self.lemma_buffer = lemma_buffer
+        self.lemma_offsets = lemma_offsets
+        self.lemma_splits = lemma_splits
+
+        self.form_buffer = form_buffer
+        self.form_offsets = form_offsets
+        self.form_splits = form_splits
+
+        self.feature_ids = feature_ids
+        self.feature_table = feature_table
+
+    @staticmethod
+    def from_inflections(inflections):
+        """Creates an InflectionDataset out of a list of Inflection instances.
+
+        Parameters
+        ----------
+        inflections : List<Inflection>
+            List of inflection instances which should be stored in the dataset
+
+        Returns
+        -------
+        InflectionDataset
+            The columnar representation of the given inflections
+        """
+
+        builder = InflectionDatasetBuilder()
+
+        for inflection in inflections:
+            builder.append(inflection.lemma, inflection.inflection, inflection.inflection_desc_list)
+
+        return builder.build()
+
+    @staticmethod
+    def from_file(path, split_method=SplitMethod.LEVINSTEIN, use_cache=False, cache_path=None):
+        """Reads a text file containing inflection samples of shape <infinitiv> <inflection> <inflection features> directly into an
+        InflectionDataset. The Inflection instances which are created for the splitting are not kept.
+
+        Parameters
+        ----------
+        path : string
+            path to the text file to read
+        split_method : SplitMethod, optional
+            Method used to split the words into prefix, stem and suffix (the default is SplitMethod.LEVINSTEIN)
+        use_cache : bool, optional
+            If True, the split of each (lemma, inflection) pair is computed only once (the default is False)
+        cache_path : string, optional
+            Path to a SplitCache file. Splits found in the file are not computed again and new splits get added (the default is None)
+
+        Returns
+        -------
+        InflectionDataset
+            A dataset containing all inflection instances of the text file
+        """
+
+        with open(path, encoding="utf8") as input:
+            instances = [instance.split() for instance in input]
+
+        splitter = None
+
+        # load all cached splits of the file at once
+        if cache_path is not None:
+            splitter = SplitterRegistry.get_splitter(split_method, cache_path=cache_path)
+            splitter.prefetch([(lemma, inflection) for lemma, inflection, _ in instances])
+
+        builder = InflectionDatasetBuilder()
+
+        for lemma, inflection, feature_list_str in instances:
+
+            feature_col = builder.intern_features(feature_list_str)
+
+            new_inflection = Inflection.create_inflection(lemma, inflection, feature_col, method=split_method, use_cache=use_cache,
+                                                          cache_path=cache_path)
+            builder.append(new_inflection.lemma, new_inflection.inflection, feature_col)
+
+        # store the new splits
+        if splitter is not None:
+            splitter.flush()
+
+        return builder.build()
+
+    def __len__(self):
+        return len(self.feature_ids)
+
+    def __getitem__(self, index):
+        """Returns the Inflection instance of a single row, or for a slice a new InflectionDataset which shares all buffers with
+        this one (zero-copy).
+        """
+
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+
+            if step != 1:
+                raise ValueError("InflectionDataset only supports contiguous slices")
+
+            stop = max(start, stop)
+
+            return InflectionDataset(self.lemma_buffer, self.lemma_offsets[start:stop + 1], self.lemma_splits[start:stop],
+                                     self.form_buffer, self.form_offsets[start:stop + 1], self.form_splits[start:stop],
+                                     self.feature_ids[start:stop], self.feature_table)
+
+        return self.get_inflection(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.get_inflection(i)
+
+    def get_lemma(self, index):
+        return self.lemma_buffer[self.lemma_offsets[index]:self.lemma_offsets[index + 1]]
+
+    def get_form(self, index):
+        return self.form_buffer[self.form_offsets[index]:self.form_offsets[index + 1]]
+
+    def get_features(self, index):
+        return self.feature_table[self.feature_ids[index]]
+
+    def get_lemma_word(self, index):
+        return InflectionDataset.__split(self.get_lemma(index), self.lemma_splits[index])
+
+    def get_form_word(self, index):
+        return InflectionDataset.__split(self.get_form(index), self.form_splits[index])
+
+    def get_inflection(self, index):
+        """Creates the Inflection instance of a single row. The instance is created on demand and not stored in the dataset.
+
+        Parameters
+        ----------
+        index : int
+            row of the dataset
+
+        Returns
+        -------
+        Inflection
+            Inflection instance with the stored prefix / stem / suffix partition
+        """
+
+        if index < 0:
+            index += len(self)
+
+        if index < 0 or index >= len(self):
+            raise IndexError("InflectionDataset index out of range")
+
+        return Inflection(self.get_lemma_word(index), self.get_form_word(index), self.get_features(index))
+
+    def get_lemmas(self):
+        return [self.get_lemma(i) for i in range(len(self))]
+
+    def get_forms(self):
+        return [self.get_form(i) for i in range(len(self))]
+
+    def get_feature_descs(self):
+        return [self.feature_table[feature_id] for feature_id in self.feature_ids]
+
+    def to_lists(self):
+        """Returns three lists containing all lemmas, all feature lists and the inflected forms (same shape as prepare_test_data()
+        of the task scripts).
+
+        Returns
+        -------
+        List<string>, List<FeatureCollection>, List<string>
+            3 lists containing all relevant information from the data
+        """
+
+        return self.get_lemmas(), self.get_feature_descs(), self.get_forms()
+
+    def batches(self, batch_size):
+        """Generator over consecutive zero-copy slices of at most batch_size rows.
+
+        Parameters
+        ----------
+        batch_size : int
+            maximal amount of rows per batch
+        """
+
+        for start in range(0, len(self), batch_size):
+            yield self[start:start + batch_size]
+
+    def shard(self, shard_index, shard_count):
+        """Returns the shard_index-th of shard_count contiguous, (almost) equally sized zero-copy slices of this dataset.
+
+        Parameters
+        ----------
+        shard_index : int
+            index of the requested shard, 0 <= shard_index < shard_count
+        shard_count : int
+            total amount of shards
+
+        Returns
+        -------
+        InflectionDataset
+            The requested shard
+        """
+
+        if shard_index < 0 or shard_index >= shard_count:
+            raise IndexError("shard index {} is not in [0, {})".format(shard_index, shard_count))
+
+        division = len(self) / float(shard_count)
+        return self[int(round(division * shard_index)):int(round(division * (shard_index + 1)))]
+
+    def nbytes(self):
+        """Returns the amount of bytes held by the columns of this dataset (string buffers, offset arrays and ids). The shared feature
+        table is not included.
+        """
+
+        return (len(self.lemma_buffer.encode("utf8")) + len(self.form_buffer.encode("utf8")) + self.lemma_offsets.nbytes
+                + self.form_offsets.nbytes + self.lemma_splits.nbytes + self.form_splits.nbytes + self.feature_ids.nbytes)
+
+    @staticmethod
+    def __split(word_str, splits):
+        prefix_end, stem_end = splits
+        return Word(word_str[:prefix_end], word_str[prefix_end:stem_end], word_str[stem_end:])
+
+
+class InflectionDatasetBuilder():
+    """Collects rows for an InflectionDataset and creates the final columns with build().
+    """
+
+    def __init__(self):
+        self.lemma_parts = []
+        self.lemma_offsets = [0]
+        self.lemma_splits = []
+
+        self.form_parts = []
+        self.form_offsets = [0]
+        self.form_splits = []
+
+        self.feature_ids = []
+        self.feature_table = []
+        self.feature_index = {}
+
+    def intern_features(self, feature_list_str):
+        """Returns the interned FeatureCollection for a UniMorph feature string, creating it on first use.
+        """
+
+        feature_id = self.feature_index.get(feature_list_str)
+
+        if feature_id is None:
+            feature_col = FeatureCollection.create_feature_collection(feature_list_str)
+
+            # equal collections are identified by their string, the same key the RuleCollections use
+            feature_id = self.feature_index.get(str(feature_col))
+
+            if feature_id is None:
+                feature_id = self.__add_features(feature_col)
+
+            self.feature_index[feature_list_str] = feature_id
+
+        return self.feature_table[feature_id]
+
+    def append(self, lemma_word, form_word, feature_col):
+        """Adds a single row given by the split lemma Word, the split form Word and the FeatureCollection.
+        """
+
+        self.__append_word(lemma_word, self.lemma_parts, self.lemma_offsets, self.lemma_splits)
+        self.__append_word(form_word, self.form_parts, self.form_offsets, self.form_splits)
+
+        feature_id = self.feature_index.get(str(feature_col))
+
+        if feature_id is None:
+            feature_id = self.__add_features(feature_col)
+
+        self.feature_ids.append(feature_id)
+
+    def build(self):
+        return InflectionDataset("".join(self.lemma_parts), np.array(self.lemma_offsets, dtype=np.int64),
+                                 np.array(self.lemma_splits, dtype=np.int32).reshape(-1, 2),
+                                 "".join(self.form_parts), np.array(self.form_offsets, dtype=np.int64),
+                                 np.array(self.form_splits, dtype=np.int32).reshape(-1, 2),
+                                 np.array(self.feature_ids, dtype=np.int32), self.feature_table)
+
+    def __add_features(self, feature_col):
+        feature_id = len(self.feature_table)
+
+        self.feature_table.append(feature_col)
+        self.feature_index[str(feature_col)] = feature_id
+
+        return feature_id
+
+    @staticmethod
+    def __append_word(word, parts, offsets, splits):
+        word_str = word.to_string()
+
+        parts.append(word_str)
+        offsets.append(offsets[-1] + len(word_str))
+        splits.append((len(word.prefix), len(word.prefix) + len(word.stem)))
@@ -0,0 +1,231 @@
+import sys
+import tracemalloc
+
+# model components of the object walk, in the order they are visited - objects shared by multiple components count for the first one
+COMPONENTS = ["feature collections", "rule objects", "rule strings", "rule dict entries", "dictionary keys", "feature counts",
+              "lookup indices"]
+
+
+def format_bytes(size):
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return "{:.1f} {}".format(size, unit)
+        size /= 1024.0
+
+    return "{:.1f} GiB".format(size)
+
+
+class MemoryReport():
+    """A MemoryReport measures how much memory the training of a prefix and suffix RuleCollection pair takes. tracemalloc snapshots
+    taken between the steps of the training show the memory retained by each step and where it got allocated. A walk over all
+    objects of the trained collections breaks their size down by component and finds duplicated strings.
+    """
+
+    def __init__(self, top_entries=10):
+        """Creates a MemoryReport, start() begins the tracing
+
+        Parameters
+        ----------
+        top_entries : int, optional
+            amount of allocation sites which are reported for each step (the default is 10)
+
+        """
+
+        self.top_entries = top_entries
+        self.snapshots = []
+        self.peak = 0
+
+    def start(self):
+        """Starts tracing the memory allocations
+        """
+
+        tracemalloc.start()
+        self.snapshots = [("start", tracemalloc.take_snapshot())]
+
+    def mark(self, step_name):
+        """Takes a snapshot at the end of a step, its allocations are the difference to the previous snapshot
+        """
+
+        self.snapshots.append((step_name, tracemalloc.take_snapshot()))
+
+    def stop(self):
+        """Stops tracing the memory allocations
+        """
+
+        self.peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    def get_step_sizes(self):
+        """Returns the retained memory of each step
+
+        Returns
+        -------
+        List<(string, int, List<StatisticDiff>)>
+            name, retained bytes and the largest allocation sites of each step
+        """
+
+        steps = []
+
+        for (_, previous), (step_name, snapshot) in zip(self.snapshots, self.snapshots[1:]):
+            differences = snapshot.compare_to(previous, "lineno")
+            steps.append((step_name, sum(difference.size_diff for difference in differences), differences[:self.top_entries]))
+
+        return steps
+
+    @staticmethod
+    def get_component_sizes(rule_collections):
+        """Walks over all objects referenced by the rule collections and sums up their sizes by component. Each object is counted
+        once, even if it is referenced multiple times.
+
+        Parameters
+        ----------
+        rule_collections : List<RuleCollection>
+            the collections of the model
+
+        Returns
+        -------
+        Dict, List<(string, int)>
+            Dictionary mapping each component to [amount of objects, bytes] and all visited (string, size) pairs
+        """
+
+        seen = set()
+        strings = []
+        components = {component: [0, 0] for component in COMPONENTS}
+
+        def add(component, obj):
+            # classes and functions are part of the code, not the model
+            if isinstance(obj, type) or callable(obj) or id(obj) in seen:
+                return False
+
+            seen.add(id(obj))
+            size = sys.getsizeof(obj)
+
+            components[component][0] += 1
+            components[component][1] += size
+
+            if isinstance(obj, str):
+                strings.append((obj, size))
+
+            return True
+
+        def add_deep(component, obj):
+            if not add(component, obj):
+                return
+
+            if isinstance(obj, dict):
+                for key, value in obj.items():
+                    add_deep(component, key)
+                    add_deep(component, value)
+            elif isinstance(obj, (list, tuple, set, frozenset)):
+                for value in obj:
+                    add_deep(component, value)
+            elif hasattr(obj, "__dict__"):
+                add_deep(component, obj.__dict__)
+
+        all_rule_dicts = [(feature_key, rule_dict) for rule_col in rule_collections for feature_key, rule_dict in rule_col.rule_dict.items()]
+
+        for _, rule_dict in all_rule_dicts:
+            for single_rule_dict in rule_dict.values():
+                add_deep("feature collections", single_rule_dict["rule"].infection_desc)
+
+        for _, rule_dict in all_rule_dicts:
+            for single_rule_dict in rule_dict.values():
+                rule = single_rule_dict["rule"]
+
+                add("rule objects", rule)
+                add("rule objects", rule.__dict__)
+
+                for value in rule.__dict__.values():
+                    add_deep("rule strings" if isinstance(value, str) else "rule objects", value)
+
+        for rule_col in rule_collections:
+            add("rule dict entries", rule_col.rule_dict)
+
+        for feature_key, rule_dict in all_rule_dicts:
+            add("rule dict entries", rule_dict)
+            add("dictionary keys", feature_key)
+
+            for rule_key, single_rule_dict in rule_dict.items():
+                add("dictionary keys", rule_key)
+                add_deep("rule dict entries", single_rule_dict)
+
+        for rule_col in rule_collections:
+            add_deep("feature counts", rule_col.feature_counts)
+
+            for index in (rule_col.input_index, rule_col.signature_index, rule_col.backoff_index):
+                if index is not None:
+                    add_deep("lookup indices", index)
+
+        return components, strings
+
+    def print_report(self, prefix_rule_col, suffix_rule_col, training_pairs, output=None):
+        """Prints the memory of each traced step, the size of each model component and the bytes per rule and per training pair
+
+        Parameters
+        ----------
+        prefix_rule_col : RuleCollection
+            RuleCollection instance containing the prefix rules
+        suffix_rule_col : RuleCollection
+            RuleCollection instance containing the suffix rules
+        training_pairs : int
+            amount of (lemma, inflection) pairs of the training data
+        output : file, optional
+            file to print to (the default is None, which prints to stderr so the --list output stays unchanged)
+
+        """
+
+        output = output if output is not None else sys.stderr
+
+        def write(line=""):
+            output.write(line + "\n")
+
+        write("memory report")
+        write("-------------")
+
+        steps = self.get_step_sizes()
+        training_size = None
+
+        for step_name, step_size, top_differences in steps:
+            write("{}: {} retained".format(step_name, format_bytes(step_size)))
+
+            for difference in top_differences:
+                frame = difference.traceback[0]
+                write("\t{:>12}  {:>8} blocks  {}:{}".format(format_bytes(difference.size_diff), difference.count_diff, frame.filename,
+                                                             frame.lineno))
+
+            if step_name == "training":
+                training_size = step_size
+
+        write("peak traced memory: {}".format(format_bytes(self.peak)))
+        write()
+
+        components, strings = MemoryReport.get_component_sizes([prefix_rule_col, suffix_rule_col])
+        total_size = sum(size for _, size in components.values())
+
+        write("{:<22}{:>10}{:>14}{:>9}".format("component", "objects", "size", "share"))
+        for component in COMPONENTS:
+            objects, size = components[component]
+            write("{:<22}{:>10}{:>14}{:>8.1f}%".format(component, objects, format_bytes(size), 100 * size / float(max(1, total_size))))
+        write("{:<22}{:>10}{:>14}".format("total", sum(objects for objects, _ in components.values()), format_bytes(total_size)))
+
+        # equal strings which are stored in multiple objects
+        string_sizes = {}
+        for content, size in strings:
+            string_sizes.setdefault(content, []).append(size)
+
+        duplicates = [sizes for sizes in string_sizes.values() if len(sizes) > 1]
+        write("duplicated strings: {} copies of {} distinct strings, {}".format(sum(len(sizes) - 1 for sizes in duplicates),
+                                                                                len(duplicates), format_bytes(sum(sum(sizes[1:])
+                                                                                                                  for sizes in duplicates))))
+        write()
+
+        rule_amount = prefix_rule_col.get_rule_amount() + suffix_rule_col.get_rule_amount()
+        write("rules: {} ({} prefix, {} suffix), training pairs: {}".format(rule_amount, prefix_rule_col.get_rule_amount(),
+                                                                           suffix_rule_col.get_rule_amount(), training_pairs))
+
+        for name, size in (("object walk", total_size), ("traced training", training_size)):
+            if size is None:
+                continue
+
+            write("{}: {} per rule, {} per training pair".format(name, format_bytes(size / float(max(1, rule_amount))),
+                                                                 format_bytes(size / float(max(1, training_pairs)))))
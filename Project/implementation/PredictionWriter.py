@@ -0,0 +1,164 @@
+import bz2
+import gzip
+import json
+import lzma
+import sys
+
+# supported output formats
+FORMATS = ("list", "tsv", "jsonl", "unimorph")
+
+# supported compressions and the file extensions which select them
+COMPRESSIONS = {"gzip": ".gz", "bz2": ".bz2", "xz": ".xz"}
+
+
+class PredictionWriter():
+    """A PredictionWriter streams (lemma, form, features) predictions to stdout or a file. The lines are encoded once and collected
+    until buffer_size bytes are reached, then the whole block is written with a single call (optionally compressed). Only if the
+    output is an interactive terminal every line is written immediately.
+
+    Formats:
+        list     - only the predicted column per line followed by an empty line (the format of the -l parameter)
+        tsv      - a "lemma form features" header followed by one tab separated line per prediction
+        jsonl    - one json object with the keys lemma, form and features per line
+        unimorph - the 3 column UniMorph format "lemma form features", e.g. to use predictions as training data
+    """
+
+    def __init__(self, path=None, output_format="list", predicted_column="form", compression=None, buffer_size=1 << 20):
+        """Creates a PredictionWriter
+
+        Parameters
+        ----------
+        path : string, optional
+            path of the output file (the default is None, which writes to stdout)
+        output_format : string, optional
+            one of FORMATS (the default is "list")
+        predicted_column : string, optional
+            column written by the "list" format, "form" (task 1, 2) or "features" (task 3) (the default is "form")
+        compression : string, optional
+            one of COMPRESSIONS (the default is None, which compresses only if the path ends with the extension of a compression)
+        buffer_size : int, optional
+            amount of bytes collected before they get written (the default is 1 MiB)
+
+        """
+
+        if output_format not in FORMATS:
+            raise ValueError("Unknown output format {}, use one of {}".format(output_format, ", ".join(FORMATS)))
+
+        if predicted_column not in ("form", "features"):
+            raise ValueError("Unknown predicted column {}, use form or features".format(predicted_column))
+
+        if compression is None and path is not None:
+            for compression_name, extension in COMPRESSIONS.items():
+                if path.endswith(extension):
+                    compression = compression_name
+
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError("Unknown compression {}, use one of {}".format(compression, ", ".join(COMPRESSIONS)))
+
+        self.output_format = output_format
+        self.predicted_column = predicted_column
+        self.buffer_size = buffer_size
+
+        if path is None:
+            sys.stdout.flush()
+            self.raw_output = sys.stdout.buffer
+            self.owns_output = False
+        else:
+            self.raw_output = open(path, "wb")
+            self.owns_output = True
+
+        # a terminal shows each line as soon as it is predicted, pipes and files get whole blocks
+        self.line_buffered = compression is None and self.raw_output.isatty()
+
+        if compression == "gzip":
+            self.output = gzip.GzipFile(fileobj=self.raw_output, mode="wb")
+        elif compression == "bz2":
+            self.output = bz2.BZ2File(self.raw_output, mode="wb")
+        elif compression == "xz":
+            self.output = lzma.LZMAFile(self.raw_output, mode="wb")
+        else:
+            self.output = self.raw_output
+
+        self.block = []
+        self.block_size = 0
+
+        if output_format == "tsv":
+            self.__add_line("lemma\tform\tfeatures")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, lemma, form, features):
+        """Adds a single prediction
+
+        Parameters
+        ----------
+        lemma : string
+            lemma string
+        form : string
+            (predicted) inflected form
+        features : FeatureCollection
+            (predicted) inflection features
+
+        """
+
+        if self.output_format == "list":
+            line = form if self.predicted_column == "form" else str(features)
+        elif self.output_format == "jsonl":
+            line = json.dumps({"lemma": lemma, "form": form, "features": str(features)}, ensure_ascii=False)
+        else:
+            line = "{}\t{}\t{}".format(lemma, form, features)
+
+        self.__add_line(line)
+
+    def write_all(self, lemma_list, form_list, feature_desc_list):
+        """Adds a prediction for each (lemma, form, features) triple of the given lists
+        """
+
+        for lemma, form, features in zip(lemma_list, form_list, feature_desc_list):
+            self.write(lemma, form, features)
+
+    def flush(self):
+        """Writes all collected lines
+        """
+
+        if len(self.block) > 0:
+            self.output.write(b"".join(self.block))
+            self.block = []
+            self.block_size = 0
+
+        self.output.flush()
+
+    def close(self):
+        """Writes all collected lines and closes the output. stdout itself stays open.
+        """
+
+        if self.output is None:
+            return
+
+        if self.output_format == "list":
+            self.__add_line("")
+
+        self.flush()
+
+        if self.output is not self.raw_output:
+            self.output.close()
+
+        if self.owns_output:
+            self.raw_output.close()
+        else:
+            self.raw_output.flush()
+
+        self.output = None
+
+    def __add_line(self, line):
+        encoded_line = (line + "\n").encode("utf8")
+
+        self.block.append(encoded_line)
+        self.block_size += len(encoded_line)
+
+        if self.line_buffered or self.block_size >= self.buffer_size:
+            self.flush()
@@ -0,0 +1,343 @@
+import numpy as np
+from implementation.ChangingRule import PrefixRule, SuffixRule
+
+# rule selection strategies which can be compiled, see RuleCollection.get_highest_count_rules() / get_highest_overlap_rules()
+SELECTIONS = ("count", "overlap")
+
+
+class RuleAutomaton():
+    """A RuleAutomaton is a RuleCollection of PrefixRules or SuffixRules compiled into a deterministic automaton. All rule inputs of
+    all feature combinations form one trie (read from the start of the word for PrefixRules and from the end for SuffixRules) which
+    is stored as a NumPy transition table. For each feature combination and each state the rule which the selection strategy would
+    choose for a word ending its walk in this state is precomputed, so choosing the rules of a batch of words is a vectorized walk
+    through the table followed by a single table lookup.
+    """
+
+    def __init__(self, rule_class, symbols, transitions, winners, feature_keys, rule_inputs, rule_outputs):
+        """Creates a RuleAutomaton out of its tables. To create an automaton use compile() or load().
+
+        Parameters
+        ----------
+        rule_class : type
+            PrefixRule or SuffixRule
+        symbols : np.array<uint32>
+            sorted code points of all characters of the rule inputs, the symbol of a character is its index
+        transitions : np.array<int32>
+            states x (symbols + 1) table of the next state, -1 if there is no transition. The last column is used for unknown characters
+        winners : np.array<int>
+            feature combinations x states table of the chosen rule, -1 if no rule can be applied
+        feature_keys : List<string>
+            feature string of each row of the winner table
+        rule_inputs : List<string>
+            input of each rule
+        rule_outputs : List<string>
+            output of each rule
+
+        """
+
+        self.rule_class = rule_class
+        self.symbols = symbols
+        self.transitions = transitions
+        self.winners = winners
+
+        self.feature_keys = list(feature_keys)
+        self.feature_index = {feature_key: i for i, feature_key in enumerate(self.feature_keys)}
+
+        self.rule_inputs = list(rule_inputs)
+        self.rule_outputs = list(rule_outputs)
+
+    @staticmethod
+    def compile(rule_collection, selection="count"):
+        """Compiles the rule choice of a RuleCollection into an automaton
+
+        Parameters
+        ----------
+        rule_collection : RuleCollection
+            RuleCollection instance containing only PrefixRules or only SuffixRules
+        selection : string, optional
+            "count" for the rules of get_highest_count_rules(), "overlap" for the rules of get_highest_overlap_rules() (the default is
+            "count")
+
+        Returns
+        -------
+        RuleAutomaton
+            The compiled automaton
+        """
+
+        if selection not in SELECTIONS:
+            raise ValueError("Unknown rule selection {}, use one of {}".format(selection, ", ".join(SELECTIONS)))
+
+        rule_classes = {type(single_rule_dict["rule"]) for rule_dict in rule_collection.rule_dict.values()
+                        for single_rule_dict in rule_dict.values()}
+
+        if len(rule_classes - {PrefixRule, SuffixRule}) > 0 or len(rule_classes) > 1:
+            raise ValueError("Only collections of either PrefixRules or SuffixRules can be compiled")
+
+        rule_class = rule_classes.pop() if len(rule_classes) > 0 else PrefixRule
+
+        children = [{}]
+        parents = [0]
+
+        rule_inputs = []
+        rule_outputs = []
+
+        # best (count, -position) score and rule of each (feature combination, state) which contains rules
+        own_rules = {}
+        feature_keys = []
+
+        for feature_id, (feature_key, rule_dict) in enumerate(rule_collection.rule_dict.items()):
+            feature_keys.append(feature_key)
+
+            for position, single_rule_dict in enumerate(rule_dict.values()):
+                rule = single_rule_dict["rule"]
+
+                # suffix rules are read from the end of the word
+                state = 0
+                for char in (rule.input if rule_class is PrefixRule else rule.input[::-1]):
+                    if char not in children[state]:
+                        children[state][char] = len(children)
+                        children.append({})
+                        parents.append(state)
+                    state = children[state][char]
+
+                score = (single_rule_dict["count"], -position)
+
+                if (feature_id, state) not in own_rules or score > own_rules[(feature_id, state)][0]:
+                    own_rules[(feature_id, state)] = (score, len(rule_inputs))
+
+                rule_inputs.append(rule.input)
+                rule_outputs.append(rule.output)
+
+        chars = sorted({char for state_children in children for char in state_children})
+        symbol_index = {char: i for i, char in enumerate(chars)}
+
+        transitions = np.full((len(children), len(chars) + 1), -1, dtype=np.int32)
+        for state, state_children in enumerate(children):
+            for char, child in state_children.items():
+                transitions[state, symbol_index[char]] = child
+
+        winners = RuleAutomaton.__get_winners(own_rules, len(feature_keys), parents, selection, len(rule_inputs))
+
+        return RuleAutomaton(rule_class, np.array([ord(char) for char in chars], dtype=np.uint32), transitions, winners, feature_keys,
+                             rule_inputs, rule_outputs)
+
+    @staticmethod
+    def __get_winners(own_rules, feature_amount, parents, selection, rule_amount):
+        state_amount = len(parents)
+
+        own = np.full((feature_amount, state_amount), -1, dtype=np.int64)
+        own_rank = np.full((feature_amount, state_amount), -1, dtype=np.int64)
+
+        # rank of each rule within its feature combination, a higher rank is a better (count, -position) score
+        rules_by_feature = {}
+        for (feature_id, state), (score, rule_id) in own_rules.items():
+            rules_by_feature.setdefault(feature_id, []).append((score, state, rule_id))
+
+        for feature_id, feature_rules in rules_by_feature.items():
+            for rank, (_, state, rule_id) in enumerate(sorted(feature_rules)):
+                own[feature_id, state] = rule_id
+                own_rank[feature_id, state] = rank
+
+        winners = own.copy()
+        winner_ranks = own_rank.copy()
+
+        # states are created after their parent, so the parents are always done
+        for state in range(1, state_amount):
+            parent = parents[state]
+
+            if selection == "overlap":
+                # the rule with the longest matching input wins
+                take_parent = own[:, state] < 0
+            else:
+                # the rule with the best score of all matching inputs wins
+                take_parent = winner_ranks[:, parent] >= own_rank[:, state]
+
+            winners[:, state] = np.where(take_parent, winners[:, parent], own[:, state])
+            winner_ranks[:, state] = np.where(take_parent, winner_ranks[:, parent], own_rank[:, state])
+
+        return winners.astype(np.int16 if rule_amount < np.iinfo(np.int16).max else np.int32)
+
+    def encode_words(self, words):
+        """Converts words into a padded matrix of symbols, read from the start (PrefixRules) or from the end (SuffixRules)
+
+        Parameters
+        ----------
+        words : List<string>
+            words to encode
+
+        Returns
+        -------
+        np.array<int32>, np.array<int64>
+            words x longest word matrix of symbols padded with the unknown symbol and the length of each word
+        """
+
+        if self.rule_class is SuffixRule:
+            words = [word[::-1] for word in words]
+
+        lengths = np.array([len(word) for word in words], dtype=np.int64)
+        unknown_symbol = len(self.symbols)
+
+        codes = np.full((len(words), max(1, int(lengths.max()) if len(words) > 0 else 1)), unknown_symbol, dtype=np.int32)
+
+        code_points = np.frombuffer("".join(words).encode("utf-32-le"), dtype=np.uint32)
+
+        if len(code_points) > 0:
+            symbol_ids = np.searchsorted(self.symbols, code_points)
+            known = symbol_ids < len(self.symbols)
+            known[known] = self.symbols[symbol_ids[known]] == code_points[known]
+
+            rows = np.repeat(np.arange(len(words)), lengths)
+            columns = np.arange(len(code_points)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+            codes[rows, columns] = np.where(known, symbol_ids, unknown_symbol)
+
+        return codes, lengths
+
+    def get_rule_ids(self, words, feature_descs):
+        """Chooses the rule of each (word, feature combination) pair with a vectorized walk through the transition table
+
+        Parameters
+        ----------
+        words : List<string>
+            words (usually lemmas) the rules should be applied to
+        feature_descs : List<FeatureCollection>
+            feature combination of each word
+
+        Returns
+        -------
+        np.array<int64>
+            id of the chosen rule for each word, -1 if no rule can be applied
+        """
+
+        codes, lengths = self.encode_words(words)
+
+        # a SuffixRule must not contain the whole word, so the last character is never read
+        steps = lengths if self.rule_class is PrefixRule else np.maximum(lengths - 1, 0)
+
+        states = np.zeros(len(words), dtype=np.int64)
+
+        for t in range(codes.shape[1]):
+            active = steps > t
+            if not active.any():
+                break
+
+            next_states = self.transitions[states, codes[:, t]]
+
+            # words leave the trie at the first character without transition
+            steps = np.where(active & (next_states < 0), t, steps)
+            states = np.where(active & (next_states >= 0), next_states, states)
+
+        feature_ids = np.array([self.feature_index.get(str(feature_desc), -1) for feature_desc in feature_descs], dtype=np.int64)
+        known = feature_ids >= 0
+
+        rule_ids = np.full(len(words), -1, dtype=np.int64)
+        rule_ids[known] = self.winners[feature_ids[known], states[known]]
+
+        return rule_ids
+
+    def apply_rules(self, words, rule_ids):
+        """Applies the rules with the given ids to the words like ChangingRule.apply_rule(), -1 keeps the word unchanged
+
+        Parameters
+        ----------
+        words : List<string>
+            words the rules should be applied to
+        rule_ids : np.array<int64>
+            id of the rule for each word
+
+        Returns
+        -------
+        List<string>
+            the changed words
+        """
+
+        results = []
+
+        for word, rule_id in zip(words, rule_ids.tolist()):
+            if rule_id >= 0:
+                rule_input = self.rule_inputs[rule_id]
+
+                if self.rule_class is PrefixRule and word.startswith(rule_input):
+                    word = self.rule_outputs[rule_id] + word[len(rule_input):]
+                elif self.rule_class is SuffixRule and word.endswith(rule_input):
+                    word = word[:len(word) - len(rule_input)] + self.rule_outputs[rule_id]
+
+            results.append(word)
+
+        return results
+
+    def save(self, path):
+        """Stores the tables of the automaton in a single .npz file
+        """
+
+        np.savez(path, rule_class=np.array(self.rule_class.__name__), symbols=self.symbols, transitions=self.transitions,
+                 winners=self.winners, feature_keys=np.array(self.feature_keys, dtype=np.str_),
+                 rule_inputs=np.array(self.rule_inputs, dtype=np.str_), rule_outputs=np.array(self.rule_outputs, dtype=np.str_))
+
+    @staticmethod
+    def load(path):
+        """Loads an automaton stored with save()
+        """
+
+        with np.load(path) as tables:
+            rule_class = {"PrefixRule": PrefixRule, "SuffixRule": SuffixRule}[str(tables["rule_class"])]
+
+            return RuleAutomaton(rule_class, tables["symbols"], tables["transitions"], tables["winners"], tables["feature_keys"].tolist(),
+                                 tables["rule_inputs"].tolist(), tables["rule_outputs"].tolist())
+
+
+class CompiledInflector():
+    """Inflects batches of lemmas like the inflect_data() of task1 with a compiled prefix and suffix RuleAutomaton: the suffix rule
+    chosen for the lemma is applied first and then the prefix rule chosen for the lemma.
+    """
+
+    def __init__(self, prefix_automaton, suffix_automaton):
+        self.prefix_automaton = prefix_automaton
+        self.suffix_automaton = suffix_automaton
+
+    @staticmethod
+    def compile(prefix_rule_col, suffix_rule_col, prefix_selection="count", suffix_selection="overlap"):
+        """Compiles a prefix and a suffix RuleCollection, the default selections are the ones of task1 and task2
+
+        Returns
+        -------
+        CompiledInflector
+            The inflector using both compiled collections
+        """
+
+        return CompiledInflector(RuleAutomaton.compile(prefix_rule_col, prefix_selection),
+                                 RuleAutomaton.compile(suffix_rule_col, suffix_selection))
+
+    def inflect_data(self, lemma_list, feature_desc_list, batch_size=4096):
+        """Inflects a list of lemmas with corresponding FeatureCollections in batches
+
+        Parameters
+        ----------
+        lemma_list : List<string>
+            List of lemma strings that should be inflected
+        feature_desc_list : List<FeatureCollection>
+            List of FeatureCollection instances describing how the corresponding lemma should be inflected
+        batch_size : int, optional
+            amount of lemmas walked through the automata at once (the default is 4096)
+
+        Returns
+        -------
+        List<string>
+            List of inflected lemma strings
+        """
+
+        assert(len(lemma_list) == len(feature_desc_list))
+
+        inflected_data = []
+
+        for start in range(0, len(lemma_list), batch_size):
+            lemmas = lemma_list[start:start + batch_size]
+            feature_descs = feature_desc_list[start:start + batch_size]
+
+            prefix_rule_ids = self.prefix_automaton.get_rule_ids(lemmas, feature_descs)
+            suffix_rule_ids = self.suffix_automaton.get_rule_ids(lemmas, feature_descs)
+
+            inflected_lemmas = self.suffix_automaton.apply_rules(lemmas, suffix_rule_ids)
+            inflected_data.extend(self.prefix_automaton.apply_rules(inflected_lemmas, prefix_rule_ids))
+
+        return inflected_data
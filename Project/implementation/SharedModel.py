@@ -0,0 +1,349 @@
+import hashlib
+import json
+import numpy as np
+from multiprocessing import shared_memory
+from implementation.ChangingRule import PrefixRule, SuffixRule
+
+# rule types which can be stored in a shared model
+RULE_KINDS = (PrefixRule, SuffixRule)
+
+# alignment of the arrays inside the shared memory block
+ARRAY_ALIGNMENT = 64
+
+
+def get_string_hash(content):
+    """Returns a 64 bit hash of a string which, unlike hash(), is the same in every process
+    """
+    return int.from_bytes(hashlib.blake2b(content.encode("utf8"), digest_size=8).digest(), "little")
+
+
+def get_feature_key(features):
+    """Returns the sorted, semicolon separated features of a FeatureCollection or of the features of a RuleCollection key. The string
+    of a FeatureCollection follows the order of its set, which changes when the collection is pickled to a worker process, so the shared
+    model is keyed by this canonical string instead.
+    """
+    return ";".join(sorted(str(feature) for feature in features))
+
+
+class SharedStrings():
+    """Read only string pool stored as utf-8 bytes with offsets
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def get(self, string_id):
+        return bytes(self.data[self.offsets[string_id]:self.offsets[string_id + 1]]).decode("utf8")
+
+
+class SharedRuleCollection():
+    """Read only, array backed counterpart of a RuleCollection of Prefix and SuffixRules. It answers get_highest_overlap_rules() and
+    get_highest_count_rules() with the same rules as the RuleCollection it was created from, but all rules are stored in NumPy arrays
+    which can live in shared memory. Rule instances are only created for the returned rules.
+    """
+
+    def __init__(self, arrays, strings):
+        """Creates a SharedRuleCollection out of the arrays created by SharedRuleCollection.get_arrays()
+
+        Parameters
+        ----------
+        arrays : Dict
+            Dictionary of NumPy arrays describing the rules
+        strings : SharedStrings
+            String pool containing the feature strings and rule inputs and outputs
+
+        """
+
+        self.feature_hashes = arrays["feature_hashes"]
+        self.feature_names = arrays["feature_names"]
+        self.feature_starts = arrays["feature_starts"]
+
+        self.rule_hashes = arrays["rule_hashes"]
+        self.rule_positions = arrays["rule_positions"]
+        self.rule_counts = arrays["rule_counts"]
+        self.rule_inputs = arrays["rule_inputs"]
+        self.rule_outputs = arrays["rule_outputs"]
+        self.rule_kinds = arrays["rule_kinds"]
+
+        self.strings = strings
+        self.kinds = [RULE_KINDS[kind] for kind in np.unique(self.rule_kinds)]
+
+    @staticmethod
+    def get_arrays(rule_collection, string_ids):
+        """Converts a RuleCollection into NumPy arrays. The features are sorted by the hash of their canonical string (see
+        get_feature_key()) and the rules of each feature by the hash of their type and input.
+
+        Parameters
+        ----------
+        rule_collection : RuleCollection
+            RuleCollection instance containing only Prefix and SuffixRules
+        string_ids : Dict
+            Dictionary mapping strings to their id in the string pool, new strings get added
+
+        Returns
+        -------
+        Dict
+            Dictionary of NumPy arrays
+        """
+
+        def get_string_id(content):
+            if content not in string_ids:
+                string_ids[content] = len(string_ids)
+            return string_ids[content]
+
+        features = sorted(((get_feature_key(feature_key.split(";")), rule_dict) for feature_key, rule_dict in rule_collection.rule_dict.items()),
+                          key=lambda item: get_string_hash(item[0]))
+
+        if len(set(feature_key for feature_key, _ in features)) != len(features):
+            raise ValueError("The collection stores the same features in different orders, it can not be shared")
+
+        feature_hashes = []
+        feature_names = []
+        feature_starts = [0]
+        rules = []
+
+        for feature_key, rule_dict in features:
+            feature_rules = []
+
+            for position, single_rule_dict in enumerate(rule_dict.values()):
+                rule = single_rule_dict["rule"]
+
+                if type(rule) not in RULE_KINDS:
+                    raise ValueError("Only PrefixRules and SuffixRules can be shared, got {}".format(type(rule).__name__))
+
+                kind = RULE_KINDS.index(type(rule))
+                feature_rules.append((SharedRuleCollection.get_rule_hash(kind, rule.input), position, single_rule_dict["count"],
+                                      get_string_id(rule.input), get_string_id(rule.output), kind))
+
+            rules.extend(sorted(feature_rules))
+
+            feature_hashes.append(get_string_hash(feature_key))
+            feature_names.append(get_string_id(feature_key))
+            feature_starts.append(len(rules))
+
+        columns = list(zip(*rules)) if len(rules) > 0 else [()] * 6
+
+        return {"feature_hashes": np.array(feature_hashes, dtype=np.uint64),
+                "feature_names": np.array(feature_names, dtype=np.int32),
+                "feature_starts": np.array(feature_starts, dtype=np.int64),
+                "rule_hashes": np.array(columns[0], dtype=np.uint64),
+                "rule_positions": np.array(columns[1], dtype=np.int32),
+                "rule_counts": np.array(columns[2], dtype=np.int32),
+                "rule_inputs": np.array(columns[3], dtype=np.int32),
+                "rule_outputs": np.array(columns[4], dtype=np.int32),
+                "rule_kinds": np.array(columns[5], dtype=np.int8)}
+
+    @staticmethod
+    def get_rule_hash(kind, rule_input):
+        return get_string_hash("{}\x1f{}".format(kind, rule_input))
+
+    def get_highest_overlap_rules(self, input_str, inflection_descs):
+        """Returns the same rules as RuleCollection.get_highest_overlap_rules()
+        """
+        return self.__get_paradigm_rules(input_str, inflection_descs, use_overlap=True)
+
+    def get_highest_count_rules(self, input_str, inflection_descs):
+        """Returns the same rules as RuleCollection.get_highest_count_rules()
+        """
+        return self.__get_paradigm_rules(input_str, inflection_descs, use_overlap=False)
+
+    def get_highest_overlap_rule(self, input_str, inflection_desc):
+        return self.get_highest_overlap_rules(input_str, [inflection_desc])[0]
+
+    def get_highest_count_rule(self, input_str, inflection_desc):
+        return self.get_highest_count_rules(input_str, [inflection_desc])[0]
+
+    def __get_paradigm_rules(self, input_str, inflection_descs, use_overlap):
+
+        # all rule inputs which are applicable to the input string - the same for each feature collection
+        candidates = []
+        for rule_class in self.kinds:
+            kind = RULE_KINDS.index(rule_class)
+
+            for rule_input, overlap_score in rule_class.get_matching_inputs(input_str):
+                candidates.append((SharedRuleCollection.get_rule_hash(kind, rule_input), kind, rule_input,
+                                   overlap_score if use_overlap else 0))
+
+        best_rules = []
+
+        for inflection_desc in inflection_descs:
+            feature_index = self.__find_feature(get_feature_key(inflection_desc.features))
+
+            best_rule = None
+            best_score = None
+
+            if feature_index is not None:
+                start = self.feature_starts[feature_index]
+                feature_rule_hashes = self.rule_hashes[start:self.feature_starts[feature_index + 1]]
+
+                for rule_hash, kind, rule_input, overlap_score in candidates:
+                    first = start + np.searchsorted(feature_rule_hashes, rule_hash, side="left")
+                    last = start + np.searchsorted(feature_rule_hashes, rule_hash, side="right")
+
+                    for rule_index in range(first, last):
+                        if self.rule_kinds[rule_index] != kind or self.strings.get(self.rule_inputs[rule_index]) != rule_input:
+                            continue
+
+                        # highest overlap first, then the highest count and then the rule which was added first
+                        score = (overlap_score, int(self.rule_counts[rule_index]), -int(self.rule_positions[rule_index]))
+
+                        if best_score is None or score > best_score:
+                            best_score = score
+                            best_rule = rule_index
+
+            if best_rule is not None:
+                best_rule = RULE_KINDS[self.rule_kinds[best_rule]](self.strings.get(self.rule_inputs[best_rule]),
+                                                                    self.strings.get(self.rule_outputs[best_rule]), inflection_desc)
+
+            best_rules.append(best_rule)
+
+        return best_rules
+
+    def __find_feature(self, feature_key):
+        feature_hash = get_string_hash(feature_key)
+        feature_index = np.searchsorted(self.feature_hashes, feature_hash, side="left")
+
+        while feature_index < len(self.feature_hashes) and self.feature_hashes[feature_index] == feature_hash:
+            if self.strings.get(self.feature_names[feature_index]) == feature_key:
+                return feature_index
+            feature_index += 1
+
+        return None
+
+
+class SharedModel():
+    """A SharedModel publishes a trained prefix and suffix RuleCollection pair as one block of shared memory. Other processes attach
+    to the block by its name and get read only SharedRuleCollections whose arrays are views into the block, so all processes share a
+    single copy of the model.
+    """
+
+    def __init__(self, shm, arrays, owner):
+        self.shm = shm
+        self.owner = owner
+
+        strings = SharedStrings(arrays["string_offsets"], arrays["string_data"])
+
+        self.prefix_rule_col = SharedRuleCollection({key[len("prefix_"):]: value for key, value in arrays.items()
+                                                     if key.startswith("prefix_")}, strings)
+        self.suffix_rule_col = SharedRuleCollection({key[len("suffix_"):]: value for key, value in arrays.items()
+                                                     if key.startswith("suffix_")}, strings)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def size(self):
+        return self.shm.size
+
+    @staticmethod
+    def publish(prefix_rule_col, suffix_rule_col, name=None):
+        """Copies a prefix and a suffix RuleCollection into a new shared memory block.
+
+        Parameters
+        ----------
+        prefix_rule_col : RuleCollection
+            RuleCollection instance containing all prefix rules
+        suffix_rule_col : RuleCollection
+            RuleCollection instance containing all suffix rules
+        name : string, optional
+            name of the shared memory block (the default is None, which creates a random name)
+
+        Returns
+        -------
+        SharedModel
+            The published model. The creating process has to call unlink() when the model is not needed anymore
+        """
+
+        string_ids = {}
+        arrays = {}
+
+        for prefix, rule_col in (("prefix_", prefix_rule_col), ("suffix_", suffix_rule_col)):
+            for key, value in SharedRuleCollection.get_arrays(rule_col, string_ids).items():
+                arrays[prefix + key] = value
+
+        encoded_strings = [content.encode("utf8") for content in string_ids]
+        arrays["string_offsets"] = np.cumsum([0] + [len(content) for content in encoded_strings], dtype=np.int64)
+        arrays["string_data"] = np.frombuffer(b"".join(encoded_strings), dtype=np.uint8)
+
+        # the block starts with the length of a json header describing the position of all arrays
+        layout = {}
+        offset = 0
+        for key, value in arrays.items():
+            layout[key] = [offset, value.dtype.str, value.shape]
+            offset += -(-value.nbytes // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+        header = json.dumps(layout).encode("utf8")
+        data_start = -(-(8 + len(header)) // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(1, data_start + offset))
+        shm.buf[:8] = len(header).to_bytes(8, "little")
+        shm.buf[8:8 + len(header)] = header
+
+        views = SharedModel.__get_views(shm, layout, data_start)
+        for key, value in arrays.items():
+            views[key][...] = value
+            views[key].flags.writeable = False
+
+        return SharedModel(shm, views, owner=True)
+
+    @staticmethod
+    def attach(name):
+        """Attaches to a model published by another process, usually a worker attaching to the model of its parent process. No data
+        is copied.
+
+        Parameters
+        ----------
+        name : string
+            name of the shared memory block
+
+        Returns
+        -------
+        SharedModel
+            The model with read only views into the shared memory block
+        """
+
+        try:
+            # only the publishing process should remove the block (track is available since python 3.13)
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # older versions register the block again, which is harmless for worker processes started by the publishing process
+            # since they share its resource tracker
+            shm = shared_memory.SharedMemory(name=name)
+
+        header_len = int.from_bytes(bytes(shm.buf[:8]), "little")
+        layout = json.loads(bytes(shm.buf[8:8 + header_len]).decode("utf8"))
+        data_start = -(-(8 + header_len) // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+        views = SharedModel.__get_views(shm, layout, data_start)
+        for view in views.values():
+            view.flags.writeable = False
+
+        return SharedModel(shm, views, owner=False)
+
+    def close(self):
+        """Releases the views of this process. The block itself stays available for other processes.
+        """
+
+        self.prefix_rule_col = None
+        self.suffix_rule_col = None
+        self.shm.close()
+
+    def unlink(self):
+        """Closes and removes the shared memory block. Only the publishing process should call this.
+        """
+
+        self.close()
+
+        if self.owner:
+            self.shm.unlink()
+
+    @staticmethod
+    def __get_views(shm, layout, data_start):
+        views = {}
+
+        for key, (offset, dtype, shape) in layout.items():
+            views[key] = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=shm.buf, offset=data_start + offset)
+
+        return views
@@ -0,0 +1,191 @@
+import hashlib
+import os
+import sqlite3
+from implementation.Word import Word, WordSplitter
+
+
+class SplitCache():
+    """A SplitCache stores the results of word splitters in a single SQLite file, so the same (lemma, inflection) pairs do not have
+    to be split again in later runs. Each entry is addressed by a hash of the splitter name and both strings. The file can be used by
+    multiple processes at the same time - every process opens its own connection and writes only add missing entries.
+    """
+
+    # amount of keys per SELECT statement
+    QUERY_CHUNK_SIZE = 500
+
+    def __init__(self, path):
+        """Opens (or creates) the cache file
+
+        Parameters
+        ----------
+        path : string
+            path to the SQLite file of the cache
+
+        """
+
+        self.path = path
+        self.connection = None
+        self.pid = None
+
+    @staticmethod
+    def get_key(splitter_name, source, target):
+        """Returns the content address of a split result
+
+        Parameters
+        ----------
+        splitter_name : string
+            name of the splitter which computed the result
+        source : string
+            source word
+        target : string
+            target word
+
+        Returns
+        -------
+        string
+            hex digest identifying the split of both words with the splitter
+        """
+
+        content = "\x1f".join((splitter_name, source, target))
+        return hashlib.sha1(content.encode("utf8")).hexdigest()
+
+    def get_splits(self, splitter_name, word_pairs):
+        """Looks up the split results of multiple word pairs.
+
+        Parameters
+        ----------
+        splitter_name : string
+            name of the splitter which computed the results
+        word_pairs : List<(string, string)>
+            (source, target) pairs to look up
+
+        Returns
+        -------
+        Dict
+            Dictionary mapping each found (source, target) pair to its (Word, Word) split
+        """
+
+        keys = {}
+        for source, target in word_pairs:
+            keys[SplitCache.get_key(splitter_name, source, target)] = (source, target)
+
+        key_list = list(keys)
+        results = {}
+
+        connection = self.__get_connection()
+
+        for start in range(0, len(key_list), SplitCache.QUERY_CHUNK_SIZE):
+            chunk = key_list[start:start + SplitCache.QUERY_CHUNK_SIZE]
+
+            rows = connection.execute("SELECT key, src_prefix, src_stem, src_suffix, tgt_prefix, tgt_stem, tgt_suffix FROM splits "
+                                      "WHERE key IN ({})".format(",".join("?" * len(chunk))), chunk)
+
+            for row in rows:
+                results[keys[row[0]]] = (Word(row[1], row[2], row[3]), Word(row[4], row[5], row[6]))
+
+        return results
+
+    def add_splits(self, splitter_name, splits):
+        """Stores split results in the cache file within a single transaction. Entries which already exist are not changed.
+
+        Parameters
+        ----------
+        splitter_name : string
+            name of the splitter which computed the results
+        splits : Dict
+            Dictionary mapping (source, target) pairs to their (Word, Word) split
+
+        """
+
+        if len(splits) == 0:
+            return
+
+        rows = []
+        for (source, target), (source_word, target_word) in splits.items():
+            rows.append((SplitCache.get_key(splitter_name, source, target), source_word.prefix, source_word.stem, source_word.suffix,
+                         target_word.prefix, target_word.stem, target_word.suffix))
+
+        connection = self.__get_connection()
+
+        with connection:
+            connection.executemany("INSERT OR IGNORE INTO splits VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def __get_connection(self):
+        # connections must not be shared with forked processes, so every process opens its own one
+        if self.connection is None or self.pid != os.getpid():
+            self.connection = sqlite3.connect(self.path, timeout=60)
+            self.pid = os.getpid()
+
+            # write ahead logging allows reading while another process writes
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+
+            with self.connection:
+                self.connection.execute("CREATE TABLE IF NOT EXISTS splits (key TEXT PRIMARY KEY, src_prefix TEXT, src_stem TEXT, "
+                                        "src_suffix TEXT, tgt_prefix TEXT, tgt_stem TEXT, tgt_suffix TEXT)")
+
+        return self.connection
+
+
+class PersistentCachedSplitter(WordSplitter):
+    """A PersistentCachedSplitter wraps another WordSplitter and keeps its results in a SplitCache file. Results get loaded with
+    prefetch() or on demand, new results are written on flush(). The returned Word instances are shared between all calls with the
+    same pair and must not be modified.
+    """
+
+    def __init__(self, splitter, splitter_name, split_cache):
+        """Creates a PersistentCachedSplitter
+
+        Parameters
+        ----------
+        splitter : WordSplitter
+            The splitter whose results should be cached
+        splitter_name : string
+            Name of the splitter, part of the cache keys
+        split_cache : SplitCache
+            The cache file
+
+        """
+        super().__init__()
+
+        self.splitter = splitter
+        self.splitter_name = splitter_name
+        self.split_cache = split_cache
+
+        self.cache = {}
+        self.new_splits = {}
+
+        # pairs which are known to be missing in the cache file
+        self.missing_pairs = set()
+
+    def prefetch(self, word_pairs):
+        """Loads the cached results of multiple (source, target) pairs with a few queries, so split_word() does not have to query the
+        cache file for each pair.
+        """
+
+        requested_pairs = [word_pair for word_pair in word_pairs if word_pair not in self.cache]
+        found_splits = self.split_cache.get_splits(self.splitter_name, requested_pairs)
+
+        self.cache.update(found_splits)
+        self.missing_pairs.update(word_pair for word_pair in requested_pairs if word_pair not in found_splits)
+
+    def split_word(self, source, target):
+        key = (source, target)
+        result = self.cache.get(key)
+
+        if result is None and key not in self.missing_pairs:
+            result = self.split_cache.get_splits(self.splitter_name, [key]).get(key)
+
+        if result is None:
+            result = self.splitter.split_word(source, target)
+            self.new_splits[key] = result
+
+        self.cache[key] = result
+        return result
+
+    def flush(self):
+        """Writes all results computed since the last flush to the cache file
+        """
+
+        self.split_cache.add_splits(self.splitter_name, self.new_splits)
+        self.new_splits = {}
@@ -38,9 +38,20 @@ class WordSplitter():
 
 class LevinsteinPartition(WordSplitter):
 
-    def __init__(self):
+    def __init__(self, bit_parallel=False):
+        """Creates a LevinsteinPartition splitter
+        
+        Parameters
+        ----------
+        bit_parallel : bool, optional
+            If True, the common prefix of both words gets stripped and the edit distances of the remaining parts are computed with
+            bit vectors (Myers / Hyyrö) instead of the full distance matrix. The resulting splits are the same (the default is False)
+        
+        """
         super().__init__()
 
+        self.bit_parallel = bit_parallel
+
     def split_word(self, source, target):
         """Splits a word into two Word objects with prefix, stem and suffix based on levenshtein distance.
         E.g. schielen + geschielt => "" + "schiele" + "n" and  "ge" + "schielt" + ""
@@ -62,6 +73,15 @@ class LevinsteinPartition(WordSplitter):
         if source == target:
             return Word("", source, ""), Word("", target, "")
 
+        if self.bit_parallel:
+            source_word, target_word = LevinsteinPartition.__align_bit_parallel(source, target)
+        else:
+            source_word, target_word = LevinsteinPartition.__align(source, target)
+
+        return LevinsteinPartition.__partition(source_word, target_word)
+
+    @staticmethod
+    def __align(source, target):
         s_len = len(source) + 1
         t_len = len(target) + 1
         matrix = np.zeros((s_len, t_len))
@@ -118,6 +138,106 @@ class LevinsteinPartition(WordSplitter):
                     target_word = target[j - 1] + target_word
                     j = j - 1
 
+        return source_word, target_word
+
+    @staticmethod
+    def __align_bit_parallel(source, target):
+        # strip the longest common prefix. The common suffix stays in the matrix: the backtracking prefers deletions over matches,
+        # so it does not always align the common suffix character by character
+        prefix_len = 0
+        while prefix_len < min(len(source), len(target)) and source[prefix_len] == target[prefix_len]:
+            prefix_len += 1
+
+        source_middle = source[prefix_len:]
+        target_middle = target[prefix_len:]
+
+        # vertical deltas (+1 / -1 bit vectors) of each column of the distance matrix of the remaining parts
+        columns = LevinsteinPartition.__compute_delta_columns(source_middle, target_middle)
+
+        def distance(a, b):
+            positive_deltas, negative_deltas = columns[b]
+            row_mask = (1 << a) - 1
+            return b + bin(positive_deltas & row_mask).count("1") - bin(negative_deltas & row_mask).count("1")
+
+        source_chars = []
+        target_chars = []
+
+        # backtracking over the remaining parts with the same decisions as the full matrix backtracking
+        i = len(source_middle)
+        j = len(target_middle)
+
+        while i != 0 and j != 0:
+            if distance(i - 1, j) <= distance(i - 1, j - 1):
+                target_chars.append('_')
+                source_chars.append(source_middle[i - 1])
+                i = i - 1
+            else:
+                source_chars.append(source_middle[i - 1])
+                target_chars.append(target_middle[j - 1])
+                i = i - 1
+                j = j - 1
+
+        # inside the common prefix the distance matrix is |i - j|, so the backtracking first removes the difference of both
+        # positions and then continues diagonally
+        i = i + prefix_len
+        j = j + prefix_len
+        source_rest = source[:i]
+        target_rest = target[:j]
+
+        while i > j:
+            target_chars.append('_')
+            source_chars.append(source_rest[i - 1])
+            i = i - 1
+
+        while i > 0:
+            source_chars.append(source_rest[i - 1])
+            target_chars.append(target_rest[j - 1])
+            i = i - 1
+            j = j - 1
+
+        while j > 0:
+            source_chars.append('_')
+            target_chars.append(target_rest[j - 1])
+            j = j - 1
+
+        return "".join(reversed(source_chars)), "".join(reversed(target_chars))
+
+    @staticmethod
+    def __compute_delta_columns(source, target):
+        # bit-parallel computation of the levenshtein distance matrix (Myers / Hyyrö), bit i of a column stores the vertical delta
+        # between the rows i and i + 1
+        all_rows = (1 << len(source)) - 1
+
+        char_masks = {}
+        for i, char in enumerate(source):
+            char_masks[char] = char_masks.get(char, 0) | (1 << i)
+
+        positive_deltas = all_rows
+        negative_deltas = 0
+        columns = [(positive_deltas, negative_deltas)]
+
+        for char in target:
+            equal = char_masks.get(char, 0)
+
+            vertical = equal | negative_deltas
+            horizontal = (((equal & positive_deltas) + positive_deltas) ^ positive_deltas) | equal
+
+            horizontal_positive = negative_deltas | (~(horizontal | positive_deltas) & all_rows)
+            horizontal_negative = positive_deltas & horizontal
+
+            # the first row of the matrix increases by one in each column
+            horizontal_positive = ((horizontal_positive << 1) | 1) & all_rows
+            horizontal_negative = (horizontal_negative << 1) & all_rows
+
+            positive_deltas = horizontal_negative | (~(vertical | horizontal_positive) & all_rows)
+            negative_deltas = horizontal_positive & vertical
+
+            columns.append((positive_deltas, negative_deltas))
+
+        return columns
+
+    @staticmethod
+    def __partition(source_word, target_word):
         source_word_a = np.array(list(source_word))
         target_word_a = np.array(list(target_word))
 
@@ -164,17 +284,21 @@ class LevinsteinPartition(WordSplitter):
 
 class KhalingXFixPartition(WordSplitter):
 
+    # known Khaling affixes, shared by all instances
+    PREFIX_LIST = ("ʔi", "mu", "mʌ")
+
+    SUFFIX_LISTS = (("ŋ", "i", "k", "n"), 
+                    ("de", "tʰer", "kʰʌ"), 
+                    ("ŋʌ", "nɛ", "ʌ", "u", "i", "k"), 
+                    ("t", "w"), 
+                    ("ʌkʌ", "iki", "ŋʌ", "ki", "ɛ", "ʌ", "u", "i"), 
+                    ("si", "su", "n"), 
+                    ("su", "nu", "ni"))
+
     def __init__(self):
         super().__init__()
-        self.prefix_list = ["ʔi", "mu", "mʌ"]
-
-        self.suffix_lists = [["ŋ", "i", "k", "n"], 
-                             ["de", "tʰer", "kʰʌ"], 
-                             ["ŋʌ", "nɛ", "ʌ", "u", "i", "k"], 
-                             ["t", "w"], 
-                             ["ʌkʌ", "iki", "ŋʌ", "ki", "ɛ", "ʌ", "u", "i"], 
-                             ["si", "su", "n"], 
-                             ["su", "nu", "ni"]]
+        self.prefix_list = KhalingXFixPartition.PREFIX_LIST
+        self.suffix_lists = KhalingXFixPartition.SUFFIX_LISTS
 
     def __check_and_cut_prefix(self, input_str):
 
@@ -218,4 +342,34 @@ class KhalingXFixPartition(WordSplitter):
         return source_word, target_word
 
 
+class CachedSplitter(WordSplitter):
+    """A CachedSplitter wraps another WordSplitter and memoizes its results for each (source, target) pair. The returned Word
+    instances are shared between all calls with the same pair and must not be modified.
+    """
+
+    def __init__(self, splitter):
+        """Creates a CachedSplitter with an empty cache
+        
+        Parameters
+        ----------
+        splitter : WordSplitter
+            The splitter whose results should be cached
+        
+        """
+        super().__init__()
+
+        self.splitter = splitter
+        self.cache = {}
+
+    def split_word(self, source, target):
+        key = (source, target)
+        result = self.cache.get(key)
+
+        if result is None:
+            result = self.splitter.split_word(source, target)
+            self.cache[key] = result
+
+        return result
 
+    def clear_cache(self):
+        self.cache = {}
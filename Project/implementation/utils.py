@@ -3,9 +3,28 @@ import sys
 import implementation.Inflection
 from implementation.UniMorph import UniMorph, FeatureCollection
 from implementation.Inflection import SplitMethod
+from implementation.InflectionDataset import InflectionDataset
+import implementation.PredictionWriter as PredictionWriter
 
 
-def read_params():
+# inference options which only some of the tasks support, with the flag and the default value of each
+INFERENCE_OPTIONS = {"backoff": ("--backoff", False), "workers": ("--workers", 1), "compiled": ("--compiled", False)}
+
+
+def read_params(supported_options=()):
+    """Parses the cli parameters of a task script.
+
+    Parameters
+    ----------
+    supported_options : List<string>, optional
+        names of the INFERENCE_OPTIONS the task supports, passing any other of them is an error (the default is (), no option)
+
+    Returns
+    -------
+    Dict
+        parsed cli parameters
+    """
+
     ap = argparse.ArgumentParser()
     ap.add_argument("-g", "--group", required=False, action='store_true',
                     help="Print your group informations and exit")
@@ -19,12 +38,39 @@ def read_params():
     ap.add_argument("-l", "--list", required=False, action='store_true', default=None,
                     help="Your system prints each generated target form (Tasks 1,2) or inflection feature bundle (Task 3) to the standard output with one instance per line")
 
+    ap.add_argument("-mc", "--min-count", required=False, type=int, default=1,
+                    help="Minimal amount of occurrences of a rule in the training data to be kept")
+
+    ap.add_argument("-sc", "--split-cache", required=False, default=None,
+                    help="Path to a file in which the word splits are stored and reused in later runs")
+
+    ap.add_argument("-w", "--workers", required=False, type=int, default=1,
+                    help="Amount of worker processes for the inference, all workers share one copy of the model")
+
+    ap.add_argument("-cp", "--compiled", required=False, action='store_true', default=False,
+                    help="Compiles the rule collections into automata and inflects the test data in batches")
+
+    ap.add_argument("-mr", "--memory-report", required=False, action='store_true', default=False,
+                    help="Prints how much memory the training data and the trained rule collections take to the standard error")
+
+    ap.add_argument("-o", "--output", required=False, default=None,
+                    help="Path of the file for the --list output instead of the standard output, .gz/.bz2/.xz files get compressed")
+
+    ap.add_argument("-f", "--format", required=False, default="list", choices=PredictionWriter.FORMATS,
+                    help="Format of the --list output: list (one prediction per line), tsv, jsonl or unimorph (3 columns)")
+
+    ap.add_argument("-z", "--compression", required=False, default=None, choices=sorted(PredictionWriter.COMPRESSIONS),
+                    help="Compression of the --list output")
+
+    ap.add_argument("-bo", "--backoff", required=False, action='store_true', default=False,
+                    help="Feature combinations which did not appear in the training use the rules of the most similar trained combinations")
+
     args = vars(ap.parse_args())
 
     if args['group']:
         print_members()
 
-    validate_args(args, ap)
+    validate_args(args, ap, supported_options)
 
     return args
 
@@ -40,7 +86,7 @@ Carsten Klaus, 2554140, s8caklau@stud.uni-saarland.de
     sys.exit()
 
 
-def validate_args(args, ap):
+def validate_args(args, ap, supported_options=()):
     path_count = len(
         [x for x in (args['train'], args['test']) if x is not None])
 
@@ -57,8 +103,38 @@ def validate_args(args, ap):
     if path_count == 1:
         ap.error('--tr and --te must be given together')
 
+    for option, (flag, default) in sorted(INFERENCE_OPTIONS.items()):
+        if option not in supported_options and args[option] != default:
+            ap.error('{} is not supported by this task'.format(flag))
+
+    if args['backoff'] and args['workers'] > 1:
+        ap.error('--backoff can not be combined with --workers')
+
+    if args['compiled'] and (args['backoff'] or args['workers'] > 1):
+        ap.error('--compiled can not be combined with --backoff or --workers')
 
-def read_file(path, split_method=SplitMethod.LEVINSTEIN):
+
+def create_prediction_writer(params, predicted_column="form"):
+    """Creates the PredictionWriter for the --list output as selected by the --output, --format and --compression parameters
+    
+    Parameters
+    ----------
+    params : Dict
+        parsed cli parameters of read_params()
+    predicted_column : string, optional
+        column which is predicted by the task, "form" or "features" (the default is "form")
+    
+    Returns
+    -------
+    PredictionWriter
+        The writer, which has to be closed after the last prediction
+    """
+
+    return PredictionWriter.PredictionWriter(params["output"], output_format=params["format"], predicted_column=predicted_column,
+                                             compression=params["compression"])
+
+
+def read_file(path, split_method=SplitMethod.LEVINSTEIN, use_cache=False, cache_path=None):
     """Reads a text file containing inflection samples of shape <inflection> <infinitiv> <inflection features>. For each line of the
     file, this methods creates an inflection instance and stores all together in a list.
     
@@ -66,6 +142,12 @@ def read_file(path, split_method=SplitMethod.LEVINSTEIN):
     ----------
     path : string
         path to the text file to read
+    split_method : SplitMethod, optional
+        Method used to split the words into prefix, stem and suffix (the default is SplitMethod.LEVINSTEIN)
+    use_cache : bool, optional
+        If True, the split of each (lemma, inflection) pair is computed only once (the default is False)
+    cache_path : string, optional
+        Path to a SplitCache file. Splits found in the file are not computed again and new splits get added (the default is None)
     
     Returns
     -------
@@ -74,15 +156,52 @@ def read_file(path, split_method=SplitMethod.LEVINSTEIN):
     """
 
     input = open(path, encoding="utf8")
+    instances = [instance.split() for instance in input]
+    input.close()
+
+    splitter = None
+
+    # load all cached splits of the file at once
+    if cache_path is not None:
+        splitter = implementation.Inflection.SplitterRegistry.get_splitter(split_method, cache_path=cache_path)
+        splitter.prefetch([(lemma, inflection) for lemma, inflection, _ in instances])
 
     inflections = []
 
-    for instance in input:
-        lemma, inflection, feature_list_str = instance.split()
+    for lemma, inflection, feature_list_str in instances:
 
         feature_col = FeatureCollection.create_feature_collection(feature_list_str)
 
-        new_inflection = implementation.Inflection.Inflection.create_inflection(lemma, inflection, feature_col, method=split_method)
+        new_inflection = implementation.Inflection.Inflection.create_inflection(lemma, inflection, feature_col, method=split_method,
+                                                                            use_cache=use_cache, cache_path=cache_path)
         inflections.append(new_inflection)
 
+    # store the new splits
+    if splitter is not None:
+        splitter.flush()
+
     return inflections
+
+
+def read_dataset(path, split_method=SplitMethod.LEVINSTEIN, use_cache=False, cache_path=None):
+    """Reads a text file containing inflection samples like read_file(), but stores the samples in a columnar InflectionDataset
+    instead of a list of Inflection instances.
+    
+    Parameters
+    ----------
+    path : string
+        path to the text file to read
+    split_method : SplitMethod, optional
+        Method used to split the words into prefix, stem and suffix (the default is SplitMethod.LEVINSTEIN)
+    use_cache : bool, optional
+        If True, the split of each (lemma, inflection) pair is computed only once (the default is False)
+    cache_path : string, optional
+        Path to a SplitCache file. Splits found in the file are not computed again and new splits get added (the default is None)
+    
+    Returns
+    -------
+    InflectionDataset
+        A dataset containing all inflection instances extracted from the text file
+    """
+
+    return InflectionDataset.from_file(path, split_method=split_method, use_cache=use_cache, cache_path=cache_path)
@@ -0,0 +1,217 @@
+import argparse
+import itertools
+import multiprocessing
+import time
+import implementation.utils as utils
+from implementation.ChangingRule import SuffixRule, PrefixRule, RuleCollection
+from implementation.Inflection import SplitMethod
+from implementation.SharedModel import SharedModel
+import task2
+
+# rule selection strategies, the name of the RuleCollection method choosing the rules of a paradigm
+SELECTIONS = {"count": "get_highest_count_rules", "overlap": "get_highest_overlap_rules"}
+
+# language specific conditional rules applied after the prefix and suffix rules
+CONDITIONAL_RULES = {"none": None, "khaling": task2.prepare_conditional_rules}
+
+# test data and attached models of a worker process
+worker_data = None
+worker_models = None
+
+
+def read_params():
+    ap = argparse.ArgumentParser(description="Evaluates all combinations of split methods and rule selection strategies on a test set")
+    ap.add_argument("-tr", "--train", required=True,
+                    help="Path to the trainings file")
+    ap.add_argument("-te", "--test", required=True,
+                    help="Path to the (dev) test file")
+    ap.add_argument("-sm", "--split-methods", required=False, nargs="+", choices=[method.name for method in SplitMethod],
+                    default=["LEVINSTEIN", "KHALING_XFIX"],
+                    help="Split methods to evaluate")
+    ap.add_argument("-ps", "--prefix-selections", required=False, nargs="+", choices=sorted(SELECTIONS), default=sorted(SELECTIONS),
+                    help="Selection strategies of the prefix rules to evaluate")
+    ap.add_argument("-ss", "--suffix-selections", required=False, nargs="+", choices=sorted(SELECTIONS), default=sorted(SELECTIONS),
+                    help="Selection strategies of the suffix rules to evaluate")
+    ap.add_argument("-cr", "--conditional-rules", required=False, nargs="+", choices=sorted(CONDITIONAL_RULES), default=["none"],
+                    help="Language specific conditional rules to evaluate")
+    ap.add_argument("-mc", "--min-count", required=False, type=int, default=1,
+                    help="Minimal amount of occurrences of a rule in the training data to be kept")
+    ap.add_argument("-sc", "--split-cache", required=False, default=None,
+                    help="Path to a file in which the word splits are stored and reused in later runs")
+    ap.add_argument("-w", "--workers", required=False, type=int, default=multiprocessing.cpu_count(),
+                    help="Amount of worker processes evaluating the configurations")
+    ap.add_argument("-o", "--output", required=False, default="leaderboard.tsv",
+                    help="Path of the leaderboard file")
+
+    return vars(ap.parse_args())
+
+
+def inflect_data(lemma_list, feature_desc_list, prefix_rule_col, suffix_rule_col, prefix_selection, suffix_selection,
+                 cond_rules_col=None):
+    """Applies learned rules in rule collections to a list of lemmas with corresponding FeatureCollections like the inflect_data()
+    of task1 and task2, but with selectable rule selection strategies.
+
+    Parameters
+    ----------
+    lemma_list : List<string>
+        List of lemma strings that should be inflected
+    feature_desc_list : List<FeatureCollection>
+        List of FeatureCollection instances describing how the corresponding lemma should be inflected
+    prefix_rule_col : RuleCollection
+        RuleCollection (or SharedRuleCollection) instance containing all prefix rules that can be applied
+    suffix_rule_col : RuleCollection
+        RuleCollection (or SharedRuleCollection) instance containing all suffix rules that can be applied
+    prefix_selection : string
+        Key of SELECTIONS used to choose the prefix rules
+    suffix_selection : string
+        Key of SELECTIONS used to choose the suffix rules
+    cond_rules_col : RuleCollection, optional
+        RuleCollection instance containing conditional rules applied after the prefix and suffix rules (the default is None)
+
+    Returns
+    -------
+    List<string>
+        List of inflected lemma strings
+    """
+
+    paradigm_rows = {}
+    for i in range(len(lemma_list)):
+        paradigm_rows.setdefault(lemma_list[i], []).append(i)
+
+    get_prefix_rules = getattr(prefix_rule_col, SELECTIONS[prefix_selection])
+    get_suffix_rules = getattr(suffix_rule_col, SELECTIONS[suffix_selection])
+
+    inflected_data = [None] * len(lemma_list)
+
+    for cur_lemma, row_indices in paradigm_rows.items():
+        cur_feature_descs = [feature_desc_list[i] for i in row_indices]
+
+        best_prefix_rules = get_prefix_rules(cur_lemma, cur_feature_descs)
+        best_suffix_rules = get_suffix_rules(cur_lemma, cur_feature_descs)
+
+        for i, cur_features, best_prefix_rule, best_suffix_rule in zip(row_indices, cur_feature_descs, best_prefix_rules,
+                                                                        best_suffix_rules):
+
+            # use empty rules if no rule matches
+            if best_suffix_rule is None:
+                best_suffix_rule = SuffixRule.empty_rule(cur_features)
+
+            if best_prefix_rule is None:
+                best_prefix_rule = PrefixRule.empty_rule(cur_features)
+
+            inflected_lemma = best_prefix_rule.apply_rule(best_suffix_rule.apply_rule(cur_lemma))
+
+            if cond_rules_col is not None:
+                inflected_lemma = cond_rules_col.try_and_apply_all(inflected_lemma)
+
+            inflected_data[i] = inflected_lemma
+
+    return inflected_data
+
+
+def attach_worker(test_data, model_names):
+    global worker_data, worker_models
+
+    worker_data = test_data
+    worker_models = {split_method: SharedModel.attach(model_name) for split_method, model_name in model_names.items()}
+
+
+def evaluate_configuration(configuration):
+    """Evaluates a single (split method, prefix selection, suffix selection, conditional rules) configuration in a worker process
+
+    Returns
+    -------
+    Dict
+        Dictionary containing the configuration, the amount of correct predictions, the accuracy and the inference time
+    """
+
+    split_method, prefix_selection, suffix_selection, conditional_rules = configuration
+
+    test_lemmas, test_feature_descs, test_ground_truth = worker_data[split_method]
+    model = worker_models[split_method]
+
+    # conditional rules can not be pickled, so every worker creates them itself
+    cond_rules_col = None
+    if CONDITIONAL_RULES[conditional_rules] is not None:
+        cond_rules_col = CONDITIONAL_RULES[conditional_rules]()
+
+    start = time.perf_counter()
+    predictions = inflect_data(test_lemmas, test_feature_descs, model.prefix_rule_col, model.suffix_rule_col, prefix_selection,
+                               suffix_selection, cond_rules_col)
+    duration = time.perf_counter() - start
+
+    correct = sum(1 for prediction, truth in zip(predictions, test_ground_truth) if prediction == truth)
+
+    return {"split method": split_method, "prefix selection": prefix_selection, "suffix selection": suffix_selection,
+            "conditional rules": conditional_rules, "correct": correct, "accuracy": correct / float(len(test_ground_truth)),
+            "time": duration}
+
+
+def write_leaderboard(path, results):
+    """Writes the results sorted by accuracy (best first) as tab separated file
+    """
+
+    columns = ["split method", "prefix selection", "suffix selection", "conditional rules", "correct", "accuracy", "time"]
+
+    with open(path, "w", encoding="utf8") as output:
+        output.write("rank\t" + "\t".join(columns) + "\n")
+
+        for rank, result in enumerate(results, start=1):
+            values = [result[column] for column in columns]
+            values[5] = "{:.3f}".format(values[5] * 100)
+            values[6] = "{:.3f}".format(values[6])
+
+            output.write("{}\t{}\n".format(rank, "\t".join(str(value) for value in values)))
+
+
+def main():
+
+    params = read_params()
+
+    test_data = {}
+    models = {}
+
+    try:
+        # train only once per split method, all selection strategies share the rule collections
+        for split_method_name in params["split_methods"]:
+            split_method = SplitMethod[split_method_name]
+
+            train_inflections = utils.read_dataset(params["train"], split_method=split_method, use_cache=True,
+                                                   cache_path=params["split_cache"])
+            prefix_rule_collection, suffix_rule_collection = RuleCollection.create_rule_collections(train_inflections,
+                                                                                                    min_count=params["min_count"])
+
+            test_inflections = utils.read_dataset(params["test"], split_method=split_method, use_cache=True,
+                                                  cache_path=params["split_cache"])
+
+            test_data[split_method_name] = test_inflections.to_lists()
+            models[split_method_name] = SharedModel.publish(prefix_rule_collection, suffix_rule_collection)
+
+        configurations = list(itertools.product(params["split_methods"], params["prefix_selections"], params["suffix_selections"],
+                                                params["conditional_rules"]))
+
+        model_names = {split_method: model.name for split_method, model in models.items()}
+        workers = max(1, min(params["workers"], len(configurations)))
+
+        with multiprocessing.Pool(workers, initializer=attach_worker, initargs=(test_data, model_names)) as pool:
+            results = pool.map(evaluate_configuration, configurations)
+
+    finally:
+        for model in models.values():
+            model.unlink()
+
+    # best accuracy first, the order of the configurations breaks ties
+    results.sort(key=lambda result: -result["accuracy"])
+
+    write_leaderboard(params["output"], results)
+
+    print("rank\tsplit method\tprefix\tsuffix\tconditional\taccuracy")
+    for rank, result in enumerate(results, start=1):
+        print("{}\t{}\t{}\t{}\t{}\t{:.3f}".format(rank, result["split method"], result["prefix selection"], result["suffix selection"],
+                                                  result["conditional rules"], result["accuracy"] * 100))
+
+    return 0
+
+
+if __name__ == "__main__":
+    main()
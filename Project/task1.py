@@ -1,16 +1,23 @@
 import implementation.utils as utils
+import multiprocessing
 import numpy as np
 from implementation.ChangingRule import SuffixRule, PrefixRule, ConditionalRule, RuleCollection
 from implementation.UniMorph import UniMorph, FeatureCollection
 from implementation.Inflection import SplitMethod
+from implementation.MemoryReport import MemoryReport
+from implementation.RuleAutomaton import CompiledInflector
+from implementation.SharedModel import SharedModel
+
+# model attached by a worker process of inflect_data_parallel()
+worker_model = None
 
 def prepare_test_data(inflections):
-    """Creates out of a list of inlections three lists containing all lemmas, all feature lists and the expected inflection
+    """Creates out of a dataset of inlections three lists containing all lemmas, all feature lists and the expected inflection
     
     Parameters
     ----------
-    inflections : List<Inflection>
-        List of inflection instances extracted from a dataset for which the data should be extracted
+    inflections : InflectionDataset
+        Dataset of inflection instances extracted from a dataset for which the data should be extracted
     
     Returns
     -------
@@ -18,16 +25,7 @@ def prepare_test_data(inflections):
         3 lists containing all relevant information from the data
     """
 
-    test_lemmas = []
-    test_feature_descs = []
-    test_ground_truth = []
-
-    for inflection in inflections:
-        test_lemmas.append(inflection.lemma.to_string())
-        test_ground_truth.append(inflection.inflection.to_string())
-        test_feature_descs.append(inflection.inflection_desc_list)
-
-    return test_lemmas, test_feature_descs, test_ground_truth
+    return inflections.to_lists()
 
 
 def inflect_data(lemma_list, feature_desc_list, prefix_rule_col, suffix_rule_col):
@@ -50,17 +48,117 @@ def inflect_data(lemma_list, feature_desc_list, prefix_rule_col, suffix_rule_col
         List of inflected lemma strings
     """
 
-    inflected_data = []
     assert(len(lemma_list) == len(feature_desc_list))
 
+    # group the rows by lemma, so all inflections of a lemma (its paradigm) are computed together
+    paradigm_rows = {}
+    for i in range(len(lemma_list)):
+        paradigm_rows.setdefault(lemma_list[i], []).append(i)
+
+    inflected_data = [None] * len(lemma_list)
+
+    for cur_lemma, row_indices in paradigm_rows.items():
+        cur_feature_descs = [feature_desc_list[i] for i in row_indices]
+
+        inflected_paradigm = inflect_paradigm(cur_lemma, cur_feature_descs, prefix_rule_col, suffix_rule_col)
+
+        # store the inflections at the positions of the original rows
+        for i, inflected_lemma in zip(row_indices, inflected_paradigm):
+            inflected_data[i] = inflected_lemma
+
+    return inflected_data
+
+
+def inflect_data_parallel(lemma_list, feature_desc_list, prefix_rule_col, suffix_rule_col, workers):
+    """Same as inflect_data(), but the lemmas are distributed over multiple worker processes. The rule collections are published once
+    as a SharedModel, so the workers use the same copy of the model instead of receiving a pickled one each.
+    
+    Parameters
+    ----------
+    lemma_list : List<string>
+        List of lemma strings that should be inflected
+    feature_desc_list : List<FeatureCollection>
+        List of FeatureCollection instances describing how the corresponding lemma should be inflected
+    prefix_rule_col : RuleCollection
+        RuleCollection instance containing all prefix rules that can be applied
+    suffix_rule_col : RuleCollection
+        RuleCollection instance containin all suffix rules that can be applied
+    workers : int
+        Amount of worker processes
+    
+    Returns
+    -------
+    List<string>
+        List of inflected lemma strings
+    """
+
+    assert(len(lemma_list) == len(feature_desc_list))
+
+    # all rows of a lemma are sent to the same worker, so the paradigms stay together
+    paradigm_rows = {}
     for i in range(len(lemma_list)):
-        cur_lemma = lemma_list[i]
-        cur_features = feature_desc_list[i]
+        paradigm_rows.setdefault(lemma_list[i], []).append(i)
 
-        # get best rules
-        best_prefix_rule = prefix_rule_col.get_highest_count_rule(cur_lemma, cur_features)
-        # print(best_prefix_rule)
-        best_suffix_rule = suffix_rule_col.get_highest_overlap_rule(cur_lemma, cur_features)
+    shards = [[] for _ in range(workers)]
+    for shard_index, row_indices in enumerate(paradigm_rows.values()):
+        shards[shard_index % workers].extend(row_indices)
+
+    shards = [row_indices for row_indices in shards if len(row_indices) > 0]
+
+    model = SharedModel.publish(prefix_rule_col, suffix_rule_col)
+    inflected_data = [None] * len(lemma_list)
+
+    try:
+        with multiprocessing.Pool(len(shards), initializer=attach_worker_model, initargs=(model.name,)) as pool:
+            shard_data = [([lemma_list[i] for i in row_indices], [feature_desc_list[i] for i in row_indices]) for row_indices in shards]
+
+            for row_indices, inflected_shard in zip(shards, pool.map(inflect_shard, shard_data)):
+                for i, inflected_lemma in zip(row_indices, inflected_shard):
+                    inflected_data[i] = inflected_lemma
+    finally:
+        model.unlink()
+
+    return inflected_data
+
+
+def attach_worker_model(model_name):
+    global worker_model
+    worker_model = SharedModel.attach(model_name)
+
+
+def inflect_shard(shard_data):
+    lemma_list, feature_desc_list = shard_data
+    return inflect_data(lemma_list, feature_desc_list, worker_model.prefix_rule_col, worker_model.suffix_rule_col)
+
+
+def inflect_paradigm(lemma, feature_descs, prefix_rule_col, suffix_rule_col):
+    """Applies learned rules in rule collections to a single lemma for multiple FeatureCollections (e.g. its whole paradigm). The
+    rules matching the lemma are looked up only once for all FeatureCollections.
+    
+    Parameters
+    ----------
+    lemma : string
+        Lemma string that should be inflected
+    feature_descs : List<FeatureCollection>
+        List of FeatureCollection instances describing the requested inflections of the lemma
+    prefix_rule_col : RuleCollection
+        RuleCollection instance containing all prefix rules that can be applied
+    suffix_rule_col : RuleCollection
+        RuleCollection instance containin all suffix rules that can be applied
+    
+    Returns
+    -------
+    List<string>
+        List of inflected lemma strings, one for each FeatureCollection
+    """
+
+    # get best rules for all feature collections
+    best_prefix_rules = prefix_rule_col.get_highest_count_rules(lemma, feature_descs)
+    best_suffix_rules = suffix_rule_col.get_highest_overlap_rules(lemma, feature_descs)
+
+    inflected_paradigm = []
+
+    for cur_features, best_prefix_rule, best_suffix_rule in zip(feature_descs, best_prefix_rules, best_suffix_rules):
 
         # use empty rule if no rule matches
         if best_suffix_rule is None:
@@ -71,12 +169,12 @@ def inflect_data(lemma_list, feature_desc_list, prefix_rule_col, suffix_rule_col
             best_prefix_rule = PrefixRule.empty_rule(cur_features)
 
         # apply rules on lemma
-        inflected_lemma = best_suffix_rule.apply_rule(cur_lemma)
+        inflected_lemma = best_suffix_rule.apply_rule(lemma)
         inflected_lemma = best_prefix_rule.apply_rule(inflected_lemma)
 
-        inflected_data.append(inflected_lemma)
+        inflected_paradigm.append(inflected_lemma)
 
-    return inflected_data
+    return inflected_paradigm
 
 
 def compute_accuracy(predictions, ground_truth, verbose=False):
@@ -118,28 +216,53 @@ def compute_accuracy(predictions, ground_truth, verbose=False):
 def main():
     
     # read and parse the cli parameters
-    params = utils.read_params()
+    params = utils.read_params(supported_options=("backoff", "workers", "compiled"))
+
+    # trace the memory of the training for --memory-report
+    memory_report = MemoryReport() if params["memory_report"] else None
+    if memory_report is not None:
+        memory_report.start()
     
-    # create rules from training with levinstein splitting
-    train_inflections = utils.read_file(params["train"], split_method=SplitMethod.LEVINSTEIN)
+    # create rules from training with (bit-parallel) levinstein splitting
+    train_inflections = utils.read_dataset(params["train"], split_method=SplitMethod.LEVINSTEIN_BIT_PARALLEL, use_cache=True,
+                                           cache_path=params["split_cache"])
+
+    if memory_report is not None:
+        memory_report.mark("reading training data")
 
     # create rule collection out of the inflections
-    prefix_rule_collection, suffix_rule_collection = RuleCollection.create_rule_collections(train_inflections)
+    prefix_rule_collection, suffix_rule_collection = RuleCollection.create_rule_collections(train_inflections, min_count=params["min_count"])
+
+    if memory_report is not None:
+        memory_report.mark("training")
+        memory_report.stop()
+        memory_report.print_report(prefix_rule_collection, suffix_rule_collection, len(train_inflections))
+
+    # use the rules of similar feature combinations for unseen ones
+    prefix_rule_collection.backoff = params["backoff"]
+    suffix_rule_collection.backoff = params["backoff"]
 
     # create test set
-    test_inflections = utils.read_file(params["test"], split_method=SplitMethod.LEVINSTEIN)
+    test_inflections = utils.read_dataset(params["test"], split_method=SplitMethod.LEVINSTEIN_BIT_PARALLEL, use_cache=True,
+                                          cache_path=params["split_cache"])
 
     # prepare datasets for testing
     test_lemmas, test_feature_descs, test_ground_truth = prepare_test_data(test_inflections)
     
     # inlfect the test data
-    predictions = inflect_data(test_lemmas, test_feature_descs, prefix_rule_collection, suffix_rule_collection)
+    if params["compiled"]:
+        predictions = CompiledInflector.compile(prefix_rule_collection, suffix_rule_collection).inflect_data(test_lemmas,
+                                                                                                             test_feature_descs)
+    elif params["workers"] > 1:
+        predictions = inflect_data_parallel(test_lemmas, test_feature_descs, prefix_rule_collection, suffix_rule_collection,
+                                            params["workers"])
+    else:
+        predictions = inflect_data(test_lemmas, test_feature_descs, prefix_rule_collection, suffix_rule_collection)
 
     # output list for -l parameter
-    if params["list"]:   
-        for single_prediction in predictions:
-            print(single_prediction) 
-        print("")
+    if params["list"]:
+        with utils.create_prediction_writer(params) as writer:
+            writer.write_all(test_lemmas, predictions, test_feature_descs)
 
     # output accuracy for given data
     if params["accuracy"]:
@@ -3,14 +3,16 @@ import numpy as np
 from implementation.ChangingRule import SuffixRule, PrefixRule, ConditionalRule, RuleCollection
 from implementation.UniMorph import UniMorph, FeatureCollection
 from implementation.Inflection import SplitMethod
+from implementation.MemoryReport import MemoryReport
+from implementation.RuleAutomaton import CompiledInflector
 
 def prepare_test_data(inflections):
-    """Creates out of a list of inlections three lists containing all lemmas, all feature lists and the expected inflection
+    """Creates out of a dataset of inlections three lists containing all lemmas, all feature lists and the expected inflection
     
     Parameters
     ----------
-    inflections : List<Inflection>
-        List of inflection instances extracted from a dataset for which the data should be extracted
+    inflections : InflectionDataset
+        Dataset of inflection instances extracted from a dataset for which the data should be extracted
     
     Returns
     -------
@@ -18,16 +20,7 @@ def prepare_test_data(inflections):
         3 lists containing all relevant information from the data
     """
 
-    test_lemmas = []
-    test_feature_descs = []
-    test_ground_truth = []
-
-    for inflection in inflections:
-        test_lemmas.append(inflection.lemma.to_string())
-        test_ground_truth.append(inflection.inflection.to_string())
-        test_feature_descs.append(inflection.inflection_desc_list)
-
-    return test_lemmas, test_feature_descs, test_ground_truth
+    return inflections.to_lists()
 
 
 def inflect_data(lemma_list, feature_desc_list, prefix_rule_col, suffix_rule_col):
@@ -50,17 +43,60 @@ def inflect_data(lemma_list, feature_desc_list, prefix_rule_col, suffix_rule_col
         List of inflected lemma strings
     """
 
-    inflected_data = []
     assert(len(lemma_list) == len(feature_desc_list))
 
+    # group the rows by lemma, so all inflections of a lemma (its paradigm) are computed together
+    paradigm_rows = {}
     for i in range(len(lemma_list)):
-        cur_lemma = lemma_list[i]
-        cur_features = feature_desc_list[i]
+        paradigm_rows.setdefault(lemma_list[i], []).append(i)
+
+    # create the language specific conditional rules once for all lemmas
+    cond_rules_col = prepare_conditional_rules()
+
+    inflected_data = [None] * len(lemma_list)
+
+    for cur_lemma, row_indices in paradigm_rows.items():
+        cur_feature_descs = [feature_desc_list[i] for i in row_indices]
+
+        inflected_paradigm = inflect_paradigm(cur_lemma, cur_feature_descs, prefix_rule_col, suffix_rule_col, cond_rules_col)
+
+        # store the inflections at the positions of the original rows
+        for i, inflected_lemma in zip(row_indices, inflected_paradigm):
+            inflected_data[i] = inflected_lemma
+
+    return inflected_data
+
+
+def inflect_paradigm(lemma, feature_descs, prefix_rule_col, suffix_rule_col, cond_rules_col):
+    """Applies learned rules in rule collections to a single lemma for multiple FeatureCollections (e.g. its whole paradigm). The
+    rules matching the lemma are looked up only once for all FeatureCollections.
+    
+    Parameters
+    ----------
+    lemma : string
+        Lemma string that should be inflected
+    feature_descs : List<FeatureCollection>
+        List of FeatureCollection instances describing the requested inflections of the lemma
+    prefix_rule_col : RuleCollection
+        RuleCollection instance containing all prefix rules that can be applied
+    suffix_rule_col : RuleCollection
+        RuleCollection instance containin all suffix rules that can be applied
+    cond_rules_col : RuleCollection
+        RuleCollection instance containing the language specific conditional rules applied after the prefix and suffix rules
+    
+    Returns
+    -------
+    List<string>
+        List of inflected lemma strings, one for each FeatureCollection
+    """
+
+    # get best rules for all feature collections
+    best_prefix_rules = prefix_rule_col.get_highest_count_rules(lemma, feature_descs)
+    best_suffix_rules = suffix_rule_col.get_highest_overlap_rules(lemma, feature_descs)
 
-        # get best rules
-        best_prefix_rule = prefix_rule_col.get_highest_count_rule(cur_lemma, cur_features)
-        # print(best_prefix_rule)
-        best_suffix_rule = suffix_rule_col.get_highest_overlap_rule(cur_lemma, cur_features)
+    inflected_paradigm = []
+
+    for cur_features, best_prefix_rule, best_suffix_rule in zip(feature_descs, best_prefix_rules, best_suffix_rules):
 
         # use empty rule if no rule matches
         if best_suffix_rule is None:
@@ -71,16 +107,15 @@ def inflect_data(lemma_list, feature_desc_list, prefix_rule_col, suffix_rule_col
             best_prefix_rule = PrefixRule.empty_rule(cur_features)
 
         # apply rules on lemma
-        inflected_lemma = best_suffix_rule.apply_rule(cur_lemma)
+        inflected_lemma = best_suffix_rule.apply_rule(lemma)
         inflected_lemma = best_prefix_rule.apply_rule(inflected_lemma)
 
-        # create and apply language specific conditional rules
-        cond_rules_col = prepare_conditional_rules()
+        # apply language specific conditional rules
         inflected_lemma = cond_rules_col.try_and_apply_all(inflected_lemma)
 
-        inflected_data.append(inflected_lemma)
+        inflected_paradigm.append(inflected_lemma)
 
-    return inflected_data
+    return inflected_paradigm
 
 
 def compute_accuracy(predictions, ground_truth, verbose=False):
@@ -149,24 +184,51 @@ def prepare_conditional_rules():
 def main():
 
     # read and parse the cli parameters
-    params = utils.read_params()
+    params = utils.read_params(supported_options=("backoff", "compiled"))
+
+    # trace the memory of the training for --memory-report
+    memory_report = MemoryReport() if params["memory_report"] else None
+    if memory_report is not None:
+        memory_report.start()
     
     # create rules from training set 
-    train_inflections = utils.read_file(params["train"], split_method=SplitMethod.KHALING_XFIX)
-    prefix_rule_collection, suffix_rule_collection = RuleCollection.create_rule_collections(train_inflections)
+    train_inflections = utils.read_dataset(params["train"], split_method=SplitMethod.KHALING_XFIX, use_cache=True,
+                                           cache_path=params["split_cache"])
+
+    if memory_report is not None:
+        memory_report.mark("reading training data")
+
+    prefix_rule_collection, suffix_rule_collection = RuleCollection.create_rule_collections(train_inflections, min_count=params["min_count"])
+
+    if memory_report is not None:
+        memory_report.mark("training")
+        memory_report.stop()
+        memory_report.print_report(prefix_rule_collection, suffix_rule_collection, len(train_inflections))
+
+    # use the rules of similar feature combinations for unseen ones
+    prefix_rule_collection.backoff = params["backoff"]
+    suffix_rule_collection.backoff = params["backoff"]
 
     # create rules from test set
-    test_inflections = utils.read_file(params["test"], split_method=SplitMethod.KHALING_XFIX)
+    test_inflections = utils.read_dataset(params["test"], split_method=SplitMethod.KHALING_XFIX, use_cache=True,
+                                          cache_path=params["split_cache"])
     test_lemmas, test_feature_descs, test_ground_truth = prepare_test_data(test_inflections)
     
     # compute the lemma inflections
-    predictions = inflect_data(test_lemmas, test_feature_descs, prefix_rule_collection, suffix_rule_collection)
+    if params["compiled"]:
+        predictions = CompiledInflector.compile(prefix_rule_collection, suffix_rule_collection).inflect_data(test_lemmas,
+                                                                                                             test_feature_descs)
+
+        # apply language specific conditional rules
+        cond_rules_col = prepare_conditional_rules()
+        predictions = [cond_rules_col.try_and_apply_all(prediction) for prediction in predictions]
+    else:
+        predictions = inflect_data(test_lemmas, test_feature_descs, prefix_rule_collection, suffix_rule_collection)
 
     # output list for parameter -l
     if params["list"]:
-        for single_prediciton in predictions:
-            print(single_prediciton)        
-        print("")
+        with utils.create_prediction_writer(params) as writer:
+            writer.write_all(test_lemmas, predictions, test_feature_descs)
 
     # Output accuracy for given data
     if params["accuracy"]:
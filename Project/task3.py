@@ -3,6 +3,7 @@ import numpy as np
 from implementation.ChangingRule import SuffixRule, PrefixRule, ConditionalRule, RuleCollection
 from implementation.UniMorph import UniMorph, FeatureCollection
 from implementation.Inflection import SplitMethod
+from implementation.MemoryReport import MemoryReport
 
 def compute_test_metrics(predictions, ground_truth):
     """Computes for a given list of predicted and expected FeatureCollections the Precision, Recall and F-Score rating.
@@ -297,12 +298,12 @@ def infer_inflection_features(lemma_str, inflection_str, prefix_rule_col, suffix
 
 
 def prepare_test_data(inflections):
-    """Creates out of a list of inlections three lists containing all lemmas, all feature lists and the expected inflection
+    """Creates out of a dataset of inlections three lists containing all lemmas, all feature lists and the expected inflection
     
     Parameters
     ----------
-    inflections : List<Inflection>
-        List of inflection instances extracted from a dataset for which the data should be extracted
+    inflections : InflectionDataset
+        Dataset of inflection instances extracted from a dataset for which the data should be extracted
     
     Returns
     -------
@@ -310,55 +311,68 @@ def prepare_test_data(inflections):
         3 lists containing all relevant information from the data
     """
 
-    test_lemmas = []
-    test_feature_descs = []
-    test_ground_truth = []
-
-    for inflection in inflections:
-        test_lemmas.append(inflection.lemma.to_string())
-        test_ground_truth.append(inflection.inflection.to_string())
-        test_feature_descs.append(inflection.inflection_desc_list)
-
-    return test_lemmas, test_feature_descs, test_ground_truth
+    return inflections.to_lists()
 
 
 def main():
 
     # read parameters from CLI
     params = utils.read_params()
+
+    # trace the memory of the training for --memory-report
+    memory_report = MemoryReport() if params["memory_report"] else None
+    if memory_report is not None:
+        memory_report.start()
     
     # Create rules from training
-    train_inflections = utils.read_file(params["train"], split_method=SplitMethod.KHALING_XFIX)
-    prefix_rule_collection, suffix_rule_collection = RuleCollection.create_rule_collections(train_inflections)
+    train_inflections = utils.read_dataset(params["train"], split_method=SplitMethod.KHALING_XFIX, use_cache=True,
+                                           cache_path=params["split_cache"])
+
+    if memory_report is not None:
+        memory_report.mark("reading training data")
+
+    prefix_rule_collection, suffix_rule_collection = RuleCollection.create_rule_collections(train_inflections, min_count=params["min_count"])
+
+    if memory_report is not None:
+        memory_report.mark("training")
+        memory_report.stop()
+        memory_report.print_report(prefix_rule_collection, suffix_rule_collection, len(train_inflections))
 
     # create rules from test set
-    test_inflections = utils.read_file(params["test"], split_method=SplitMethod.KHALING_XFIX)
+    test_inflections = utils.read_dataset(params["test"], split_method=SplitMethod.KHALING_XFIX, use_cache=True,
+                                          cache_path=params["split_cache"])
     test_lemmas, test_feature_descs, test_inflection = prepare_test_data(test_inflections)
 
     predicted_feature_descriptions = []
 
-    # iterate over all instances of the test set
-    for i in range(len(test_lemmas)):
+    # the predictions are written as soon as they are inferred
+    writer = utils.create_prediction_writer(params, predicted_column="features") if params["list"] else None
+
+    try:
+        # iterate over all instances of the test set
+        for i in range(len(test_lemmas)):
 
-        # extract current lemma and the current target inflection
-        cur_lemma = test_lemmas[i]
-        cur_inflection = test_inflection[i]
+            # extract current lemma and the current target inflection
+            cur_lemma = test_lemmas[i]
+            cur_inflection = test_inflection[i]
 
-        # infer the features to the current data
-        pred_features = infer_inflection_features(cur_lemma, cur_inflection, prefix_rule_collection, suffix_rule_collection)
+            # infer the features to the current data
+            pred_features = infer_inflection_features(cur_lemma, cur_inflection, prefix_rule_collection, suffix_rule_collection)
         
-        # if no features have been found, use an empty feature collection
-        if pred_features is None:
-            pred_features = FeatureCollection([])
-
-        # store the current result
-        predicted_feature_descriptions.append(pred_features)
-
-     # output list for -l parameter
-    if params["list"]:   
-        for single_prediction in predicted_feature_descriptions:
-            print(single_prediction) 
-        print("")
+            # if no features have been found, use an empty feature collection
+            if pred_features is None:
+                pred_features = FeatureCollection([])
+
+            # store the current result
+            predicted_feature_descriptions.append(pred_features)
+
+            # output list for -l parameter
+            if writer is not None:
+                writer.write(cur_lemma, cur_inflection, pred_features)
+    finally:
+        # the predictions written so far are kept if the inference fails
+        if writer is not None:
+            writer.close()
 
     # output accuracy for given data
     if params["accuracy"]:
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Text sanitizing shared by the homework scripts. The scripts are run from their homework directory, so exactly one module per
+directory adds the repository root to sys.path: HW04/ex_7.py, HW05/ngram_stream.py and the utils.py of HW06, HW07 and HW08. The
+other modules of a directory import sanitize_text from that module.
+"""
+
+import itertools
+import re
+
+# everything but lowercase letters and the space separating the joined tokens
+NON_CHARACTERS = re.compile('[^a-z ]+')
+NON_CHARACTER_BYTES = bytes(byte for byte in range(256) if not (ord('a') <= byte <= ord('z') or byte == ord(' ')))
+
+
+def sanitize_joined(text):
+    """Lowercase a space joined text and remove all non characters except the spaces. The text is filtered as UTF-8 bytes with
+    bytes.translate: other characters than a-z are either deleted ASCII bytes or consist of bytes above 127 only.
+    """
+
+    return text.lower().encode('utf-8', 'surrogatepass').translate(None, NON_CHARACTER_BYTES).decode('ascii')
+
+
+def sanitize_text(tokens, stopwords=None, replacements=None):
+    """Sanizite Text:
+        Lowercase
+        Replace tokens which are equal to a key of replacements after lowercasing
+        Remove non characters
+        Remove stopwords
+    The tokens are joined and sanitized as one text, which gives the same tokens as sanitizing them one by one.
+
+    Parameters
+    ----------
+    tokens : string[]
+        Tokenized text
+    stopwords : string[], optional
+        Words which are removed after sanitizing (the default is None, which keeps all words)
+    replacements : dict, optional
+        Lowercase tokens mapped to their replacement, e.g. {'yours': 'you', 'll': ''} (the default is None)
+
+    Returns
+    -------
+    string[]
+        Sanitized tokens.
+
+    """
+
+    tokens = tokens if isinstance(tokens, list) else list(tokens)
+
+    if len(tokens) == 0:
+        return []
+
+    text = ' '.join(tokens)
+
+    # tokens containing spaces would be split, sanitize them one by one
+    if text.count(' ') != len(tokens) - 1:
+        return [token for token in map(sanitize_token, tokens, itertools.repeat(stopwords), itertools.repeat(replacements))
+                if token != '']
+
+    if replacements:
+        text = ' '.join([replacements.get(token, token) for token in text.lower().split(' ')])
+
+    # split() without separator drops the tokens which became empty
+    sanitized = sanitize_joined(text).split()
+
+    if stopwords:
+        stopwords = set(stopwords)
+        sanitized = [token for token in sanitized if token not in stopwords]
+
+    return sanitized
+
+
+def sanitize_token(token, stopwords=None, replacements=None):
+    """Sanitize a single token like sanitize_text, returns '' for removed tokens
+    """
+
+    token = token.lower()
+
+    if replacements:
+        token = replacements.get(token, token)
+
+    token = NON_CHARACTERS.sub('', token.replace(' ', ''))
+
+    if stopwords and token in stopwords:
+        return ''
+    return token
+
+
+def iter_sanitized(tokens, stopwords=None, replacements=None, batch_size=65536):
+    """Generator version of sanitize_text for token streams: the tokens are sanitized in batches of batch_size tokens
+
+    Parameters
+    ----------
+    tokens : iterable of string
+        Tokenized text, e.g. a generator over a large file
+    stopwords : string[], optional
+        Words which are removed after sanitizing (the default is None)
+    replacements : dict, optional
+        Lowercase tokens mapped to their replacement (the default is None)
+    batch_size : int, optional
+        Amount of tokens sanitized at once (the default is 65536)
+
+    Yields
+    ------
+    string
+        Sanitized tokens.
+
+    """
+
+    tokens = iter(tokens)
+    stopwords = set(stopwords) if stopwords else None
+
+    while True:
+        batch = list(itertools.islice(tokens, batch_size))
+
+        if len(batch) == 0:
+            return
+
+        for token in sanitize_text(batch, stopwords, replacements):
+            yield token